@@ -1,8 +1,5 @@
 import os
 import sys
-import random
-import numpy as np
-import pandas as pd
 import PySimpleGUI as sg
 
 # set warnings
@@ -12,7 +9,9 @@ warnings.simplefilter(action='ignore', category = Warning)
 
 # import modules and classes
 #------------------------------------------------------------------------------ 
-from modules.components.data_classes import DataSetFinder, DataGenerator
+from modules.components.data_classes import DataSetFinder, DataLoader
+from modules.components.pipeline_classes import GenerationWorker
+from modules.components.writer_classes import DataWriter
 import modules.global_variables as GlobVar
 
 # [WINDOW THEME AND OPTIONS]
@@ -37,7 +36,9 @@ path_frame = sg.Frame('Select folder path', layout = [[input_text, input_path, i
 save_button = sg.Button('Save', key = '-SAVE-', disabled=True)
 path_input = sg.Input(key = '-SAVEPATH-', expand_x = True, enable_events=True)
 folder_browse = sg.FolderBrowse(initial_folder = initial_folder)
-save_frame = sg.Frame('Save file', layout = [[path_input, folder_browse, save_button]], expand_x=True)
+format_combo = sg.Combo(list(DataWriter.formats), default_value = 'csv', key = '-FORMAT-', readonly = True)
+save_frame = sg.Frame('Save file', layout = [[path_input, folder_browse, format_combo, save_button]], 
+                      expand_x=True)
 
 # [LAYOUT OF THE WINDOW]
 #==============================================================================
@@ -45,11 +46,14 @@ main_text = sg.Text('Placeholder text', font = ('Arial', 12), size = (50,1))
 CDF_button = sg.Button('Cumulative Distribution Function (CDF)', expand_x=True, key = '-CDF-', disabled=True)
 kernel_button = sg.Button('Kernel Sampling (KS)', expand_x=True, key = '-KERNEL-', disabled=True)
 dist_button = sg.Button('Theoretical Distribution Fitting (TDF)', expand_x=True, key = '-TDF-', disabled=True)
+copula_button = sg.Button('Gaussian Copula (COP)', expand_x=True, key = '-COP-', disabled=True)
 validate_button = sg.Button('Data Validation', expand_x=True, key = '-VALID-', disabled=True)
+cancel_button = sg.Button('Cancel', key = '-CANCEL-', disabled=True)
 input_text = sg.Text('Number of synthetic values to generate', font = ('Arial', 12), size = (30,1))
 num_input = sg.Input(key = '-NUMVAL-', size = (30,1), enable_events=True)
 left_column = sg.Column([[input_text], [num_input]])
-right_column = sg.Column([[CDF_button], [kernel_button], [dist_button], [validate_button]], expand_x=True)
+right_column = sg.Column([[CDF_button], [kernel_button], [dist_button], [copula_button], [validate_button]], 
+                         expand_x=True)
 progress_bar = sg.ProgressBar(100, orientation = 'horizontal', size = (50, 20), key = '-PBAR-', expand_x=True)
 main_layout = [[main_text],
                [path_frame],
@@ -57,12 +61,14 @@ main_layout = [[main_text],
                [left_column, right_column],
                [sg.HSeparator()],               
                [save_frame],
-               [progress_bar]]              
+               [progress_bar, cancel_button]]              
 
 # [WINDOW LOOP]
 #==============================================================================
 main_window = sg.Window('Simple table generator V1.0', main_layout, 
                         grab_anywhere = True, resizable = True, finalize = True)
+generation_methods = {'-CDF-' : 'CDF', '-KERNEL-' : 'KDE', '-TDF-' : 'TDF', '-COP-' : 'COP'}
+worker = None
 while True:
     event, values = main_window.read()
     if event == sg.WIN_CLOSED:
@@ -76,12 +82,13 @@ while True:
         GlobVar.file_name = file_name
         folder_path = values['-PATHINPUT-']     
         filepath = os.path.join(folder_path, target_file)        
-        df = pd.read_csv(filepath, sep= ';', encoding='utf-8')
+        df = DataLoader(filepath).load()
         GlobVar.dataframe = df        
         if values['-NUMVAL-'].isdigit():
             main_window['-CDF-'].update(disabled = False)  
             main_window['-KERNEL-'].update(disabled = False) 
             main_window['-TDF-'].update(disabled = False)         
+            main_window['-COP-'].update(disabled = False)
 
     # [REFRESH AND RESET STATUS OF SELECTION]
     #==========================================================================
@@ -99,52 +106,69 @@ while True:
             main_window['-CDF-'].update(disabled = False)  
             main_window['-KERNEL-'].update(disabled = False) 
             main_window['-TDF-'].update(disabled = False) 
+            main_window['-COP-'].update(disabled = False)
         else: 
             main_window['-CDF-'].update(disabled = True)  
             main_window['-KERNEL-'].update(disabled = True) 
             main_window['-TDF-'].update(disabled = True)     
+            main_window['-COP-'].update(disabled = True)
 
-    # [CUMULATIVE DISTRIBUTION FUNCTION]
+    # [START GENERATION ON A BACKGROUND THREAD]
     #==========================================================================
-    if event == '-CDF-':                
+    if event in ('-CDF-', '-KERNEL-', '-TDF-', '-COP-') and worker is None:
+        method = generation_methods[event]
         num_values = int(values['-NUMVAL-'])
-        generator = DataGenerator()
-        df = GlobVar.dataframe
-        df_synthetic = generator.CDF_generator(df, num_values, progress_bar)          
-        GlobVar.synthetic_dataframe = df_synthetic
         folder_path = values['-SAVEPATH-']
-        save_path = os.path.join(folder_path, 'CDF_synthetic_{}.csv'.format(file_name))
-        df_synthetic.to_csv(save_path, index = False, sep = ';', encoding = 'utf-8') 
-        main_window['-VALID-'].update(disabled = False)           
-
-    # [REFRESH AND RESET STATUS OF SELECTION]
+        writer = DataWriter(values['-FORMAT-'])
+        save_path = os.path.join(folder_path, '{}_synthetic_{}{}'.format(method, GlobVar.file_name, 
+                                                                         writer.extension))
+        options = {'bandwidth' : 'loo', 'kernel' : 'gaussian'} if method == 'KDE' else {}
+        worker = GenerationWorker(GlobVar.dataframe, method, num_values, save_path,
+                                  main_window.write_event_value, GlobVar.seed, 
+                                  writer = writer, **options)
+        for key in generation_methods:
+            main_window[key].update(disabled = True)
+        main_window['-VALID-'].update(disabled = True)
+        main_window['-CANCEL-'].update(disabled = False)
+        main_window['-PBAR-'].update(0, max = 100)
+        main_text.update('Fitting {} models...'.format(method))
+        worker.start()
+
+    # [CANCEL GENERATION]
     #==========================================================================
-    if event == '-KERNEL-':        
-        num_entries = int(values['-NUMVAL-'])        
-        rand = np.random.RandomState(42)
-        dist_list = ['uniform','normal','exponential','lognormal','chisquare','beta']
-        KDE_sampling = DataGenerator() 
-        synthetic_data = KDE_sampling.KDE_generator(df, num_entries, 42)
-        synthetic_df = pd.DataFrame(synthetic_data).T
-        GlobVar.synthetic_dataframe = df_synthetic
-        folder_path = values['-SAVEPATH-']
-        save_path = os.path.join(folder_path, 'KDE_synthetic__{}.csv'.format(file_name))
-        df_synthetic.to_csv(save_path, index = False, sep = ';', encoding = 'utf-8')  
-        main_window['-VALID-'].update(disabled = False) 
+    if event == '-CANCEL-' and worker is not None:
+        worker.cancel()
+        main_window['-CANCEL-'].update(disabled = True)
+        main_text.update('Cancelling...')
 
-    # [REFRESH AND RESET STATUS OF SELECTION]
+    # [PROGRESS OF THE GENERATION]
     #==========================================================================
-    if event == '-TDF-':
-        random.seed(42) 
-        num_entries = int(values['-NUMVAL-'])
-        distfit_sampling = DataGenerator() 
-        synthetic_data = distfit_sampling.dist_fitter(df, num_entries, progress_bar)
-        synthetic_df = pd.DataFrame(synthetic_data).T
-        GlobVar.synthetic_dataframe = synthetic_df
-        folder_path = values['-SAVEPATH-']
-        save_path = os.path.join(folder_path, 'TDF_synthetic_{}.csv'.format(file_name))
-        df_synthetic.to_csv(save_path, index = False, sep = ';', encoding = 'utf-8')
-        main_window['-VALID-'].update(disabled = False)
+    if event == '-PROGRESS-':
+        progress = values['-PROGRESS-']
+        main_window['-PBAR-'].update(progress['current'], max = progress['total'])
+        if progress['stage'] == 'fit':
+            main_text.update('Fitted {} of {} columns'.format(progress['current'], progress['total']))
+        else:
+            main_text.update('Generated {} of {} rows ({:.0f} rows/s)'.format(progress['current'], 
+                             progress['total'], progress['rate']))
+
+    # [END OF THE GENERATION]
+    #==========================================================================
+    if event in ('-DONE-', '-CANCELLED-', '-FAILED-'):
+        worker.join()
+        worker = None
+        if event == '-DONE-':
+            result = values['-DONE-']
+            GlobVar.synthetic_dataframe = result['preview']
+            main_window['-VALID-'].update(disabled = False)
+            main_text.update('Saved {} rows in {:.2f} s'.format(result['rows'], result['seconds']))
+        elif event == '-CANCELLED-':
+            main_text.update('Generation cancelled')
+        else:
+            main_text.update('Generation failed ({})'.format(values['-FAILED-']))
+        for key in generation_methods:
+            main_window[key].update(disabled = not values['-NUMVAL-'].isdigit())
+        main_window['-CANCEL-'].update(disabled = True)
 
     # [REFRESH AND RESET STATUS OF SELECTION]
     #==========================================================================
@@ -152,6 +176,9 @@ while True:
         import modules.data_validation
         del sys.modules['modules.data_validation']   
 
+if worker is not None:
+    worker.cancel()
+    worker.join()
 main_window.close()
     
 
@@ -0,0 +1,231 @@
+import os
+import sys
+import time
+import argparse
+
+# set warnings
+#------------------------------------------------------------------------------
+import warnings
+warnings.simplefilter(action='ignore', category = Warning)
+
+# import modules and classes
+#------------------------------------------------------------------------------
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from modules.components.pipeline_classes import GenerationPipeline, JobScheduler, ShardedGeneration
+from modules.components.statistics_classes import StreamingValidator, CorrelationDrift
+from modules.components.writer_classes import DataWriter
+
+# [PARSING OF ARGUMENTS]
+#==============================================================================
+def bandwidth_type(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def bins_type(value):
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def build_parser():
+    parser = argparse.ArgumentParser(description = 'Simple table generator (headless mode)')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    generate_parser = subparsers.add_parser('generate', help = 'fit models and generate synthetic data')
+    generate_parser.add_argument('input', help = 'input file or folder (.csv, .xlsx)')
+    generate_parser.add_argument('-j', '--jobs', type = int, default = 1,
+                                 help = 'number of files processed in parallel')
+    generate_parser.add_argument('--skip-existing', action = 'store_true',
+                                 help = 'skip files already generated with the same input and settings')
+    fit_parser = subparsers.add_parser('fit', help = 'fit models and save them to disk')
+    fit_parser.add_argument('input', help = 'input file or folder (.csv, .xlsx)')
+    fit_parser.add_argument('--merge-shards', action = 'store_true',
+                            help = 'fit one approximate model from all files of the folder')
+    sample_parser = subparsers.add_parser('sample', help = 'generate synthetic data from saved models')
+    sample_parser.add_argument('input', nargs = '+', help = 'saved model files')
+    validate_parser = subparsers.add_parser('validate',
+                                            help = 'compare synthetic data with real data in chunks')
+    validate_parser.add_argument('input', help = 'real data file (.csv, .xlsx)')
+    validate_parser.add_argument('synthetic', help = 'synthetic data file (.csv)')
+    validate_parser.add_argument('-b', '--bins', type = int, default = 100,
+                                 help = 'maximum number of histogram bins per column')
+    validate_parser.add_argument('-r', '--reservoir', type = int, default = 0,
+                                 help = 'rows sampled for the correlation comparison (0 to skip)')
+    validate_parser.add_argument('-c', '--chunk-size', type = int, default = 100000,
+                                 help = 'number of rows read at once')
+    report_parser = subparsers.add_parser('report', help = 'render the validation figures and summary')
+    report_parser.add_argument('input', help = 'real data file (.csv, .xlsx)')
+    report_parser.add_argument('synthetic', help = 'synthetic data file (.csv)')
+    report_parser.add_argument('-b', '--bins', type = bins_type, default = 'auto',
+                               help = 'number of histogram bins or numpy binning rule')
+    report_parser.add_argument('-j', '--jobs', type = int, default = 1,
+                               help = 'number of worker processes rendering the figures')
+    shard_parser = subparsers.add_parser('shard', help = 'plan a sharded generation and run it locally')
+    shard_parser.add_argument('input', help = 'input file (.csv, .xlsx) or saved model file (.pkl)')
+    shard_parser.add_argument('--shards', type = int, required = True, help = 'number of shards')
+    shard_parser.add_argument('-j', '--jobs', type = int, default = 1,
+                              help = 'number of shards generated in parallel')
+    shard_parser.add_argument('--plan-only', action = 'store_true',
+                              help = 'only write the manifest (shards are run with run-shard)')
+    run_shard_parser = subparsers.add_parser('run-shard', help = 'generate a single shard of a manifest')
+    run_shard_parser.add_argument('manifest', help = 'manifest of the sharded generation')
+    run_shard_parser.add_argument('-i', '--shard', type = int, required = True,
+                                  help = 'index of the shard')
+    run_shard_parser.add_argument('--write-workers', type = int, default = 1,
+                                  help = 'number of threads writing the partition files')
+    merge_parser = subparsers.add_parser('merge', help = 'collect the shards of a manifest')
+    merge_parser.add_argument('manifest', help = 'manifest of the sharded generation')
+    for subparser in (shard_parser, merge_parser):
+        subparser.add_argument('--concatenate', default = None,
+                               help = 'concatenate the shards into this file')
+    for subparser in (generate_parser, fit_parser, sample_parser, validate_parser, report_parser,
+                      shard_parser):
+        subparser.add_argument('-o', '--output', required = True, help = 'output folder or file path')
+        subparser.add_argument('-s', '--seed', type = int, default = 42, help = 'random seed')
+    for subparser in (generate_parser, fit_parser, shard_parser):
+        subparser.add_argument('-m', '--method', default = 'CDF', choices = GenerationPipeline.methods,
+                               help = 'generation method')
+        subparser.add_argument('-w', '--workers', type = int, default = 1,
+                               help = 'number of worker processes used for fitting')
+        subparser.add_argument('--bandwidth', type = bandwidth_type, default = 'loo',
+                               help = 'KDE bandwidth strategy (scott, silverman, loo, grid) or value')
+        subparser.add_argument('--kernel', default = 'gaussian', help = 'KDE kernel')
+        subparser.add_argument('--cache-dir', default = None,
+                               help = 'folder of the cache of fitted distributions (TDF)')
+        subparser.add_argument('--cache-size', type = int, default = 1000,
+                               help = 'maximum number of cached distributions (TDF)')
+        subparser.add_argument('--approximate', action = 'store_true',
+                               help = 'fit the CDF method with quantile sketches (large inputs)')
+        subparser.add_argument('--error', type = float, default = 0.005,
+                               help = 'maximum quantile error of the sketches')
+    for subparser in (generate_parser, sample_parser, shard_parser):
+        subparser.add_argument('-n', '--rows', type = int, required = True,
+                               help = 'number of synthetic rows to generate')
+        subparser.add_argument('-c', '--chunk-size', type = int, default = 100000,
+                               help = 'number of rows generated and written at once')
+        subparser.add_argument('-f', '--format', default = 'csv', choices = list(DataWriter.formats),
+                               help = 'output format of the synthetic data')
+        subparser.add_argument('--compression', default = None,
+                               help = 'compression codec (parquet: snappy, zstd, gzip; '
+                                      'feather: lz4, zstd)')
+        subparser.add_argument('--partitioned', action = 'store_true',
+                               help = 'write a folder with one file per chunk')
+        subparser.add_argument('--write-workers', type = int, default = 1,
+                               help = 'number of threads writing the partition files')
+
+    return parser
+
+
+# [RUN PIPELINE]
+#==============================================================================
+def print_report(report):
+    if report['status'] == 'done':
+        print('{} -> {} ({} rows, {:.2f} s, {:.0f} rows/s)'.format(report['input'], report['output'],
+              report['rows'], report['seconds'], report['rows_per_second']))
+    elif report['status'] == 'skipped':
+        print('{} -> {} (up to date, skipped)'.format(report['input'], report['output']))
+    else:
+        print('{} FAILED ({})'.format(report['input'], report['error']))
+
+# [MAIN]
+#==============================================================================
+def main(argv = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'validate':
+        validator = StreamingValidator(args.bins, args.chunk_size, reservoir_size = args.reservoir,
+                                       seed = args.seed)
+        results = validator.validate(args.input, args.synthetic)
+        results['columns'].to_csv(args.output, index = False, sep = ';', encoding = 'utf-8')
+        print(results['columns'][['column', 'mean_real', 'mean_synthetic', 'mean_diff_%', 'std_diff_%',
+                                  'JS', 'wasserstein', 'TV']].to_string(index = False))
+        if results['correlations'] is not None:
+            drift = CorrelationDrift(*results['correlations'])
+            print('Spearman correlation drift: {}'.format(drift.summary()))
+            print(drift.top_pairs(10).to_string(index = False))
+        return 0
+
+    if args.command == 'report':
+        from modules.components.data_classes import DataLoader
+        from modules.components.report_classes import ValidationReport
+        start = time.perf_counter()
+        dataframe = DataLoader(args.input).load()
+        synthetic_dataframe = DataLoader(args.synthetic).load()
+        report = ValidationReport(args.bins, args.jobs)
+        report_path = report.run(dataframe, synthetic_dataframe, args.output)
+        print('Saved report {} ({:.2f} s)'.format(report_path, time.perf_counter() - start))
+        return 0
+
+    if args.command == 'run-shard':
+        writer = DataWriter(workers = args.write_workers)
+        status = ShardedGeneration(writer).run_shard(args.manifest, args.shard)
+        print('Shard {} rows {}-{} -> {} ({:.2f} s, {:.0f} rows/s)'.format(status['id'], status['start'],
+              status['stop'], status['output'], status['seconds'], status['rows_per_second']))
+        return 0
+
+    if args.command == 'merge':
+        try:
+            manifest = ShardedGeneration().merge(args.manifest, args.concatenate)
+        except RuntimeError as e:
+            print(e)
+            return 1
+        print('Merged {} shards ({} rows)'.format(len(manifest['shards']), manifest['rows_done']))
+        return 0
+
+    options = {}
+    if args.command in ('generate', 'sample', 'shard'):
+        options['writer'] = DataWriter(args.format, args.compression, args.partitioned,
+                                       args.write_workers)
+    if getattr(args, 'method', 'CDF') == 'KDE':
+        options.update({'bandwidth' : args.bandwidth, 'kernel' : args.kernel})
+    elif getattr(args, 'method', 'CDF') == 'TDF':
+        options.update({'cache_dir' : args.cache_dir, 'cache_size' : args.cache_size})
+    pipeline = GenerationPipeline(getattr(args, 'method', 'CDF'), getattr(args, 'rows', 0),
+                                  args.seed, getattr(args, 'chunk_size', 100000),
+                                  getattr(args, 'workers', 1), getattr(args, 'approximate', False),
+                                  getattr(args, 'error', 0.005), **options)
+    if args.command == 'fit' and args.merge_shards:
+        if not args.approximate:
+            parser.error('--merge-shards requires --approximate')
+        print('Saved model {}'.format(pipeline.fit_shards(args.input, args.output)))
+    elif args.command == 'fit':
+        for model_path in pipeline.fit_models(args.input, args.output):
+            print('Saved model {}'.format(model_path))
+    elif args.command == 'generate':
+        scheduler = JobScheduler(pipeline, args.jobs, args.skip_existing)
+        reports = scheduler.run(args.input, args.output, print_report)
+        statuses = [r['status'] for r in reports]
+        total_rows = sum(r['rows'] for r in reports)
+        print('Processed {} files: {} done, {} skipped, {} failed ({} rows)'.format(len(reports),
+              statuses.count('done'), statuses.count('skipped'), statuses.count('failed'), total_rows))
+        if 'failed' in statuses:
+            return 1
+    elif args.command == 'shard':
+        from modules.components.sampler_classes import TableSampler
+        if args.input.lower().endswith('.pkl'):
+            table_sampler = TableSampler.load(args.input)
+        else:
+            table_sampler = pipeline.fit(args.input)
+        sharding = ShardedGeneration(pipeline.writer, args.chunk_size)
+        if args.plan_only:
+            manifest_path = sharding.plan(table_sampler, args.rows, args.shards, args.output, args.seed)
+            print('Saved manifest {}'.format(manifest_path))
+            return 0
+        manifest = sharding.run(table_sampler, args.rows, args.shards, args.output, args.seed, 
+                                args.jobs, args.concatenate,
+                                lambda s: print('Shard {} rows {}-{} ({:.2f} s, {:.0f} rows/s)'.format(
+                                    s['id'], s['start'], s['stop'], s['seconds'], s['rows_per_second'])))
+        print('Generated {} rows in {} shards ({:.2f} s, {:.0f} rows/s)'.format(manifest['rows_done'],
+              len(manifest['shards']), manifest['seconds'], manifest['rows_per_second']))
+    else:
+        results = pipeline.sample_models(args.input, args.output)
+        for result in results:
+            print('{} -> {} ({} rows, {:.2f} s)'.format(result['input'], result['output'],
+                                                       result['rows'], result['seconds']))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+import warnings
+warnings.simplefilter(action='ignore', category = Warning)
+
+# [IMPORT MODULES AND CLASSES]
+#==============================================================================
+if __name__ == '__main__':
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from modules.components.data_classes import DataGenerator
+
+# [REFERENCE IMPLEMENTATION]
+#==============================================================================
+def loop_CDF_generator(dataframe, num_val):
+
+    """
+    loop_CDF_generator(dataframe, num_val)
+
+    Per-value CDF sampling loop, as originally implemented in DataGenerator. One
+    call to random.random() and one scalar interpolation for every generated value.
+    Used as the baseline of the benchmark.
+
+    Keyword arguments:
+
+    dataframe (pd.dataframe): dataframe of real numbers (original dataframe)
+    num_val (int):            number of synthetic values to be generated (int)
+
+    Returns:
+
+    fake_df (pd.dataframe): dataframe with synthetic data
+
+    """
+    dataframe_numeric = dataframe.select_dtypes(include = np.number)
+    fake_list = []
+    for col in dataframe_numeric.columns:
+        x = np.sort(dataframe_numeric[col].values)
+        n = x.size
+        y = np.arange(1, n+1)/n
+        synth_cols = []
+        for num in range(num_val):
+            synth_cols.append(np.interp(random.random(), y, x))
+        fake_list.append(synth_cols)
+    fake_df = pd.DataFrame(fake_list).T
+    fake_df.columns = dataframe_numeric.columns
+
+    return fake_df
+
+# [BENCHMARK SETTINGS]
+#==============================================================================
+parser = argparse.ArgumentParser(description = 'Benchmark of vectorized vs per-value CDF sampling')
+parser.add_argument('--sizes', type = int, nargs = '+', default = [10**4, 10**6, 10**7],
+                    help = 'number of synthetic rows to generate')
+parser.add_argument('--columns', type = int, default = 4,
+                    help = 'number of columns of the source table')
+parser.add_argument('--source-rows', type = int, default = 1000,
+                    help = 'number of rows of the source table')
+parser.add_argument('--max-loop-rows', type = int, default = 10**6,
+                    help = 'above this size the loop timing is extrapolated linearly')
+parser.add_argument('--seed', type = int, default = 42)
+args = parser.parse_args()
+
+# [BENCHMARK LOOP]
+#==============================================================================
+rng = np.random.default_rng(args.seed)
+source_df = pd.DataFrame(rng.gamma(2.0, 2.0, size = (args.source_rows, args.columns)),
+                         columns = ['col_{}'.format(i) for i in range(args.columns)])
+generator = DataGenerator()
+print('{:>12} {:>16} {:>16} {:>10}'.format('rows', 'loop (s)', 'vectorized (s)', 'speedup'))
+loop_rate = None
+for num_val in args.sizes:
+    start = time.perf_counter()
+    generator.CDF_generator(source_df, num_val, seed = args.seed)
+    vector_time = time.perf_counter() - start
+    if num_val <= args.max_loop_rows or loop_rate is None:
+        start = time.perf_counter()
+        loop_CDF_generator(source_df, num_val)
+        loop_time = time.perf_counter() - start
+        loop_rate = loop_time/num_val
+        loop_text = '{:.4f}'.format(loop_time)
+    else:
+        loop_time = loop_rate * num_val
+        loop_text = '~{:.4f}'.format(loop_time)
+    speedup = loop_time/vector_time
+    print('{:>12} {:>16} {:>16.4f} {:>9.1f}x'.format(num_val, loop_text, vector_time, speedup))
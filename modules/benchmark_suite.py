@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import argparse
+import warnings
+warnings.simplefilter(action='ignore', category = Warning)
+
+# [IMPORT MODULES AND CLASSES]
+#==============================================================================
+if __name__ == '__main__':
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from modules.components.benchmark_classes import BenchmarkSuite
+
+# [BENCHMARK SETTINGS]
+#==============================================================================
+parser = argparse.ArgumentParser(description = 'Benchmark of generation, validation and I/O')
+parser.add_argument('--sizes', type = int, nargs = '+', default = [10**4, 10**5, 10**6],
+                    help = 'number of rows of the source tables')
+parser.add_argument('--columns', type = int, default = 8,
+                    help = 'number of columns of the source tables')
+parser.add_argument('--shapes', nargs = '+', default = None, choices = BenchmarkSuite.shapes,
+                    help = 'distribution shapes of the columns (all shapes by default)')
+parser.add_argument('--null-rate', type = float, default = 0.0,
+                    help = 'fraction of missing values in each column')
+parser.add_argument('--methods', nargs = '+', default = ['CDF', 'COP', 'KDE', 'TDF'],
+                    choices = ['CDF', 'COP', 'KDE', 'TDF'], help = 'generation methods')
+parser.add_argument('--formats', nargs = '*', default = ['csv', 'parquet', 'feather'],
+                    choices = ['csv', 'parquet', 'feather'], help = 'file formats')
+parser.add_argument('--max-tdf-rows', type = int, default = 10**4,
+                    help = 'largest table fitted with distfit (slow fit)')
+parser.add_argument('--repeats', type = int, default = 3, help = 'timed runs of each benchmark')
+parser.add_argument('--no-memory', action = 'store_true', help = 'skip the peak memory runs')
+parser.add_argument('--seed', type = int, default = 42)
+parser.add_argument('-o', '--output', default = 'benchmark_results.json',
+                    help = 'path of the JSON results')
+parser.add_argument('--compare', default = None, help = 'JSON results of a previous run')
+parser.add_argument('--threshold', type = float, default = 0.2,
+                    help = 'relative slowdown reported as a regression')
+args = parser.parse_args()
+
+# [BENCHMARK LOOP]
+#==============================================================================
+folder = os.path.join(os.path.dirname(os.path.abspath(args.output)), 'benchmark_files')
+suite = BenchmarkSuite(args.columns, args.shapes, args.null_rate, args.repeats,
+                       not args.no_memory, args.seed, folder)
+results = suite.run(args.sizes, args.methods, args.formats, args.max_tdf_rows,
+                    lambda n: print('Completed benchmarks with {} rows'.format(n)))
+suite.save(results, args.output)
+table = [[r['group'], r['benchmark'], r['rows'], r['seconds'], r['rows_per_second'],
+          r['peak_memory_MB']] for r in results['results']]
+print('{:>10} {:>22} {:>10} {:>12} {:>14} {:>12}'.format('group', 'benchmark', 'rows', 'time (s)',
+                                                         'rows/s', 'memory (MB)'))
+for group, name, rows, seconds, rate, memory in table:
+    print('{:>10} {:>22} {:>10} {:>12.4f} {:>14.0f} {:>12}'.format(group, name, rows, seconds,
+          rate or 0, '-' if memory is None else '{:.1f}'.format(memory)))
+print('Saved results {}'.format(args.output))
+
+# [COMPARISON WITH A PREVIOUS RUN]
+#==============================================================================
+if args.compare is not None:
+    with open(args.compare, 'r', encoding = 'utf-8') as file:
+        baseline = json.load(file)
+    comparison = BenchmarkSuite.compare(results, baseline, args.threshold)
+    print(comparison.to_string(index = False, float_format = '{:.3f}'.format))
+    regressions = comparison[comparison['regression']]
+    if not regressions.empty:
+        print('{} benchmarks slower than the baseline by more than {:.0%}'.format(regressions.shape[0],
+              args.threshold))
+        sys.exit(1)
@@ -0,0 +1,349 @@
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# import modules and classes
+#------------------------------------------------------------------------------
+from modules.components.data_classes import DataLoader, DataGenerator
+from modules.components.statistics_classes import DistributionStatistics, StreamingValidator
+from modules.components.statistics_classes import RankCorrelation, CorrelationDrift
+from modules.components.writer_classes import DataWriter
+
+
+# define the class for benchmarking the generation, validation and I/O hot paths on
+# synthetic source tables of configurable size and distribution shapes
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class BenchmarkSuite:
+
+    """
+    BenchmarkSuite(columns, shapes, null_rate, repeats, memory, seed, folder)
+
+    Builds synthetic source tables with the given number of columns, cycling over
+    a set of distribution shapes, and times the model fitting and sampling of each
+    generation method, the validation statistics (KS test, histogram distances,
+    Spearman and Kendall correlations, correlation drift, streaming validation)
+    and the load and write steps of each file format. Each benchmark is repeated
+    and the fastest time is kept. The peak memory allocated during the benchmark
+    (numpy and python objects, measured with tracemalloc, while pyarrow buffers
+    are not traced) is recorded by an additional run, so that tracing does not
+    affect the timings. Results are saved as JSON and can be compared with the
+    results of a previous run.
+
+    Keyword arguments:
+
+    columns (int):      number of columns of the source tables
+    shapes (list):      distribution shapes of the columns (all shapes if not given)
+    null_rate (float):  fraction of missing values in each column
+    repeats (int):      number of timed runs of each benchmark
+    memory (bool):      record the peak memory of each benchmark
+    seed (int):         seed for random number generation
+    folder (str):       folder of the temporary files of the I/O benchmarks
+
+    """
+    shapes = ('normal', 'gamma', 'lognormal', 'uniform', 'bimodal', 'poisson', 'categorical')
+    version = 1
+
+    def __init__(self, columns = 8, shapes = None, null_rate = 0.0, repeats = 3, memory = True,
+                 seed = 42, folder = 'benchmark_files'):
+        self.columns = columns
+        self.column_shapes = list(shapes or self.shapes)
+        for shape in self.column_shapes:
+            if shape not in self.shapes:
+                raise ValueError('Unknown distribution shape: {}'.format(shape))
+        self.null_rate = null_rate
+        self.repeats = max(repeats, 1)
+        self.memory = memory
+        self.seed = seed
+        self.folder = folder
+        self.records = []
+
+    # values of a column with the given distribution shape
+    #--------------------------------------------------------------------------
+    def column_values(self, shape, num_rows, rng):
+        if shape == 'normal':
+            return rng.normal(50, 10, num_rows)
+        if shape == 'gamma':
+            return rng.gamma(2.0, 2.0, num_rows)
+        if shape == 'lognormal':
+            return rng.lognormal(0, 1, num_rows)
+        if shape == 'uniform':
+            return rng.uniform(0, 100, num_rows)
+        if shape == 'bimodal':
+            return np.where(rng.random(num_rows) < 0.4, rng.normal(-3, 1, num_rows),
+                            rng.normal(4, 1.5, num_rows))
+        if shape == 'poisson':
+            return rng.poisson(4, num_rows)
+
+        return rng.choice(np.array(['red', 'green', 'blue', 'yellow', 'black']), num_rows,
+                          p = [0.4, 0.25, 0.2, 0.1, 0.05])
+
+    # build a synthetic source table
+    #--------------------------------------------------------------------------
+    def source_table(self, num_rows):
+
+        """
+        source_table(num_rows)
+
+        Builds a source table of the given number of rows, with columns cycling
+        over the selected distribution shapes (col_0_normal, col_1_gamma, ...).
+        Missing values are inserted at random with the selected null rate.
+
+        Keyword arguments:
+
+        num_rows (int): number of rows of the table
+
+        Returns:
+
+        dataframe (pd.dataframe): source table
+
+        """
+        rng = np.random.default_rng(self.seed)
+        source_columns = {}
+        for id in range(self.columns):
+            shape = self.column_shapes[id % len(self.column_shapes)]
+            values = self.column_values(shape, num_rows, rng)
+            if self.null_rate > 0:
+                missing = rng.random(num_rows) < self.null_rate
+                values = values.astype(object if shape == 'categorical' else float)
+                values[missing] = None if shape == 'categorical' else np.nan
+            source_columns['col_{}_{}'.format(id, shape)] = values
+        dataframe = DataLoader('').downcast(pd.DataFrame(source_columns))
+
+        return dataframe
+
+    # time a benchmark and record its peak memory
+    #--------------------------------------------------------------------------
+    def measure(self, group, name, num_rows, function, *args, **kwargs):
+
+        """
+        measure(group, name, num_rows, function, *args, **kwargs)
+
+        Runs the function once to warm up lazy imports, then the selected number
+        of times, and records the fastest time, the throughput and (with an 
+        additional traced run) the peak memory allocated by the function.
+
+        Keyword arguments:
+
+        group (str):         group of the benchmark (generation, validation, io)
+        name (str):          name of the benchmark
+        num_rows (int):      number of rows processed by the function
+        function (function): function to be timed
+        args, kwargs:        arguments of the function
+
+        Returns:
+
+        result: value returned by the first run of the function
+
+        """
+        function(*args, **kwargs)
+        peak_memory = None
+        if self.memory:
+            tracemalloc.start()
+            function(*args, **kwargs)
+            peak_memory = tracemalloc.get_traced_memory()[1]/2**20
+            tracemalloc.stop()
+        timings, result = [], None
+        for id in range(self.repeats):
+            start = time.perf_counter()
+            value = function(*args, **kwargs)
+            timings.append(time.perf_counter() - start)
+            if id == 0:
+                result = value
+            del value
+        seconds = min(timings)
+        self.records.append({'group' : group, 'benchmark' : name, 'rows' : num_rows,
+                             'columns' : self.columns, 'seconds' : seconds,
+                             'mean_seconds' : float(np.mean(timings)),
+                             'rows_per_second' : num_rows/seconds if seconds > 0 else None,
+                             'peak_memory_MB' : peak_memory})
+
+        return result
+
+    # fit and sample with each generation method
+    #--------------------------------------------------------------------------
+    def generation_benchmarks(self, dataframe, methods, max_TDF_rows = 10000):
+        generator = DataGenerator()
+        num_rows = dataframe.shape[0]
+        synthetic_dataframe = None
+        for method in methods:
+            if method == 'TDF' and num_rows > max_TDF_rows:
+                continue
+            table_sampler = self.measure('generation', '{} fit'.format(method), num_rows,
+                                         generator.fit_samplers, dataframe, method, 
+                                         seed = self.seed)
+            fake_df = self.measure('generation', '{} sample'.format(method), num_rows,
+                                   table_sampler.sample, num_rows, self.seed)
+            if synthetic_dataframe is None:
+                synthetic_dataframe = fake_df
+
+        return synthetic_dataframe
+
+    # validation statistics of real and synthetic data
+    #--------------------------------------------------------------------------
+    def validation_benchmarks(self, dataframe, synthetic_dataframe):
+        num_rows = dataframe.shape[0]
+        engine = DistributionStatistics()
+        numeric_columns = engine.shared_columns(dataframe, synthetic_dataframe)
+        real_numeric = dataframe[numeric_columns]
+        fake_numeric = synthetic_dataframe[numeric_columns]
+        self.measure('validation', 'KS test', num_rows, engine.KS_statistics, dataframe,
+                     synthetic_dataframe)
+        self.measure('validation', 'histogram distances', num_rows, engine.histogram_comparison,
+                     dataframe, synthetic_dataframe)
+        matrix_real = self.measure('validation', 'Spearman', num_rows,
+                                   lambda x: RankCorrelation().Spearman(x), real_numeric)
+        self.measure('validation', 'Kendall', num_rows, lambda x: RankCorrelation().Kendall(x),
+                     real_numeric)
+        matrix_fake = RankCorrelation().Spearman(fake_numeric)
+        self.measure('validation', 'correlation drift', num_rows,
+                     lambda x, y: CorrelationDrift(x, y).summary(), matrix_real, matrix_fake)
+
+    # load and write the synthetic table in each file format
+    #--------------------------------------------------------------------------
+    def io_benchmarks(self, dataframe, synthetic_dataframe, formats, chunk_size = 100000):
+        os.makedirs(self.folder, exist_ok = True)
+        num_rows = synthetic_dataframe.shape[0]
+        chunks = [synthetic_dataframe.iloc[i : i + chunk_size] 
+                  for i in range(0, num_rows, chunk_size)]
+        paths = {}
+        for format in formats:
+            writer = DataWriter(format)
+            path = os.path.join(self.folder, 'synthetic_{}{}'.format(num_rows, writer.extension))
+            self.measure('io', '{} write'.format(format), num_rows, writer.write, chunks, path)
+            self.measure('io', '{} load'.format(format), num_rows,
+                         lambda x: DataLoader(x).load(chunk_size), path)
+            paths[format] = path
+        if 'csv' in paths:
+            real_path = os.path.join(self.folder, 'source_{}.csv'.format(num_rows))
+            DataWriter('csv').write([dataframe], real_path)
+            validator = StreamingValidator(chunk_size = chunk_size)
+            self.measure('io', 'streaming validation', num_rows, validator.validate, real_path,
+                         paths['csv'])
+            paths['source'] = real_path
+        for path in paths.values():
+            os.remove(path)
+        if not os.listdir(self.folder):
+            os.rmdir(self.folder)
+
+    # system and package information of the run
+    #--------------------------------------------------------------------------
+    def environment(self):
+        return {'python' : platform.python_version(), 'numpy' : np.__version__,
+                'pandas' : pd.__version__, 'platform' : platform.platform(),
+                'processor' : platform.processor(), 'cpu_count' : os.cpu_count()}
+
+    # run the benchmarks at each table size
+    #--------------------------------------------------------------------------
+    def run(self, sizes, methods = ('CDF', 'COP', 'KDE', 'TDF'), 
+            formats = ('csv', 'parquet', 'feather'), max_TDF_rows = 10000, callback = None):
+
+        """
+        run(sizes, methods, formats, max_TDF_rows, callback)
+
+        Runs the generation, validation and I/O benchmarks on source tables of
+        each size. The synthetic table of the first method is used for the
+        validation and I/O benchmarks.
+
+        Keyword arguments:
+
+        sizes (list):         number of rows of the source tables
+        methods (list):       generation methods to be benchmarked
+        formats (list):       file formats to be benchmarked
+        max_TDF_rows (int):   largest table fitted with distfit (slow fit)
+        callback (function):  function called with each table size when done (optional)
+
+        Returns:
+
+        results (dict): environment, settings and benchmark records
+
+        """
+        self.records = []
+        for num_rows in sizes:
+            dataframe = self.source_table(num_rows)
+            synthetic_dataframe = self.generation_benchmarks(dataframe, methods, max_TDF_rows)
+            if synthetic_dataframe is None:
+                table_sampler = DataGenerator().fit_samplers(dataframe, 'CDF')
+                synthetic_dataframe = table_sampler.sample(num_rows, self.seed)
+            self.validation_benchmarks(dataframe, synthetic_dataframe)
+            if formats:
+                self.io_benchmarks(dataframe, synthetic_dataframe, formats)
+            if callback is not None:
+                callback(num_rows)
+        results = {'version' : self.version,
+                   'created' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'environment' : self.environment(),
+                   'settings' : {'sizes' : list(sizes), 'columns' : self.columns,
+                                 'shapes' : self.column_shapes, 'null_rate' : self.null_rate,
+                                 'repeats' : self.repeats, 'methods' : list(methods),
+                                 'formats' : list(formats), 'seed' : self.seed},
+                   'results' : self.records}
+        if sys.platform != 'win32':
+            import resource
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            results['max_rss_MB'] = max_rss/2**20 if sys.platform == 'darwin' else max_rss/2**10
+
+        return results
+
+    # save the results to a JSON file
+    #--------------------------------------------------------------------------
+    def save(self, results, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok = True)
+        with open(path, 'w', encoding = 'utf-8') as file:
+            json.dump(results, file, indent = 2)
+
+    # compare the results with those of a previous run
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def compare(results, baseline, threshold = 0.2, min_seconds = 0.01):
+
+        """
+        compare(results, baseline, threshold, min_seconds)
+
+        Compares the timings and peak memory of the benchmarks found in both runs
+        (same benchmark, rows and columns). Benchmarks that are slower than the
+        baseline by more than the threshold (and by more than min_seconds, to
+        ignore the noise of very short benchmarks) are flagged as regressions. 
+        Runs on tables with different distribution shapes or null rates are not
+        compared.
+
+        Keyword arguments:
+
+        results (dict):       results of the current run
+        baseline (dict):      results of the previous run
+        threshold (float):    relative slowdown flagged as regression
+        min_seconds (float):  smallest absolute slowdown flagged as regression
+
+        Returns:
+
+        comparison (pd.dataframe): time and memory ratios of each benchmark
+
+        """
+        for setting in ('shapes', 'null_rate'):
+            if results['settings'][setting] != baseline['settings'][setting]:
+                raise ValueError('The baseline was run with different {}'.format(setting))
+        keys = ['group', 'benchmark', 'rows', 'columns']
+        current = pd.DataFrame(results['results'])
+        previous = pd.DataFrame(baseline['results'])
+        if current.empty or previous.empty:
+            return pd.DataFrame(columns = keys + ['time_ratio', 'memory_ratio', 'regression'])
+        comparison = current.merge(previous, on = keys, suffixes = ('', '_baseline'))
+        comparison['time_ratio'] = comparison['seconds']/comparison['seconds_baseline']
+        comparison['memory_ratio'] = (comparison['peak_memory_MB'].astype(float)/
+                                      comparison['peak_memory_MB_baseline'].astype(float))
+        slowdown = comparison['seconds'] - comparison['seconds_baseline']
+        comparison['regression'] = ((comparison['time_ratio'] > 1 + threshold) & 
+                                    (slowdown > min_seconds))
+        comparison = comparison[keys + ['seconds_baseline', 'seconds', 'time_ratio',
+                                        'peak_memory_MB_baseline', 'peak_memory_MB',
+                                        'memory_ratio', 'regression']]
+
+        return comparison
@@ -1,11 +1,14 @@
 import os
-from tqdm import tqdm
 import numpy as np
-import random
-from distfit import distfit
 import pandas as pd
-from sklearn.neighbors import KernelDensity
-from sklearn.model_selection import GridSearchCV
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# import modules and classes
+#------------------------------------------------------------------------------ 
+from modules.components.sampler_classes import CDFSampler, DistfitSampler, KDESampler, TableSampler
+from modules.components.sampler_classes import QuantileSketch, SketchSampler, AliasSampler, RandomStreams
+from modules.components.statistics_classes import RankCorrelation
+from modules.components.writer_classes import DataWriter
 
     
 # define the class for inspection of the input folder and generation of files list.
@@ -35,12 +38,198 @@ class DataSetFinder:
     """
     def __init__(self, path):        
         self.path = path
-        extensions = ('.csv', '.xlsx')
-        os.chdir(path)
+        extensions = ('.csv', '.xlsx', '.parquet', '.feather')
         self.all_files = os.listdir(path)
         self.target_files = [f for f in self.all_files if f.endswith(extensions)]   
     
     
+# define the class for loading datasets with low memory usage. Numeric columns are
+# downcasted to the narrowest dtype that preserves all values
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class DataLoader:
+    
+    """ 
+    DataLoader(filepath, sep, encoding)
+    
+    Loads .csv, .xlsx, .parquet and .feather datasets (or folders of partition
+    files written by DataWriter) in chunks. Numeric columns of each chunk are 
+    downcasted to the narrowest safe dtype before being concatenated, so that the
+    full table is never held with the default 64-bit dtypes, and text columns 
+    holding ISO formatted dates are parsed as datetime columns. Chunks can also be
+    iterated directly to build statistics without loading the whole file.
+    
+    Keyword arguments:
+        
+    filepath (str):  path of the file (or folder of partition files)
+    sep (str):       separator of the .csv file
+    encoding (str):  encoding of the .csv file
+    
+    """
+    def __init__(self, filepath, sep = ';', encoding = 'utf-8'):        
+        self.filepath = filepath
+        self.sep = sep
+        self.encoding = encoding
+        self.is_excel = filepath.lower().endswith('.xlsx')
+        self.is_arrow = filepath.lower().endswith(('.parquet', '.feather'))
+        self.parts = []
+        if os.path.isdir(filepath):
+            self.parts = [os.path.join(filepath, f) for f in sorted(os.listdir(filepath))
+                          if f.endswith(('.csv', '.parquet', '.feather'))]
+
+    # open a .parquet or .feather file as an Arrow dataset
+    #--------------------------------------------------------------------------
+    def arrow_dataset(self):
+        import pyarrow.dataset as ds
+        format = 'ipc' if self.filepath.lower().endswith('.feather') else 'parquet'
+
+        return ds.dataset(self.filepath, format = format)
+
+    # read the first rows of the file
+    #--------------------------------------------------------------------------
+    def head(self, num_rows = 10000, columns = None):
+        if self.parts:
+            return DataLoader(self.parts[0], self.sep, self.encoding).head(num_rows, columns)
+        if self.is_arrow:
+            return self.arrow_dataset().head(num_rows, columns = columns).to_pandas()
+        if self.is_excel:
+            return pd.read_excel(self.filepath, nrows = num_rows, usecols = columns)        
+
+        return pd.read_csv(self.filepath, sep = self.sep, encoding = self.encoding, 
+                           nrows = num_rows, usecols = columns)
+
+    # identify the numeric columns of the file
+    #--------------------------------------------------------------------------
+    def numeric_columns(self, num_rows = 10000):
+        sample_df = self.head(num_rows)
+        
+        return list(sample_df.select_dtypes(include = np.number).columns)
+
+    # downcast numeric columns to the narrowest safe dtype
+    #--------------------------------------------------------------------------
+    def downcast(self, dataframe):
+        
+        """ 
+        downcast(dataframe)
+        
+        Downcasts the numeric columns of the dataframe. Integer columns are moved
+        to the smallest integer dtype holding their range, while float columns 
+        are converted to float32 only if all values are preserved exactly.
+        
+        Keyword arguments:
+            
+        dataframe (pd.dataframe): dataframe to be downcasted
+        
+        Returns:
+            
+        dataframe (pd.dataframe): downcasted dataframe
+        
+        """
+        for col in dataframe.select_dtypes(include = np.number).columns:
+            array = dataframe[col].values
+            if np.issubdtype(array.dtype, np.integer):
+                dataframe[col] = pd.to_numeric(dataframe[col], downcast = 'integer')
+            elif np.issubdtype(array.dtype, np.floating) and array.dtype != np.float32:
+                narrow = array.astype(np.float32)
+                if np.array_equal(narrow.astype(array.dtype), array, equal_nan = True):
+                    dataframe[col] = narrow
+        
+        return dataframe
+
+    # parse text columns holding dates
+    #--------------------------------------------------------------------------
+    def parse_dates(self, dataframe):
+        
+        """ 
+        parse_dates(dataframe)
+        
+        Converts the text columns whose values are all ISO formatted dates (or 
+        missing) to datetime columns. Other text columns are left unchanged.
+        
+        Keyword arguments:
+            
+        dataframe (pd.dataframe): dataframe to be parsed
+        
+        Returns:
+            
+        dataframe (pd.dataframe): dataframe with datetime columns
+        
+        """
+        for col in dataframe.select_dtypes(include = ['object', 'string']).columns:
+            try:
+                dataframe[col] = pd.to_datetime(dataframe[col], format = 'ISO8601')
+            except (ValueError, TypeError, OverflowError):
+                continue
+        
+        return dataframe
+
+    # iterate over chunks of data
+    #--------------------------------------------------------------------------
+    def iter_chunks(self, chunk_size = 100000, columns = None):
+        
+        """ 
+        iter_chunks(chunk_size, columns)
+        
+        Yields the columns of the file as consecutive chunks, with downcasted 
+        numeric columns.
+        
+        Keyword arguments:
+            
+        chunk_size (int): number of rows of each chunk
+        columns (list):   columns to be read (all columns if not given)
+        
+        Returns:
+            
+        chunk (generator): generator of dataframes
+        
+        """
+        if self.parts:
+            for part in self.parts:
+                loader = DataLoader(part, self.sep, self.encoding)
+                yield from loader.iter_chunks(chunk_size, columns)
+        elif self.is_arrow:
+            for batch in self.arrow_dataset().to_batches(columns = columns, batch_size = chunk_size):
+                yield self.downcast(batch.to_pandas())
+        elif self.is_excel:
+            dataframe = pd.read_excel(self.filepath, usecols = columns)
+            for start in range(0, dataframe.shape[0], chunk_size):
+                chunk = dataframe.iloc[start : start + chunk_size].copy()
+                yield self.downcast(chunk)
+        else:
+            reader = pd.read_csv(self.filepath, sep = self.sep, encoding = self.encoding, 
+                                 usecols = columns, chunksize = chunk_size)
+            for chunk in reader:
+                yield self.downcast(chunk)
+
+    # load the data of the file
+    #--------------------------------------------------------------------------
+    def load(self, chunk_size = 100000, columns = None):
+        
+        """ 
+        load(chunk_size, columns)
+        
+        Loads the file chunk by chunk, and returns the dataframe with downcasted
+        numeric columns and parsed datetime columns, in the order of the file.
+        
+        Keyword arguments:
+            
+        chunk_size (int): number of rows read at once
+        columns (list):   columns to be read (all columns if not given)
+        
+        Returns:
+            
+        dataframe (pd.dataframe): loaded dataframe
+        
+        """
+        chunks = list(self.iter_chunks(chunk_size, columns))
+        if not chunks:
+            return pd.DataFrame(columns = columns)
+        dataframe = pd.concat(chunks, ignore_index = True)
+        
+        return self.downcast(self.parse_dates(dataframe))
+    
+    
 # define class for generation of synthetic values
 #==============================================================================
 #==============================================================================
@@ -53,130 +242,382 @@ class DataGenerator:
     Defines the ensembles of generator methods to produce syntethic dataframes,
     based on the original set of data. Different methodologies include CDF sampling,
     data fitting with standard distribution models and KDE models. Dataseries are
-    generated as disjointed distributions.
+    generated as disjointed distributions, except for the Gaussian copula mode (COP)
+    which preserves the rank correlations of the original data.
        
     """      
         
+    samplers = {'CDF' : CDFSampler,
+                'TDF' : DistfitSampler,
+                'KDE' : KDESampler,
+                'COP' : CDFSampler}
+
+    # fit the column samplers of the given method
+    #--------------------------------------------------------------------------
+    def fit_samplers(self, dataframe, method, pbar = None, workers = 1, seed = None, 
+                     cancel_event = None, **kwargs):
+        
+        """ 
+        fit_samplers(dataframe, method, pbar, workers, seed, cancel_event, **kwargs):
+        
+        Fits one sampler per column of the original dataframe. Numeric columns use
+        the given generation method, datetime columns are sampled through the CDF 
+        of their epoch representation (nanoseconds), and the other columns (text, 
+        categories, booleans) are sampled from their frequency tables with the alias
+        method. The fitted samplers are grouped into a TableSampler that can be used
+        to generate any number of synthetic rows, with the same column order and 
+        dtypes of the original dataframe. Columns are fitted independently, and can
+        be distributed over a pool of worker processes. Each column receives its own
+        fitting stream from RandomStreams, so that results do not depend on the 
+        number of workers. If a cancellation event is given, it is checked before
+        each column is fitted, and the fit stops as soon as it is set.
+        
+        Keyword arguments:  
+            
+        dataframe (pd.dataframe): dataframe of real numbers (original dataframe)
+        method (str):             generation method (CDF, TDF, KDE or COP)
+        pbar (sg.ProgressBar):    progress bar to be updated (optional)
+        workers (int):            number of worker processes used for fitting
+        seed (int):               seed for random number generation (optional)
+        cancel_event (Event):     event that stops the fit when set (optional)
+        kwargs:                   options of the column samplers (e.g. bandwidth)
+        
+        Returns: 
+            
+        table_sampler (TableSampler): fitted samplers of all columns (None if cancelled)
+        
+        """ 
+        columns = list(dataframe.columns)
+        num_cols = len(columns)
+        if num_cols == 0:
+            raise ValueError('No columns found in the dataframe')
+        numeric_columns = set(dataframe.select_dtypes(include = np.number).columns)
+        datetime_columns = set(dataframe.select_dtypes(include = ['datetime', 'datetimetz']).columns)
+        rngs = RandomStreams(seed).fit_rngs(num_cols)
+        sampler_list, arrays = [], []
+        for col in columns:
+            if col in numeric_columns:
+                sampler_list.append(self.samplers[method](**kwargs))
+                arrays.append(dataframe[col].values)
+            elif col in datetime_columns:
+                sampler_list.append(CDFSampler())
+                arrays.append(self.epoch_values(dataframe[col]))
+            else:
+                sampler_list.append(AliasSampler())
+                arrays.append(dataframe[col].to_numpy(dtype = object))
+        if workers > 1 and num_cols > 1:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                futures = {}
+                for id, array in enumerate(arrays):
+                    future = executor.submit(sampler_list[id].fit, array, rngs[id])
+                    futures[future] = id
+                for done, future in enumerate(as_completed(futures)):
+                    if cancel_event is not None and cancel_event.is_set():
+                        executor.shutdown(wait = False, cancel_futures = True)
+                        return None
+                    sampler_list[futures[future]] = future.result()
+                    if pbar is not None:
+                        pbar.update(done + 1, max=num_cols)
+        else:
+            for id, array in enumerate(arrays):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                sampler_list[id].fit(array, rngs[id])
+                if pbar is not None:
+                    pbar.update(id + 1, max=num_cols)
+        dtypes = {col : dataframe[col].dtype for col in columns}
+        table_sampler = TableSampler(method, columns, sampler_list, dtypes = dtypes)
+        if method == 'COP':
+            encoded = {col : sampler.encode(array) if isinstance(sampler, AliasSampler) else array
+                       for col, sampler, array in zip(columns, sampler_list, arrays)}
+            encoded_df = pd.DataFrame(encoded, columns = columns).astype(float)
+            table_sampler.correlation = self.copula_correlation(encoded_df)
+
+        return table_sampler
+
+    # epoch representation of datetime values
+    #--------------------------------------------------------------------------
+    def epoch_values(self, series):
+        dates = series.to_numpy(dtype = 'datetime64[ns]')
+        epochs = dates.astype(np.int64).astype(float)
+        epochs[np.isnat(dates)] = np.nan
+
+        return epochs
+
+    # correlation matrix of the Gaussian copula
+    #--------------------------------------------------------------------------
+    def copula_correlation(self, dataframe):
+        
+        """ 
+        copula_correlation(dataframe):
+        
+        Learns the correlation matrix of the Gaussian copula from the Spearman rank
+        correlations of the original data (r = 2*sin(pi*rho/6)). Datetime columns 
+        are given as epochs and categorical columns as category codes. Undefined values
+        (e.g. constant columns) are set to zero, and the matrix is projected to the
+        nearest positive definite correlation matrix, so that it can be factorized.
+        
+        Keyword arguments:  
+            
+        dataframe (pd.dataframe): numeric representation of the original dataframe
+        
+        Returns: 
+            
+        correlation (np.array): correlation matrix of the copula
+        
+        """ 
+        spearman = RankCorrelation().Spearman(dataframe).to_numpy(dtype = float)
+        correlation = 2 * np.sin(np.pi * np.nan_to_num(spearman)/6)
+        np.fill_diagonal(correlation, 1.0)
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        eigenvalues = np.maximum(eigenvalues, 1e-8)
+        correlation = (eigenvectors * eigenvalues) @ eigenvectors.T
+        scale = np.sqrt(np.diag(correlation))
+        correlation = correlation/np.outer(scale, scale)
+        np.fill_diagonal(correlation, 1.0)
+
+        return correlation
+    
     # generator of synthetic numbers based on CDF sampling
     #==========================================================================
-    def CDF_generator(self, dataframe, num_val, pbar):
+    def CDF_generator(self, dataframe, num_val, pbar = None, seed = None):
         
         """ 
-        CDF_generator(dataframe, num_val):
+        CDF_generator(dataframe, num_val, pbar, seed):
         
         Generates synthetic numbers using the CDF of the original dataframe as input,
         and sampling randomly to reproduce the reference distribution (disjointed).
-        
+        All uniform values of a column are drawn at once from a seeded numpy Generator
+        and resolved through the inverse CDF in a single vectorized operation, which
+        also reproduces the rate of missing values and the levels of discrete columns.
         
         Keyword arguments:  
             
         dataframe (pd.dataframe): dataframe of real numbers (original dataframe)
         num_val (int):            number of synthetic values to be generated (int)
+        pbar (sg.ProgressBar):    progress bar to be updated (optional)
+        seed (int):               seed for random number generation (optional)
         
         Returns: 
             
-        fake_list (list): list of lists with synthetic data
-        
-        """ 
-        dataframe_numeric = dataframe.select_dtypes(include = np.number)
-        fake_list = []
-        real_list = []
-        for id, col in enumerate(dataframe_numeric.columns):            
-            array = dataframe_numeric[col].values
-            real_list.append(array)
-            x = np.sort(array)
-            n = x.size
-            y = np.arange(1, n+1)/n
-            synth_cols = []
-            for num in range(num_val):
-                randomizer = random.random()
-                numy = np.interp(randomizer, y, x)
-                synth_cols.append(numy)
-            fake_list.append(synth_cols)
-            pbar.update(id + 1, max=dataframe_numeric.shape[1])
-        fake_df = pd.DataFrame(fake_list).T
-        fake_df.columns = dataframe_numeric.columns
+        fake_df (pd.dataframe): dataframe with synthetic data
+        
+        """ 
+        table_sampler = self.fit_samplers(dataframe, 'CDF', pbar, seed = seed)
+        fake_df = table_sampler.sample(num_val, seed)
             
         return fake_df                
      
     
+    # generator of correlated synthetic numbers based on the Gaussian copula
+    #--------------------------------------------------------------------------
+    def copula_generator(self, dataframe, num_val, pbar = None, seed = None):
+        
+        """ 
+        copula_generator(dataframe, num_val, pbar, seed):
+        
+        Generates synthetic numbers that reproduce both the distribution of each
+        column and the rank correlations between columns (Gaussian copula). The
+        correlation structure is learned once from the original dataframe, then 
+        correlated normal values are drawn for all columns with one matrix product
+        and mapped through the inverse CDF of each column.
+        
+        Keyword arguments:  
+            
+        dataframe (pd.dataframe): dataframe of real numbers (original dataframe)
+        num_val (int):            number of synthetic values to be generated (int)
+        pbar (sg.ProgressBar):    progress bar to be updated (optional)
+        seed (int):               seed for random number generation (optional)
+        
+        Returns: 
+            
+        fake_df (pd.dataframe): dataframe with synthetic data
+        
+        """ 
+        table_sampler = self.fit_samplers(dataframe, 'COP', pbar, seed = seed)
+        fake_df = table_sampler.sample(num_val, seed)
+            
+        return fake_df
+
     # generator of synthetic numbers based on theoretical distribution fitting
     #--------------------------------------------------------------------------
-    def dist_fitter(self, dataframe, num_val, pbar):
+    def dist_fitter(self, dataframe, num_val, pbar = None, seed = None, workers = 1,
+                    cache_dir = None):
         
         """ 
-        dist_fitter(dataframe, num_val):
+        dist_fitter(dataframe, num_val, pbar, seed, workers, cache_dir):
         
         Generates synthetic numbers by fitting theoretical models to the original
         dataframe and generating new distribution with the best fitting model, based
-        on the distift package. 
+        on the distift package. If a cache folder is given, the best models are 
+        cached on disk by column fingerprint, and cached columns skip the fit. 
         
         Keyword arguments:  
             
         dataframe (pd.dataframe): dataframe of real numbers (original dataframe)
         num_val (int):            number of synthetic values to be generated (int)
+        pbar (sg.ProgressBar):    progress bar to be updated (optional)
+        seed (int):               seed for random number generation (optional)
+        workers (int):            number of worker processes used for fitting
+        cache_dir (str):          folder of the distribution cache (optional)
         
         Returns: 
             
-        fake_list (list): list of lists with synthetic data
+        fake_df (pd.dataframe): dataframe with synthetic data
         
         """
-        dataframe_numeric = dataframe.select_dtypes(include = np.number)
-        fake_list = []
-        real_list = []
-        for id, col in enumerate(dataframe_numeric.columns):            
-            array = dataframe_numeric[col].values
-            real_list.append(array)
-            model= distfit(bound='both')
-            model.fit_transform(array, verbose = 0)
-            Xgen = model.generate(n = num_val).round(0)
-            fake_list.append(Xgen)
-            pbar.update(id + 1, max=dataframe_numeric.shape[1])
-            
-        fake_df = pd.DataFrame(fake_list).T
-        fake_df.columns = dataframe_numeric.columns
+        table_sampler = self.fit_samplers(dataframe, 'TDF', pbar, workers, seed, 
+                                          cache_dir = cache_dir)
+        fake_df = table_sampler.sample(num_val, seed)
             
         return fake_df    
     
     # generator of synthetic numbers based on Kernel models (KDE)
     #--------------------------------------------------------------------------
-    def KDE_generator(self, dataframe, num_val, seed):
+    def KDE_generator(self, dataframe, num_val, seed = None, pbar = None, workers = 1, 
+                      bandwidth = 'loo', kernel = 'gaussian'):
         
         """ 
-        KDE_generator(dataframe, num_val, seed):
+        KDE_generator(dataframe, num_val, seed, pbar, workers, bandwidth, kernel):
         
         Generates synthetic numbers using the Kernel methodologies of neighbour
-        numbers. The bandwidth is selected through an initialization process (may
-        take long time to finish).        
+        numbers. The bandwidth is selected with closed form rules (scott, silverman),
+        with the leave-one-out likelihood on binned data (loo) or through the 
+        cross-validated grid search (grid, may take long time to finish). Values are
+        sampled in bulk by picking source values and adding kernel noise.
         
         Keyword arguments:    
         dataframe (pd.dataframe): dataframe of real numbers (original dataframe)
-        seed (int):               seed for random number generation
         num_val (int):            number of synthetic values to be generated (int)
+        seed (int):               seed for random number generation
+        pbar (sg.ProgressBar):    progress bar to be updated (optional)
+        workers (int):            number of worker processes used for fitting
+        bandwidth (str):          bandwidth selection strategy
+        kernel (str):             name of the kernel
+        
+        Returns: 
+        fake_df (pd.dataframe): dataframe with synthetic data
+        
+        """
+        table_sampler = self.fit_samplers(dataframe, 'KDE', pbar, workers, seed, 
+                                          bandwidth = bandwidth, kernel = kernel)
+        fake_df = table_sampler.sample(num_val, seed)
+            
+        return fake_df 
+    
+    # build the quantile sketches of the columns of a file
+    #--------------------------------------------------------------------------
+    def sketch_file(self, filepath, columns, chunk_size = 100000, error = 0.005):
+        
+        """ 
+        sketch_file(filepath, columns, chunk_size, error):
+        
+        Builds one quantile sketch per column in a single streaming pass over the
+        file, reading one chunk of rows at a time.
+        
+        Keyword arguments:    
+        filepath (str):    path of the .csv or .xlsx file
+        columns (list):    names of the numeric columns
+        chunk_size (int):  number of rows read at once
+        error (float):     maximum quantile error of the sketches
+        
+        Returns: 
+        sketches (list): quantile sketches, one per column
+        
+        """
+        sketches = [QuantileSketch(error) for col in columns]
+        for chunk in DataLoader(filepath).iter_chunks(chunk_size, columns):
+            for sketch, col in zip(sketches, columns):
+                sketch.update(chunk[col].values)
+            
+        return sketches
+    
+    # fit approximate CDF samplers from one or more file shards
+    #--------------------------------------------------------------------------
+    def fit_sketches(self, filepaths, pbar = None, workers = 1, chunk_size = 100000, 
+                     error = 0.005):
+        
+        """ 
+        fit_sketches(filepaths, pbar, workers, chunk_size, error):
+        
+        Fits approximate CDF samplers for inputs larger than memory. Each file is
+        considered as a shard of the same table, and is summarized with one quantile
+        sketch per column in a single streaming pass. Shards can be processed in 
+        parallel by a pool of worker processes, and their sketches are then merged.
+        
+        Keyword arguments:    
+        filepaths (list):         paths of the file shards (same columns)
+        pbar (sg.ProgressBar):    progress bar to be updated (optional)
+        workers (int):            number of worker processes
+        chunk_size (int):         number of rows read at once
+        error (float):            maximum quantile error of the sketches
+        
+        Returns: 
+        table_sampler (TableSampler): approximate CDF samplers of all columns
+        
+        """
+        columns = DataLoader(filepaths[0]).numeric_columns()
+        if not columns:
+            raise ValueError('No numeric columns found in {}'.format(filepaths[0]))
+        merged = [QuantileSketch(error) for col in columns]
+        if workers > 1 and len(filepaths) > 1:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                futures = [executor.submit(self.sketch_file, f, columns, chunk_size, error) 
+                           for f in filepaths]
+                for done, future in enumerate(as_completed(futures)):
+                    for sketch, shard_sketch in zip(merged, future.result()):
+                        sketch.merge(shard_sketch)
+                    if pbar is not None:
+                        pbar.update(done + 1, max=len(filepaths))
+        else:
+            for id, filepath in enumerate(filepaths):
+                shard_sketches = self.sketch_file(filepath, columns, chunk_size, error)
+                for sketch, shard_sketch in zip(merged, shard_sketches):
+                    sketch.merge(shard_sketch)
+                if pbar is not None:
+                    pbar.update(id + 1, max=len(filepaths))
+        sampler_list = [SketchSampler(error, sketch) for sketch in merged]
+        table_sampler = TableSampler('CDF', columns, sampler_list)
+            
+        return table_sampler
+    
+    # streaming generation of synthetic numbers into a file
+    #--------------------------------------------------------------------------
+    def stream_to_file(self, table_sampler, num_val, path, writer = None, 
+                       chunk_size = 100000, seed = None, pbar = None, start = 0):
+        
+        """ 
+        stream_to_file(table_sampler, num_val, path, writer, chunk_size, seed, pbar, start):
+        
+        Generates synthetic rows from the fitted samplers in fixed-size chunks and
+        hands them to the output writer as soon as they are produced. Memory usage
+        is bounded by the chunk size, regardless of the number of rows.       
+        
+        Keyword arguments:    
+        table_sampler (TableSampler): fitted samplers of all columns
+        num_val (int):                number of synthetic rows to be generated
+        path (str):                   path of the output file (or folder)
+        writer (DataWriter):          output writer (.csv file if not given)
+        chunk_size (int):             number of rows generated and written at once
+        seed (int):                   seed for random number generation (optional)
+        pbar (sg.ProgressBar):        progress bar to be updated (optional)
+        start (int):                  index of the first row (shards of a table)
         
         Returns: 
-        fake_list (list): list of lists with synthetic data
+        num_rows (int): number of rows written to disk
         
         """
-        self.rand = np.random.RandomState(seed)
-        self.dist_list = ['uniform','normal','exponential',
-                          'lognormal','chisquare','beta']
-        self.kernels = ['cosine', 'epanechnikov', 'exponential', 
-                        'gaussian', 'linear', 'tophat'] 
-        self.dataframe_numeric = self.dataframe.select_dtypes(include = np.number)
-        self.fake_list =  []
-        self.real_list = []
-        for col in tqdm(self.dataframe_numeric.columns):    
-            array = self.dataframe_numeric[col].values    
-            self.real_list.append(array)            
-            grid = GridSearchCV(KernelDensity(),
-                            {'bandwidth': np.linspace(0.1, 1.0, 30)},
-                            cv=20) 
-            grid.fit(array[:, None])
-            kde = grid.best_estimator_
-            synth_array = kde.sample(num_val, random_state=seed)
-            self.fake_list.append(synth_array)
-            
-        return self.fake_list 
+        if writer is None:
+            writer = DataWriter('csv')
+        chunks = table_sampler.stream(num_val, chunk_size, seed, start)
+            
+        return writer.write(chunks, path, num_val, pbar)
+
+    # streaming generation of synthetic numbers into a .csv file
+    #--------------------------------------------------------------------------
+    def stream_to_csv(self, table_sampler, num_val, path, chunk_size = 100000, 
+                      seed = None, pbar = None):
+        return self.stream_to_file(table_sampler, num_val, path, DataWriter('csv'),
+                                   chunk_size, seed, pbar)
     
     
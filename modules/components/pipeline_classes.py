@@ -0,0 +1,873 @@
+import os
+import json
+import time
+import hashlib
+import platform
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+
+# import modules and classes
+#------------------------------------------------------------------------------
+from modules.components.data_classes import DataSetFinder, DataLoader, DataGenerator
+from modules.components.sampler_classes import TableSampler, RandomStreams
+from modules.components.writer_classes import DataWriter
+
+
+# define the class for headless generation of synthetic data. It does not depend
+# on the GUI modules, so that it can be used from scripts and scheduled jobs
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class GenerationPipeline:
+
+    """
+    GenerationPipeline(method, num_val, seed, chunk_size, workers, approximate, 
+                       error, writer, **kwargs)
+
+    Headless pipeline to fit the generation models on one or more input files and
+    stream the synthetic data to disk. Fitted models can also be saved and used
+    later on to generate data without reading the source files.
+
+    Keyword arguments:
+
+    method (str):        generation method (CDF, TDF, KDE or COP)
+    num_val (int):       number of synthetic rows to be generated
+    seed (int):          seed for random number generation (optional)
+    chunk_size (int):    number of rows read, generated and written at once
+    workers (int):       number of worker processes used for fitting
+    approximate (bool):  use quantile sketches for the CDF method
+    error (float):       maximum quantile error of the sketches
+    writer (DataWriter): output format of the synthetic data (.csv if not given)
+    kwargs:              options of the column samplers (e.g. bandwidth, kernel)
+
+    """
+    methods = ('CDF', 'TDF', 'KDE', 'COP')
+
+    def __init__(self, method = 'CDF', num_val = 1000, seed = None, chunk_size = 100000,
+                 workers = 1, approximate = False, error = 0.005, writer = None, **kwargs):
+        if method not in self.methods:
+            raise ValueError('Unknown generation method: {}'.format(method))
+        if approximate and method != 'CDF':
+            raise ValueError('Approximate mode is only available for the CDF method')
+        self.method = method
+        self.num_val = num_val
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.approximate = approximate
+        self.error = error
+        self.options = kwargs
+        self.writer = writer or DataWriter('csv')
+        self.generator = DataGenerator()
+
+    # list the input files from a file or folder path
+    #--------------------------------------------------------------------------
+    def list_inputs(self, input_path):
+        if os.path.isdir(input_path):
+            finder = DataSetFinder(input_path)
+            return [os.path.join(input_path, f) for f in sorted(finder.target_files)]
+        elif os.path.isfile(input_path):
+            return [input_path]
+        else:
+            raise FileNotFoundError('Input path not found: {}'.format(input_path))
+
+    # name of the file without folder and extension
+    #--------------------------------------------------------------------------
+    def file_name(self, filepath):
+        return os.path.splitext(os.path.basename(filepath))[0]
+
+    # resolve the output file path
+    #--------------------------------------------------------------------------
+    def output_path(self, output_path, name, prefix, ext):
+
+        """
+        output_path(output_path, name, prefix, ext)
+
+        Returns the output file path. If output_path is a folder (or has no
+        extension), the file is named after the method and the source file. A
+        folder with the output extension is a previous partitioned output.
+
+        Keyword arguments:
+
+        output_path (str): output folder or file path
+        name (str):        name of the source dataset
+        prefix (str):      prefix of the output file name
+        ext (str):         extension of the output file
+
+        Returns:
+
+        save_path (str): path of the output file
+
+        """
+        output_ext = os.path.splitext(output_path)[1]
+        if (os.path.isdir(output_path) and output_ext != ext) or not output_ext:
+            os.makedirs(output_path, exist_ok = True)
+            return os.path.join(output_path, '{}_{}{}'.format(prefix, name, ext))
+        folder = os.path.dirname(output_path)
+        if folder:
+            os.makedirs(folder, exist_ok = True)
+
+        return output_path
+
+    # load the input dataset
+    #--------------------------------------------------------------------------
+    def load_dataset(self, filepath):
+        return DataLoader(filepath).load(self.chunk_size)
+
+    # fit the generation models on a file
+    #--------------------------------------------------------------------------
+    def fit(self, filepath):
+
+        """
+        fit(filepath)
+
+        Loads the input file and fits the column samplers of the pipeline method.
+        In approximate mode, the file is streamed once to build quantile sketches.
+
+        Keyword arguments:
+
+        filepath (str): path of the input file
+
+        Returns:
+
+        table_sampler (TableSampler): fitted samplers of all columns
+
+        """
+        if self.approximate:
+            table_sampler = self.generator.fit_sketches([filepath], None, 1,
+                                                        self.chunk_size, self.error)
+        else:
+            dataframe = self.load_dataset(filepath)
+            table_sampler = self.generator.fit_samplers(dataframe, self.method, None,
+                                                        self.workers, self.seed, **self.options)
+        table_sampler.source = self.file_name(filepath)
+
+        return table_sampler
+
+    # fit a single approximate model from all the shards of a table
+    #--------------------------------------------------------------------------
+    def fit_shards(self, input_path, output_path):
+
+        """
+        fit_shards(input_path, output_path)
+
+        Considers all input files as shards of the same table, builds their quantile
+        sketches in parallel and saves the merged approximate CDF model.
+
+        Keyword arguments:
+
+        input_path (str):  input folder (or single file) path
+        output_path (str): output folder or model file path
+
+        Returns:
+
+        model_path (str): path of the saved model
+
+        """
+        filepaths = self.list_inputs(input_path)
+        table_sampler = self.generator.fit_sketches(filepaths, None, self.workers,
+                                                    self.chunk_size, self.error)
+        table_sampler.source = self.file_name(os.path.normpath(input_path))
+        model_path = self.output_path(output_path, table_sampler.source, 'CDF_model', '.pkl')
+        table_sampler.save(model_path)
+
+        return model_path
+
+    # generate synthetic data from fitted models
+    #--------------------------------------------------------------------------
+    def generate(self, table_sampler, save_path):
+        return self.generator.stream_to_file(table_sampler, self.num_val, save_path, self.writer,
+                                             self.chunk_size, self.seed)
+
+    # fit the models of each input file and save them to disk
+    #--------------------------------------------------------------------------
+    def fit_models(self, input_path, output_path):
+
+        """
+        fit_models(input_path, output_path)
+
+        Fits the generation models of each input file and saves them to disk,
+        so that they can be used later on with sample_models.
+
+        Keyword arguments:
+
+        input_path (str):  input file or folder path
+        output_path (str): output folder (or file path for a single input)
+
+        Returns:
+
+        model_paths (list): paths of the saved models
+
+        """
+        model_paths = []
+        for filepath in self.list_inputs(input_path):
+            table_sampler = self.fit(filepath)
+            name = self.file_name(filepath)
+            save_path = self.output_path(output_path, name,
+                                         '{}_model'.format(self.method), '.pkl')
+            table_sampler.save(save_path)
+            model_paths.append(save_path)
+
+        return model_paths
+
+    # generate synthetic data from saved models
+    #--------------------------------------------------------------------------
+    def sample_models(self, model_paths, output_path):
+
+        """
+        sample_models(model_paths, output_path)
+
+        Generates synthetic data from previously saved models, without touching
+        the source files.
+
+        Keyword arguments:
+
+        model_paths (list): paths of the saved models
+        output_path (str):  output folder (or file path for a single model)
+
+        Returns:
+
+        results (list): one dictionary with output path, rows and timing per model
+
+        """
+        results = []
+        for model_path in model_paths:
+            start = time.perf_counter()
+            table_sampler = TableSampler.load(model_path)
+            name = table_sampler.source or self.file_name(model_path)
+            save_path = self.output_path(output_path, name,
+                                         '{}_synthetic'.format(table_sampler.method),
+                                         self.writer.extension)
+            num_rows = self.generate(table_sampler, save_path)
+            results.append({'input' : model_path, 'output' : save_path, 'rows' : num_rows,
+                            'seconds' : time.perf_counter() - start})
+
+        return results
+
+    # path of the synthetic data generated from an input file
+    #--------------------------------------------------------------------------
+    def synthetic_path(self, filepath, output_path):
+        return self.output_path(output_path, self.file_name(filepath),
+                                '{}_synthetic'.format(self.method), self.writer.extension)
+
+    # generation parameters of an input file (stored next to its output)
+    #--------------------------------------------------------------------------
+    def parameters(self, filepath):
+        return {'input' : os.path.abspath(filepath),
+                'input_mtime' : os.path.getmtime(filepath),
+                'input_size' : os.path.getsize(filepath),
+                'method' : self.method,
+                'rows' : self.num_val,
+                'seed' : self.seed,
+                'approximate' : self.approximate,
+                'error' : self.error,
+                'options' : self.options,
+                'format' : self.writer.format,
+                'compression' : self.writer.compression,
+                'partitioned' : self.writer.partitioned}
+
+    # path of the generation parameters of an output
+    #--------------------------------------------------------------------------
+    def parameters_path(self, save_path):
+        return '{}.json'.format(save_path)
+
+    # fit and generate synthetic data for a single input file
+    #--------------------------------------------------------------------------
+    def run_file(self, filepath, save_path):
+
+        """
+        run_file(filepath, save_path)
+
+        Fits the models of the input file and streams the synthetic data to the
+        output file. Data is written to a temporary file that replaces the output
+        only when the generation is complete, so that failed jobs do not leave
+        partial outputs behind. The generation parameters are then saved next to
+        the output (same path with .json extension added).
+
+        Keyword arguments:
+
+        filepath (str):  input file path
+        save_path (str): output file path
+
+        Returns:
+
+        result (dict): input and output paths, number of rows and timing
+
+        """
+        start = time.perf_counter()
+        parameters = self.parameters(filepath)
+        parameters_path = self.parameters_path(save_path)
+        table_sampler = self.fit(filepath)
+        temp_path = '{}.part'.format(save_path)
+        try:
+            num_rows = self.generate(table_sampler, temp_path)
+            self.writer.remove(parameters_path)
+            self.writer.replace(temp_path, save_path)
+        finally:
+            self.writer.remove(temp_path)
+        with open(parameters_path, 'w', encoding = 'utf-8') as file:
+            json.dump(parameters, file, indent = 2)
+        result = {'input' : filepath, 'output' : save_path, 'rows' : num_rows,
+                  'seconds' : time.perf_counter() - start}
+
+        return result
+
+    # fit and generate synthetic data for each input file
+    #--------------------------------------------------------------------------
+    def run(self, input_path, output_path):
+
+        """
+        run(input_path, output_path)
+
+        Fits the models of each input file (a single file or all the .csv and .xlsx
+        files of a folder) and streams the synthetic data to the output path.
+
+        Keyword arguments:
+
+        input_path (str):  input file or folder path
+        output_path (str): output folder (or file path for a single input)
+
+        Returns:
+
+        results (list): one dictionary with output path, rows and timing per file
+
+        """
+        results = []
+        for filepath in self.list_inputs(input_path):
+            save_path = self.synthetic_path(filepath, output_path)
+            results.append(self.run_file(filepath, save_path))
+
+        return results
+
+
+# define the class for scheduling generation jobs over all files of a folder,
+# using a pool of worker processes. Failed jobs do not stop the others
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class JobScheduler:
+
+    """
+    JobScheduler(pipeline, jobs, skip_existing)
+
+    Schedules one generation job per input file on a pool of worker processes.
+    Files whose synthetic output was generated from the same input file (same
+    modification time and size) with the same parameters (method, rows, seed,
+    sampler options and output format) can be skipped, and each job reports its
+    status, timing and throughput. A failing file is
+    reported without interrupting the remaining jobs.
+
+    Keyword arguments:
+
+    pipeline (GenerationPipeline): pipeline used to run each job
+    jobs (int):                    number of files processed in parallel
+    skip_existing (bool):          skip files with up to date outputs
+
+    """
+    def __init__(self, pipeline, jobs = 1, skip_existing = False):
+        self.pipeline = pipeline
+        self.jobs = jobs
+        self.skip_existing = skip_existing
+
+    # check if the output was generated from the same input and parameters
+    #--------------------------------------------------------------------------
+    def up_to_date(self, filepath, save_path):
+        parameters_path = self.pipeline.parameters_path(save_path)
+        if not os.path.exists(save_path) or not os.path.isfile(parameters_path):
+            return False
+        with open(parameters_path, 'r', encoding = 'utf-8') as file:
+            stored = json.load(file)
+
+        return stored == json.loads(json.dumps(self.pipeline.parameters(filepath)))
+
+    # complete the job result with status and throughput
+    #--------------------------------------------------------------------------
+    def job_report(self, filepath, save_path, future = None):
+        report = {'input' : filepath, 'output' : save_path, 'status' : 'skipped',
+                  'rows' : 0, 'seconds' : 0.0, 'rows_per_second' : 0.0, 'error' : None}
+        if future is None:
+            return report
+        try:
+            report.update(future.result())
+            report['status'] = 'done'
+            if report['seconds'] > 0:
+                report['rows_per_second'] = report['rows']/report['seconds']
+        except Exception as e:
+            report['status'] = 'failed'
+            report['error'] = '{}: {}'.format(type(e).__name__, e)
+
+        return report
+
+    # run a generation job in the calling process
+    #--------------------------------------------------------------------------
+    def run_inline(self, filepath, save_path):
+        future = Future()
+        try:
+            future.set_result(self.pipeline.run_file(filepath, save_path))
+        except Exception as e:
+            future.set_exception(e)
+
+        return future
+
+    # run the generation jobs
+    #--------------------------------------------------------------------------
+    def run(self, input_path, output_path, callback = None):
+
+        """
+        run(input_path, output_path, callback)
+
+        Schedules the generation of all input files (DataSetFinder.target_files
+        of a folder, or a single file) and collects the job reports as soon as
+        each job finishes. With a single job, files are processed in the calling
+        process, without starting a pool of worker processes.
+
+        Keyword arguments:
+
+        input_path (str):    input file or folder path
+        output_path (str):   output folder
+        callback (function): function called with each job report (optional)
+
+        Returns:
+
+        reports (list): job reports, in the same order as the input files
+
+        """
+        filepaths = self.pipeline.list_inputs(input_path)
+        save_paths = [self.pipeline.synthetic_path(f, output_path) for f in filepaths]
+        reports = [None] * len(filepaths)
+        executor = ProcessPoolExecutor(max_workers = self.jobs) if self.jobs > 1 else None
+        try:
+            futures = {}
+            for id, (filepath, save_path) in enumerate(zip(filepaths, save_paths)):
+                if self.skip_existing and self.up_to_date(filepath, save_path):
+                    reports[id] = self.job_report(filepath, save_path)
+                    if callback is not None:
+                        callback(reports[id])
+                    continue
+                if executor is None:
+                    reports[id] = self.job_report(filepath, save_path, 
+                                                  self.run_inline(filepath, save_path))
+                    if callback is not None:
+                        callback(reports[id])
+                    continue
+                future = executor.submit(self.pipeline.run_file, filepath, save_path)
+                futures[future] = id
+            for future in as_completed(futures):
+                id = futures[future]
+                reports[id] = self.job_report(filepaths[id], save_paths[id], future)
+                if callback is not None:
+                    callback(reports[id])
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return reports
+
+
+# define the class for running a generation job on a background thread. Progress
+# is reported through a callback, so that the GUI event loop is never blocked
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class GenerationWorker(threading.Thread):
+
+    """
+    GenerationWorker(dataframe, method, num_val, save_path, callback, seed, 
+                     chunk_size, preview_rows, writer, **kwargs)
+
+    Background job that fits the samplers of the given method and streams the
+    synthetic rows to the output file in chunks. Progress is reported after each
+    fitted column and each written chunk (rows, total and throughput) by calling
+    callback(event, value), e.g. window.write_event_value of the GUI. The job 
+    can be cancelled between fitted columns and between chunks: the partial 
+    output file is then removed. Only the first rows of the synthetic table are
+    kept in memory as preview (e.g. for validation), so that memory stays bounded
+    by the chunk and preview sizes. Events are '-PROGRESS-', '-DONE-', 
+    '-CANCELLED-' and '-FAILED-'.
+
+    Keyword arguments:
+
+    dataframe (pd.dataframe): dataframe of real numbers (original dataframe)
+    method (str):             generation method (CDF, TDF, KDE or COP)
+    num_val (int):            number of synthetic rows to be generated
+    save_path (str):          path of the output file
+    callback (function):      function called with each event and its value
+    seed (int):               seed for random number generation (optional)
+    chunk_size (int):         number of rows generated and written at once
+    preview_rows (int):       number of synthetic rows kept in memory (validation)
+    writer (DataWriter):      output format of the synthetic data (.csv if not given)
+    kwargs:                   options of the column samplers (e.g. bandwidth)
+
+    """
+    def __init__(self, dataframe, method, num_val, save_path, callback, seed = None,
+                 chunk_size = 100000, preview_rows = 100000, writer = None, **kwargs):
+        super().__init__(daemon = True)
+        self.dataframe = dataframe
+        self.method = method
+        self.num_val = num_val
+        self.save_path = save_path
+        self.callback = callback
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.preview_rows = preview_rows
+        self.writer = writer or DataWriter('csv')
+        self.options = kwargs
+        self.cancel_event = threading.Event()
+        self.start_time = None
+        self.stage = 'fit'
+        self.preview = []
+        self.preview_size = 0
+
+    # request the cancellation of the job
+    #--------------------------------------------------------------------------
+    def cancel(self):
+        self.cancel_event.set()
+
+    # progress reporting (same interface of the GUI progress bar)
+    #--------------------------------------------------------------------------
+    def update(self, current, max):
+        self.report(self.stage, current, max)
+
+    # send a progress event with throughput
+    #--------------------------------------------------------------------------
+    def report(self, stage, current, total):
+        seconds = time.perf_counter() - self.start_time
+        rate = current/seconds if seconds > 0 else 0.0
+        self.callback('-PROGRESS-', {'stage' : stage, 'current' : current, 'total' : total,
+                                     'seconds' : seconds, 'rate' : rate})
+
+    # synthetic chunks, stopping as soon as the job is cancelled
+    #--------------------------------------------------------------------------
+    def iter_chunks(self, table_sampler):
+        for chunk in table_sampler.stream(self.num_val, self.chunk_size, self.seed):
+            if self.cancel_event.is_set():
+                return
+            if self.preview_size < self.preview_rows:
+                self.preview.append(chunk.iloc[: self.preview_rows - self.preview_size])
+                self.preview_size += self.preview[-1].shape[0]
+            yield chunk
+
+    # run the generation job
+    #--------------------------------------------------------------------------
+    def run(self):
+        self.start_time = time.perf_counter()
+        temp_path = '{}.part'.format(self.save_path)
+        try:
+            generator = DataGenerator()
+            table_sampler = generator.fit_samplers(self.dataframe, self.method, self, 
+                                                   seed = self.seed, 
+                                                   cancel_event = self.cancel_event,
+                                                   **self.options)
+            if table_sampler is None:
+                self.callback('-CANCELLED-', {'rows' : 0})
+                return
+            self.start_time = time.perf_counter()
+            self.stage = 'generate'
+            num_rows = self.writer.write(self.iter_chunks(table_sampler), temp_path, 
+                                         self.num_val, self)
+            if self.cancel_event.is_set():
+                self.callback('-CANCELLED-', {'rows' : num_rows})
+                return
+            self.writer.replace(temp_path, self.save_path)
+            preview = pd.concat(self.preview, ignore_index = True) if self.preview else None
+            result = {'output' : self.save_path, 'rows' : num_rows,
+                      'seconds' : time.perf_counter() - self.start_time, 'preview' : preview}
+            self.callback('-DONE-', result)
+        except Exception as e:
+            self.callback('-FAILED-', '{}: {}'.format(type(e).__name__, e))
+        finally:
+            self.preview = []
+            self.writer.remove(temp_path)
+
+
+# define the class for sharded generation of very large tables. The fitted model
+# and the shard ranges are saved to a manifest, so that shards can run anywhere
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class ShardedGeneration:
+
+    """
+    ShardedGeneration(writer, chunk_size)
+
+    Splits the generation of a synthetic table into shards (disjoint ranges of rows)
+    that can run as separate processes or on separate hosts sharing the output 
+    folder. The fitted samplers are serialized next to a JSON manifest holding the 
+    seed entropy and the range and output file of each shard. Since rows are drawn
+    from the block streams of RandomStreams, each shard produces exactly the rows 
+    of its range in the table of the seed: the concatenated shards are identical 
+    to a single run, whatever the number of shards. Each finished shard writes a 
+    status file, which is collected into the manifest when the shards are merged.
+
+    Keyword arguments:
+
+    writer (DataWriter): output format of the shards (.csv if not given)
+    chunk_size (int):    number of rows generated and written at once
+
+    """
+    version = 1
+    manifest_name = 'manifest.json'
+    model_name = 'model.pkl'
+
+    def __init__(self, writer = None, chunk_size = 100000):
+        self.writer = writer or DataWriter('csv')
+        self.chunk_size = chunk_size
+
+    # split the rows of the table into shard ranges
+    #--------------------------------------------------------------------------
+    def shard_ranges(self, num_val, num_shards, block_size):
+
+        """
+        shard_ranges(num_val, num_shards, block_size)
+
+        Splits the rows into contiguous ranges of (almost) the same size. Range 
+        boundaries fall on block boundaries, so that no block of rows is generated
+        by more than one shard.
+
+        Keyword arguments:
+
+        num_val (int):    number of synthetic rows to be generated
+        num_shards (int): number of shards
+        block_size (int): number of rows of the random stream blocks
+
+        Returns:
+
+        ranges (list): first and last (excluded) row of each non empty shard
+
+        """
+        num_blocks = -(-num_val // block_size)
+        bounds = np.linspace(0, num_blocks, max(num_shards, 1) + 1).round().astype(int)
+        ranges = [(int(min(a * block_size, num_val)), int(min(b * block_size, num_val)))
+                  for a, b in zip(bounds[:-1], bounds[1:])]
+
+        return [(start, stop) for start, stop in ranges if stop > start]
+
+    # file hash of the serialized model
+    #--------------------------------------------------------------------------
+    def model_hash(self, path):
+        digest = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    # read the manifest of a sharded table
+    #--------------------------------------------------------------------------
+    def read_manifest(self, manifest_path):
+        with open(manifest_path, 'r', encoding = 'utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('version') != self.version:
+            raise ValueError('Unsupported manifest version: {}'.format(manifest.get('version')))
+
+        return manifest
+
+    # write a JSON file atomically
+    #--------------------------------------------------------------------------
+    def write_json(self, data, path):
+        temp_path = '{}.part'.format(path)
+        with open(temp_path, 'w', encoding = 'utf-8') as file:
+            json.dump(data, file, indent = 2)
+        os.replace(temp_path, path)
+
+    # plan the shards of a table
+    #--------------------------------------------------------------------------
+    def plan(self, table_sampler, num_val, num_shards, folder, seed = None):
+
+        """
+        plan(table_sampler, num_val, num_shards, folder, seed)
+
+        Saves the fitted samplers and the manifest of the shards in the output
+        folder. The seed entropy is stored in the manifest, so that all shards 
+        share the same random streams even if no seed is given.
+
+        Keyword arguments:
+
+        table_sampler (TableSampler): fitted samplers of all columns
+        num_val (int):                number of synthetic rows to be generated
+        num_shards (int):             number of shards
+        folder (str):                 output folder shared by all shards
+        seed (int):                   seed for random number generation (optional)
+
+        Returns:
+
+        manifest_path (str): path of the manifest
+
+        """
+        os.makedirs(folder, exist_ok = True)
+        model_path = os.path.join(folder, self.model_name)
+        table_sampler.save(model_path)
+        streams = RandomStreams(seed)
+        ranges = self.shard_ranges(num_val, num_shards, streams.block_size)
+        shards = [{'id' : id, 'start' : start, 'stop' : stop,
+                   'output' : 'shard-{:05d}{}'.format(id, self.writer.extension),
+                   'status' : 'pending'} for id, (start, stop) in enumerate(ranges)]
+        manifest = {'version' : self.version,
+                    'method' : table_sampler.method,
+                    'source' : table_sampler.source,
+                    'columns' : table_sampler.columns,
+                    'rows' : num_val,
+                    'entropy' : streams.entropy,
+                    'block_size' : streams.block_size,
+                    'chunk_size' : self.chunk_size,
+                    'format' : self.writer.format,
+                    'compression' : self.writer.compression,
+                    'partitioned' : self.writer.partitioned,
+                    'model' : self.model_name,
+                    'model_sha1' : self.model_hash(model_path),
+                    'shards' : shards}
+        manifest_path = os.path.join(folder, self.manifest_name)
+        self.write_json(manifest, manifest_path)
+
+        return manifest_path
+
+    # generate the rows of a shard
+    #--------------------------------------------------------------------------
+    def run_shard(self, manifest_path, shard_id):
+
+        """
+        run_shard(manifest_path, shard_id)
+
+        Generates the rows of a single shard from the serialized samplers and
+        writes them to the shard output, followed by the shard status file. The
+        output is written to a temporary path first, so that interrupted shards
+        can simply be run again.
+
+        Keyword arguments:
+
+        manifest_path (str): path of the manifest
+        shard_id (int):      index of the shard
+
+        Returns:
+
+        status (dict): shard range, number of rows, timing and throughput
+
+        """
+        start_time = time.perf_counter()
+        folder = os.path.dirname(os.path.abspath(manifest_path))
+        manifest = self.read_manifest(manifest_path)
+        shard = manifest['shards'][shard_id]
+        model_path = os.path.join(folder, manifest['model'])
+        if self.model_hash(model_path) != manifest['model_sha1']:
+            raise ValueError('The model does not match the manifest: {}'.format(model_path))
+        table_sampler = TableSampler.load(model_path)
+        writer = DataWriter(manifest['format'], manifest['compression'], manifest['partitioned'],
+                            self.writer.workers)
+        save_path = os.path.join(folder, shard['output'])
+        temp_path = '{}.part'.format(save_path)
+        try:
+            num_rows = DataGenerator().stream_to_file(table_sampler, shard['stop'] - shard['start'],
+                                                      temp_path, writer, manifest['chunk_size'],
+                                                      manifest['entropy'], start = shard['start'])
+            writer.replace(temp_path, save_path)
+        finally:
+            writer.remove(temp_path)
+        seconds = time.perf_counter() - start_time
+        status = {'id' : shard_id, 'start' : shard['start'], 'stop' : shard['stop'],
+                  'output' : shard['output'], 'status' : 'done', 'rows' : num_rows,
+                  'seconds' : seconds, 'rows_per_second' : num_rows/seconds if seconds > 0 else 0.0,
+                  'host' : platform.node()}
+        self.write_json(status, os.path.join(folder, 'shard-{:05d}.json'.format(shard_id)))
+
+        return status
+
+    # collect the shard statuses into the manifest
+    #--------------------------------------------------------------------------
+    def merge(self, manifest_path, concatenate = None):
+
+        """
+        merge(manifest_path, concatenate)
+
+        Collects the status files of the shards into the manifest, checks that 
+        every shard is complete, and optionally concatenates the shard outputs 
+        into a single file (in the order of the rows).
+
+        Keyword arguments:
+
+        manifest_path (str): path of the manifest
+        concatenate (str):   path of the concatenated output (optional)
+
+        Returns:
+
+        manifest (dict): updated manifest
+
+        """
+        folder = os.path.dirname(os.path.abspath(manifest_path))
+        manifest = self.read_manifest(manifest_path)
+        missing = []
+        for id, shard in enumerate(manifest['shards']):
+            status_path = os.path.join(folder, 'shard-{:05d}.json'.format(id))
+            if os.path.isfile(status_path):
+                with open(status_path, 'r', encoding = 'utf-8') as file:
+                    manifest['shards'][id] = json.load(file)
+            if (manifest['shards'][id]['status'] != 'done' or 
+                manifest['shards'][id]['rows'] != shard['stop'] - shard['start']):
+                missing.append(id)
+        manifest['complete'] = not missing
+        done = [s for s in manifest['shards'] if s['status'] == 'done']
+        manifest['rows_done'] = sum(s['rows'] for s in done)
+        manifest['shard_seconds'] = sum(s['seconds'] for s in done)
+        if concatenate is not None and not missing:
+            writer = DataWriter(manifest['format'], manifest['compression'], manifest['partitioned'])
+            paths = [os.path.join(folder, s['output']) for s in manifest['shards']]
+            writer.concatenate(paths, concatenate)
+            manifest['concatenated'] = os.path.relpath(os.path.abspath(concatenate), folder)
+        self.write_json(manifest, manifest_path)
+        if missing:
+            raise RuntimeError('Incomplete shards: {}'.format(', '.join(str(i) for i in missing)))
+
+        return manifest
+
+    # plan, generate and merge all shards on the local machine
+    #--------------------------------------------------------------------------
+    def run(self, table_sampler, num_val, num_shards, folder, seed = None, workers = 1,
+            concatenate = None, callback = None):
+
+        """
+        run(table_sampler, num_val, num_shards, folder, seed, workers, concatenate, 
+            callback)
+
+        Local launcher of a sharded generation: the shards are planned and run on
+        a pool of worker processes (or one after the other in the calling process
+        with a single worker), then merged into the manifest.
+
+        Keyword arguments:
+
+        table_sampler (TableSampler): fitted samplers of all columns
+        num_val (int):                number of synthetic rows to be generated
+        num_shards (int):             number of shards
+        folder (str):                 output folder
+        seed (int):                   seed for random number generation (optional)
+        workers (int):                number of shards generated in parallel
+        concatenate (str):            path of the concatenated output (optional)
+        callback (function):          function called with each shard status (optional)
+
+        Returns:
+
+        manifest (dict): merged manifest
+
+        """
+        start_time = time.perf_counter()
+        manifest_path = self.plan(table_sampler, num_val, num_shards, folder, seed)
+        num_shards = len(self.read_manifest(manifest_path)['shards'])
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                futures = [executor.submit(self.run_shard, manifest_path, id) 
+                           for id in range(num_shards)]
+                for future in as_completed(futures):
+                    status = future.result()
+                    if callback is not None:
+                        callback(status)
+        else:
+            for id in range(num_shards):
+                status = self.run_shard(manifest_path, id)
+                if callback is not None:
+                    callback(status)
+        manifest = self.merge(manifest_path, concatenate)
+        manifest['seconds'] = time.perf_counter() - start_time
+        manifest['rows_per_second'] = num_val/manifest['seconds'] if manifest['seconds'] > 0 else 0.0
+        self.write_json(manifest, manifest_path)
+
+        return manifest
@@ -0,0 +1,289 @@
+import os
+import re
+import json
+import html
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# import modules and classes
+#------------------------------------------------------------------------------
+from modules.components.statistics_classes import DistributionStatistics, RankCorrelation, CorrelationDrift
+
+
+# define the class for headless validation reports. Figures are rendered with the
+# object oriented matplotlib interface (Agg canvas), without the pyplot state
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class ValidationReport:
+
+    """
+    ValidationReport(bins, workers, dpi, num_points, top_pairs)
+
+    Renders the validation figures of every column (histogram and CDF comparison)
+    and the correlation heatmaps of real and synthetic data, using a pool of worker
+    processes. Figures are saved as .png files in the output folder together with
+    a JSON and an HTML summary of the column statistics. Each figure is closed as
+    soon as it is saved, so that memory usage does not grow with the number of
+    columns.
+
+    Keyword arguments:
+
+    bins (int or str): number of histogram bins or numpy binning rule
+    workers (int):     number of worker processes used to render the figures
+    dpi (int):         resolution of the saved figures
+    num_points (int):  number of quantiles used to draw the CDFs
+    top_pairs (int):   number of pairs with the largest correlation drift reported
+
+    """
+    def __init__(self, bins = 'auto', workers = 1, dpi = 100, num_points = 512, top_pairs = 20):
+        self.bins = bins
+        self.workers = workers
+        self.dpi = dpi
+        self.num_points = num_points
+        self.top_pairs = top_pairs
+
+    # file name of the figure of a column
+    #--------------------------------------------------------------------------
+    def figure_name(self, id, column):
+        name = re.sub(r'[^0-9a-zA-Z_\-]+', '_', str(column)).strip('_')
+        return '{:03d}_{}.png'.format(id, name or 'column')
+
+    # create a figure that is not registered in pyplot
+    #--------------------------------------------------------------------------
+    def new_figure(self, figsize):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize = figsize)
+        FigureCanvasAgg(fig)
+
+        return fig
+
+    # save and release a figure
+    #--------------------------------------------------------------------------
+    def save_figure(self, fig, path):
+        fig.savefig(path, dpi = self.dpi)
+        fig.clear()
+
+    # column statistics of real and synthetic data
+    #--------------------------------------------------------------------------
+    def column_statistics(self, dataframe1, dataframe2):
+
+        """
+        column_statistics(dataframe1, dataframe2)
+
+        Computes the KS statistics, the histogram distances on shared bins and the
+        mean and standard deviation differences of every column shared by the real
+        and synthetic dataframes.
+
+        Keyword arguments:
+
+        dataframe1 (pd.dataframe):  dataframe of real numbers (original dataframe)
+        dataframe2 (pd.dataframe):  dataframe of fake numbers (synthetic dataframe)
+
+        Returns:
+
+        summary (pd.dataframe): one row of statistics per column
+        histograms (dict):      edges, real counts and synthetic counts of each column
+
+        """
+        engine = DistributionStatistics()
+        summary = engine.KS_statistics(dataframe1, dataframe2)
+        distance_table, histograms = engine.histogram_comparison(dataframe1, dataframe2, self.bins)
+        summary = summary.merge(distance_table, on = 'column', how = 'left')
+        columns = summary['column'].tolist()
+        real_mean = dataframe1[columns].mean().to_numpy(dtype = float)
+        fake_mean = dataframe2[columns].mean().to_numpy(dtype = float)
+        real_std = dataframe1[columns].std(ddof = 0).to_numpy(dtype = float)
+        fake_std = dataframe2[columns].std(ddof = 0).to_numpy(dtype = float)
+        summary['mean_real'] = real_mean
+        summary['mean_synthetic'] = fake_mean
+        summary['std_real'] = real_std
+        summary['std_synthetic'] = fake_std
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            summary['mean_diff_%'] = np.abs(real_mean - fake_mean)/np.abs(real_mean) * 100
+            summary['std_diff_%'] = np.abs(real_std - fake_std)/real_std * 100
+        summary['figure'] = [self.figure_name(id, c) for id, c in enumerate(columns)]
+
+        return summary, histograms
+
+    # render the histogram and CDF comparison of a column
+    #--------------------------------------------------------------------------
+    def column_figure(self, column, real_array, fake_array, histogram, statistics, path):
+
+        """
+        column_figure(column, real_array, fake_array, histogram, statistics, path)
+
+        Draws the histograms (from the counts on shared bins) and the CDFs of the real
+        and synthetic values of a column side by side, and saves the figure. The CDFs
+        are drawn from a fixed number of quantiles, so that the cost does not depend
+        on the number of rows.
+
+        Keyword arguments:
+
+        column (str):          name of the column
+        real_array (np.array): real values of the column
+        fake_array (np.array): synthetic values of the column
+        histogram (tuple):     bin edges, real counts and synthetic counts
+        statistics (dict):     column statistics (KS statistic, p value, distances)
+        path (str):            path of the .png file
+
+        Returns:
+
+        path (str): path of the .png file
+
+        """
+        real_array = real_array[~np.isnan(real_array)]
+        fake_array = fake_array[~np.isnan(fake_array)]
+        fig = self.new_figure((10, 4))
+        ax_hist, ax_cdf = fig.subplots(1, 2)
+        if real_array.size > 0 and fake_array.size > 0:
+            edges, real_counts, fake_counts = histogram
+            widths = np.diff(edges)
+            ax_hist.stairs(real_counts/real_counts.sum()/widths, edges, fill = True, alpha = 0.5,
+                           label = 'real data')
+            ax_hist.stairs(fake_counts/fake_counts.sum()/widths, edges, fill = True, alpha = 0.5,
+                           label = 'synthetic data')
+            probabilities = np.linspace(0, 1, self.num_points)
+            ax_cdf.step(np.quantile(real_array, probabilities), probabilities, c = 'blue',
+                        label = 'real data')
+            ax_cdf.step(np.quantile(fake_array, probabilities), probabilities, c = 'orange',
+                        label = 'synthetic data')
+        ax_hist.set_title('Histogram of {}'.format(column))
+        ax_hist.set_ylabel('Norm frequency', fontsize = 8)
+        ax_hist.legend(loc = 'upper right', fontsize = 8)
+        ax_cdf.set_title('CDF of {}'.format(column))
+        ax_cdf.set_ylabel('Cumulative norm frequency', fontsize = 8)
+        ax_cdf.legend(loc = 'upper left', fontsize = 8)
+        for ax in (ax_hist, ax_cdf):
+            ax.set_xlabel(column, fontsize = 8)
+            ax.tick_params(labelsize = 8)
+        text = ('STD diff = {:.2f}%   Mean diff = {:.2f}%   KS statistic = {:.3f}   P value = {:.3f}   '
+                'JS = {:.3f}   Wasserstein = {:.3g}   TV = {:.3f}')
+        fig.text(0.5, 0.02, text.format(statistics['std_diff_%'], statistics['mean_diff_%'],
+                                        statistics['D'], statistics['p'], statistics['JS'],
+                                        statistics['wasserstein'], statistics['TV']),
+                 ha = 'center', fontsize = 8)
+        fig.subplots_adjust(left = 0.07, right = 0.98, bottom = 0.2, top = 0.9, wspace = 0.25)
+        self.save_figure(fig, path)
+
+        return path
+
+    # render the figures of a group of columns (worker task)
+    #--------------------------------------------------------------------------
+    def render_columns(self, real_block, fake_block, histograms, statistics, folder):
+        paths = []
+        for row, histogram in zip(statistics, histograms):
+            col = row['column']
+            path = os.path.join(folder, row['figure'])
+            paths.append(self.column_figure(col, real_block[col].to_numpy(dtype = float),
+                                            fake_block[col].to_numpy(dtype = float), histogram,
+                                            row, path))
+
+        return paths
+
+    # render the correlation heatmaps of real and synthetic data
+    #--------------------------------------------------------------------------
+    def correlation_figure(self, matrix_real, matrix_fake, path):
+        fig = self.new_figure((12, 5.5))
+        axes = fig.subplots(1, 2)
+        for ax, matrix, title in zip(axes, (matrix_real, matrix_fake), ('Real data', 'Synthetic data')):
+            image = ax.imshow(matrix.to_numpy(dtype = float), cmap = 'coolwarm', vmin = -1, vmax = 1)
+            ax.set_title(title)
+            if matrix.shape[0] <= 30:
+                ax.set_xticks(np.arange(matrix.shape[1]), matrix.columns, rotation = 90, fontsize = 6)
+                ax.set_yticks(np.arange(matrix.shape[0]), matrix.index, fontsize = 6)
+            else:
+                ax.set_xticks([])
+                ax.set_yticks([])
+        fig.subplots_adjust(left = 0.15, right = 0.85, bottom = 0.25, top = 0.92, wspace = 0.35)
+        fig.colorbar(image, ax = axes, shrink = 0.8)
+        self.save_figure(fig, path)
+
+        return path
+
+    # write the HTML summary of the report
+    #--------------------------------------------------------------------------
+    def write_html(self, summary, top_pairs, correlation_name, path):
+        table = summary.drop(columns = 'figure').to_html(index = False, float_format = '{:.4f}'.format)
+        pair_table = top_pairs.to_html(index = False, float_format = '{:.4f}'.format)
+        lines = ['<html><head><meta charset="utf-8"><title>Validation report</title></head><body>',
+                 '<h1>Validation report</h1>', table, '<h2>Correlations</h2>',
+                 '<img src="{}">'.format(html.escape(correlation_name)),
+                 '<h3>Largest correlation drift</h3>', pair_table, '<h2>Columns</h2>']
+        for col, name in zip(summary['column'], summary['figure']):
+            lines.append('<h3>{}</h3><img src="{}">'.format(html.escape(str(col)), html.escape(name)))
+        lines.append('</body></html>')
+        with open(path, 'w', encoding = 'utf-8') as file:
+            file.write('\n'.join(lines))
+
+    # generate the validation report
+    #--------------------------------------------------------------------------
+    def run(self, dataframe1, dataframe2, folder, pbar = None):
+
+        """
+        run(dataframe1, dataframe2, folder, pbar)
+
+        Computes the column statistics and the Spearman correlation matrices, renders
+        all figures over a pool of worker processes (groups of columns per task, or 
+        in the calling process with a single worker, e.g. from a GUI thread) and
+        writes report.json and report.html in the output folder, together with the
+        correlation drift summary and the pairs with the largest drift.
+
+        Keyword arguments:
+
+        dataframe1 (pd.dataframe):  dataframe of real numbers (original dataframe)
+        dataframe2 (pd.dataframe):  dataframe of fake numbers (synthetic dataframe)
+        folder (str):               output folder of the report
+        pbar (sg.ProgressBar):      progress bar updated for each group of columns (optional)
+
+        Returns:
+
+        report_path (str): path of the HTML summary
+
+        """
+        os.makedirs(folder, exist_ok = True)
+        summary, histograms = self.column_statistics(dataframe1, dataframe2)
+        columns = summary['column'].tolist()
+        engine = RankCorrelation()
+        matrix_real = engine.Spearman(dataframe1[columns])
+        matrix_fake = engine.Spearman(dataframe2[columns])
+        records = summary.to_dict('records')
+        num_groups = max(min(len(columns), self.workers * 4), 1)
+        groups = [g for g in np.array_split(np.arange(len(columns)), num_groups) if g.size > 0]
+        correlation_name = 'correlations.png'
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers = self.workers) as executor:
+                futures = [executor.submit(self.correlation_figure, matrix_real, matrix_fake,
+                                           os.path.join(folder, correlation_name))]
+                for group in groups:
+                    block = [columns[i] for i in group]
+                    futures.append(executor.submit(self.render_columns, dataframe1[block],
+                                                   dataframe2[block], [histograms[c] for c in block],
+                                                   [records[i] for i in group], folder))
+                for id, future in enumerate(as_completed(futures)):
+                    future.result()
+                    if pbar is not None:
+                        pbar.update(id + 1, max = len(futures))
+        else:
+            self.correlation_figure(matrix_real, matrix_fake, os.path.join(folder, correlation_name))
+            for id, group in enumerate(groups):
+                block = [columns[i] for i in group]
+                self.render_columns(dataframe1[block], dataframe2[block], 
+                                    [histograms[c] for c in block], [records[i] for i in group], folder)
+                if pbar is not None:
+                    pbar.update(id + 1, max = len(groups))
+        drift = CorrelationDrift(matrix_real, matrix_fake)
+        top_pairs = drift.top_pairs(self.top_pairs)
+        report = {'columns' : json.loads(summary.to_json(orient = 'records')),
+                  'correlations' : {'real' : json.loads(matrix_real.to_json()),
+                                    'synthetic' : json.loads(matrix_fake.to_json()),
+                                    'drift' : drift.summary(),
+                                    'top_pairs' : json.loads(top_pairs.to_json(orient = 'records')),
+                                    'figure' : correlation_name}}
+        with open(os.path.join(folder, 'report.json'), 'w', encoding = 'utf-8') as file:
+            json.dump(report, file, indent = 2)
+        report_path = os.path.join(folder, 'report.html')
+        self.write_html(summary, top_pairs, correlation_name, report_path)
+
+        return report_path
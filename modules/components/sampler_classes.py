@@ -0,0 +1,1347 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+# define the class for CDF sampling of a single data series. The sorted values
+# of the original column are used as quantile table of the inverse CDF
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class CDFSampler:
+
+    """
+    CDFSampler(max_levels)
+
+    Fitted sampler of a single column based on the empirical cumulative distribution
+    function. The rate of missing values is computed once, and the support of the
+    column is classified as discrete (integer values with few distinct levels) or
+    continuous. Discrete columns keep a table of unique values and cumulative 
+    probabilities, while continuous columns keep the sorted values and their
+    probabilities as quantile table. Each synthetic value is obtained from a 
+    single uniform value: values below the null rate become missing values, the
+    others are rescaled and mapped through the inverse CDF (table lookup for 
+    discrete columns, interpolation for continuous columns), all in the same
+    vectorized batch.
+
+    Keyword arguments:
+
+    max_levels (int): maximum number of distinct values of discrete columns
+
+    """
+    null_rate = 0.0
+    discrete = False
+    partial_draws = True
+
+    def __init__(self, max_levels = 1000):
+        self.max_levels = max_levels
+
+    # fit the empirical CDF of the data series
+    #--------------------------------------------------------------------------
+    def fit(self, array, rng = None):
+
+        """
+        fit(array, rng)
+
+        Computes the null rate and sorts the valid column values to build the
+        quantile table of the inverse CDF, together with its probabilities. If 
+        the values are integers with no more than max_levels distinct values, the
+        unique values and their cumulative probabilities are kept instead.
+
+        Keyword arguments:
+
+        array (np.array):          values of the original column
+        rng (np.random.Generator): random number generator (optional)
+
+        Returns:
+
+        self (CDFSampler): fitted sampler
+
+        """
+        array = np.asarray(array, dtype = float)
+        valid = ~np.isnan(array)
+        self.null_rate = 1 - valid.sum()/array.size if array.size > 0 else 0.0
+        self.x = np.sort(array[valid])
+        self.y = np.arange(1, self.x.size + 1)/max(self.x.size, 1)
+        self.discrete = False
+        if self.x.size > 0 and np.array_equal(self.x, np.round(self.x)):
+            levels, counts = np.unique(self.x, return_counts = True)
+            if levels.size <= self.max_levels:
+                self.discrete = True
+                self.values = levels
+                self.cumulative = np.cumsum(counts)/self.x.size
+
+        return self
+
+    # map uniform values through the inverse CDF
+    #--------------------------------------------------------------------------
+    def quantile(self, uniforms):
+        if self.x.size == 0:
+            return np.full(np.shape(uniforms), np.nan)
+        if self.null_rate > 0:
+            synth_array = np.full(np.shape(uniforms), np.nan)
+            valid = uniforms >= self.null_rate
+            rescaled = (uniforms[valid] - self.null_rate)/(1 - self.null_rate)
+            synth_array[valid] = self.quantile_valid(rescaled)
+            return synth_array
+
+        return self.quantile_valid(uniforms)
+
+    # map the uniform values of the Gaussian copula through the inverse CDF
+    #--------------------------------------------------------------------------
+    def copula_quantile(self, uniforms, rng):
+
+        """
+        copula_quantile(uniforms, rng)
+
+        Maps the correlated uniform values of the Gaussian copula through the
+        inverse CDF of the valid values. Missing values are drawn at the original
+        rate from the independent stream of the column, so that missingness is
+        not tied to the latent values (and does not leak into other columns).
+
+        Keyword arguments:
+
+        uniforms (np.array):       correlated uniform values of the column
+        rng (np.random.Generator): random number generator of the column
+
+        Returns:
+
+        synth_array (np.array): synthetic values
+
+        """
+        if self.x.size == 0:
+            return np.full(np.shape(uniforms), np.nan)
+        synth_array = np.asarray(self.quantile_valid(uniforms), dtype = float)
+        if self.null_rate > 0:
+            synth_array[rng.random(synth_array.size) < self.null_rate] = np.nan
+
+        return synth_array
+
+    # inverse CDF of the valid values
+    #--------------------------------------------------------------------------
+    def quantile_valid(self, uniforms):
+        if self.discrete:
+            index = np.searchsorted(self.cumulative, uniforms, side = 'right')
+            return self.values[np.minimum(index, self.values.size - 1)]
+
+        return np.interp(uniforms, self.y, self.x)
+
+    # generate synthetic values
+    #--------------------------------------------------------------------------
+    def sample(self, num_val, rng):
+
+        """
+        sample(num_val, rng)
+
+        Draws all uniform values at once and resolves them through the inverse CDF
+        in a single vectorized operation, including missing values.
+
+        Keyword arguments:
+
+        num_val (int):            number of synthetic values to be generated
+        rng (np.random.Generator): random number generator
+
+        Returns:
+
+        synth_array (np.array): synthetic values
+
+        """
+        return self.quantile(rng.random(num_val))
+
+
+# define the class for the mergeable quantile sketch of a data series, used to
+# approximate the CDF of inputs that are too large to be sorted in memory
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class QuantileSketch:
+
+    """
+    QuantileSketch(error)
+
+    Mergeable quantile sketch of a single data series, based on the merging t-digest.
+    Values are summarized by weighted centroids, whose size is bounded by the arcsine
+    scale function so that the quantile (rank) error stays below the given bound and 
+    decreases towards the tails. Sketches are built in one streaming pass over the
+    data, and sketches of different data shards can be merged together.
+
+    Keyword arguments:
+
+    error (float): maximum quantile error of the sketch
+
+    """
+    def __init__(self, error = 0.005):
+        self.error = error
+        self.compression = int(np.ceil(np.pi/(2 * error)))
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    # merge centroids that fall within the same unit of the scale function
+    #--------------------------------------------------------------------------
+    def compress(self, means, weights):
+        order = np.argsort(means, kind = 'stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        cumulative = np.cumsum(weights) - weights
+        scale = self.compression/(2 * np.pi) * np.arcsin(2 * cumulative/total - 1)
+        bucket = np.floor(scale - scale[0]).astype(np.intp)
+        bucket_weights = np.bincount(bucket, weights)
+        bucket_sums = np.bincount(bucket, weights * means)
+        mask = bucket_weights > 0
+        self.weights = bucket_weights[mask]
+        self.means = bucket_sums[mask]/self.weights
+
+    # add values to the sketch
+    #--------------------------------------------------------------------------
+    def update(self, array):
+
+        """
+        update(array)
+
+        Adds the values of the array to the sketch (missing values are ignored).
+
+        Keyword arguments:
+
+        array (np.array): values of the data series
+
+        Returns:
+
+        self (QuantileSketch): updated sketch
+
+        """
+        array = np.asarray(array, dtype = float)
+        array = array[~np.isnan(array)]
+        if array.size == 0:
+            return self
+        self.count += array.size
+        self.min = min(self.min, array.min())
+        self.max = max(self.max, array.max())
+        self.compress(np.concatenate([self.means, array]),
+                      np.concatenate([self.weights, np.ones(array.size)]))
+
+        return self
+
+    # merge with another sketch
+    #--------------------------------------------------------------------------
+    def merge(self, other):
+
+        """
+        merge(other)
+
+        Merges the centroids of another sketch into this one, as if all values
+        had been added to the same sketch.
+
+        Keyword arguments:
+
+        other (QuantileSketch): sketch to be merged
+
+        Returns:
+
+        self (QuantileSketch): merged sketch
+
+        """
+        if other.count == 0:
+            return self
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress(np.concatenate([self.means, other.means]),
+                      np.concatenate([self.weights, other.weights]))
+
+        return self
+
+    # map uniform values through the approximate inverse CDF
+    #--------------------------------------------------------------------------
+    def quantile(self, uniforms):
+        if self.count == 0:
+            return np.full(np.shape(uniforms), np.nan)
+        cumulative = np.cumsum(self.weights) - self.weights/2
+        y = np.concatenate([[0.0], cumulative/self.count, [1.0]])
+        x = np.concatenate([[self.min], self.means, [self.max]])
+
+        return np.interp(uniforms, y, x)
+
+
+# define the class for approximate CDF sampling of a single data series, based on
+# a quantile sketch instead of the full sorted column
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class SketchSampler:
+
+    """
+    SketchSampler(error, sketch)
+
+    Fitted sampler of a single column based on the approximate CDF given by a
+    mergeable quantile sketch. Synthetic values are obtained by interpolating 
+    uniform values through the centroids of the sketch.
+
+    Keyword arguments:
+
+    error (float):           maximum quantile error of the sketch
+    sketch (QuantileSketch): already built sketch (optional)
+
+    """
+    partial_draws = True
+
+    def __init__(self, error = 0.005, sketch = None):
+        self.sketch = QuantileSketch(error) if sketch is None else sketch
+
+    # fit the sketch of the data series
+    #--------------------------------------------------------------------------
+    def fit(self, array, rng = None):
+        self.sketch.update(array)
+
+        return self
+
+    # map uniform values through the approximate inverse CDF
+    #--------------------------------------------------------------------------
+    def quantile(self, uniforms):
+        return self.sketch.quantile(uniforms)
+
+    # generate synthetic values
+    #--------------------------------------------------------------------------
+    def sample(self, num_val, rng):
+        return self.quantile(rng.random(num_val))
+
+
+# define the class for the on-disk cache of fitted distributions. Each entry is a
+# small JSON file named after the column fingerprint, evicted by last use (LRU)
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class DistfitCache:
+
+    """
+    DistfitCache(path, max_entries)
+
+    On-disk cache of the best fitting distributions selected by distfit. Entries
+    are keyed by a cheap fingerprint of the column (number of values, integer flag
+    and hash of a quantile summary rounded to 6 significant digits), so that 
+    identical or nearly identical columns of different files and runs reuse the
+    same fit. Each entry is stored in its own file, written atomically, and the
+    least recently used entries are removed when the cache exceeds max_entries.
+
+    Keyword arguments:
+
+    path (str):         folder of the cache
+    max_entries (int):  maximum number of cached distributions
+
+    """
+    def __init__(self, path, max_entries = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(path, exist_ok = True)
+
+    # fingerprint of a data series
+    #--------------------------------------------------------------------------
+    def fingerprint(self, array, num_quantiles = 101):
+
+        """
+        fingerprint(array, num_quantiles)
+
+        Computes the cache key of a data series (without missing values) from its
+        length, its integer flag and a rounded summary of its quantiles.
+
+        Keyword arguments:
+
+        array (np.array):     values of the data series
+        num_quantiles (int):  number of quantiles of the summary
+
+        Returns:
+
+        key (str): fingerprint of the data series
+
+        """
+        integral = bool(np.array_equal(array, np.round(array)))
+        quantiles = np.quantile(array, np.linspace(0, 1, num_quantiles)) if array.size else []
+        summary = '{}|{}|{}'.format(array.size, integral, ','.join('{:.6g}'.format(q) for q in quantiles))
+
+        return hashlib.sha1(summary.encode('utf-8')).hexdigest()
+
+    # file path of a cache entry
+    #--------------------------------------------------------------------------
+    def entry_path(self, key):
+        return os.path.join(self.path, '{}.json'.format(key))
+
+    # read a cache entry
+    #--------------------------------------------------------------------------
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, 'r', encoding = 'utf-8') as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return entry
+
+    # write a cache entry and evict the least recently used ones
+    #--------------------------------------------------------------------------
+    def put(self, key, entry):
+        path = self.entry_path(key)
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'w', encoding = 'utf-8') as file:
+            json.dump(entry, file)
+        os.replace(temp_path, path)
+        self.evict()
+
+    # remove the least recently used entries
+    #--------------------------------------------------------------------------
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith('.json'):
+                filepath = os.path.join(self.path, name)
+                try:
+                    entries.append((os.path.getmtime(filepath), filepath))
+                except OSError:
+                    continue
+        entries.sort()
+        for mtime, filepath in entries[:max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(filepath)
+            except OSError:
+                continue
+
+
+# define the class for theoretical distribution fitting of a single data series,
+# based on the distfit package. Only the best model name and its parameters are kept
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class DistfitSampler:
+
+    """
+    DistfitSampler(cache_dir, cache_size)
+
+    Fitted sampler of a single column based on theoretical distribution models.
+    The best fitting model is selected with distfit, and synthetic values are drawn
+    from the corresponding scipy.stats distribution. If a cache folder is given,
+    the selected models are stored in a DistfitCache, and columns with the same
+    fingerprint skip the fit.
+
+    Keyword arguments:
+
+    cache_dir (str):   folder of the distribution cache (optional)
+    cache_size (int):  maximum number of cached distributions
+
+    """
+    null_rate = 0.0
+    integral = True
+    partial_draws = False
+    name = None
+
+    def __init__(self, cache_dir = None, cache_size = 1000):
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+
+    # fit theoretical models to the data series
+    #--------------------------------------------------------------------------
+    def fit(self, array, rng = None):
+
+        """
+        fit(array, rng)
+
+        Fits the valid data with the distfit models catalog and keeps the name
+        and the parameters of the best fitting distribution, together with the
+        rate of missing values and whether the column holds integer values. Cached
+        models are used when the column fingerprint is found in the cache. Columns
+        without valid values keep no model and are sampled as missing values.
+
+        Keyword arguments:
+
+        array (np.array):          values of the original column
+        rng (np.random.Generator): random number generator (optional)
+
+        Returns:
+
+        self (DistfitSampler): fitted sampler
+
+        """
+        array = np.asarray(array, dtype = float)
+        valid = ~np.isnan(array)
+        self.null_rate = 1 - valid.sum()/array.size if array.size > 0 else 0.0
+        array = array[valid]
+        self.integral = bool(np.array_equal(array, np.round(array)))
+        if array.size == 0:
+            self.name, self.params = None, ()
+            return self
+        cache, key = None, None
+        if self.cache_dir is not None:
+            cache = DistfitCache(self.cache_dir, self.cache_size)
+            key = cache.fingerprint(array)
+            entry = cache.get(key)
+            if entry is not None:
+                self.name = entry['name']
+                self.params = tuple(entry['params'])
+                return self
+        from distfit import distfit
+        model = distfit(bound = 'both')
+        model.fit_transform(array, verbose = 0)
+        self.name = model.model['name']
+        self.params = tuple(float(p) for p in model.model['params'])
+        if cache is not None:
+            cache.put(key, {'name' : self.name, 'params' : list(self.params)})
+
+        return self
+
+    # generate synthetic values
+    #--------------------------------------------------------------------------
+    def sample(self, num_val, rng):
+
+        """
+        sample(num_val, rng)
+
+        Draws synthetic values from the best fitting distribution, rounded to
+        the closest integer if the original column holds integer values, and
+        inserts missing values at the original rate.
+
+        Keyword arguments:
+
+        num_val (int):            number of synthetic values to be generated
+        rng (np.random.Generator): random number generator
+
+        Returns:
+
+        synth_array (np.array): synthetic values
+
+        """
+        if self.name is None:
+            return np.full(num_val, np.nan)
+        from scipy import stats
+        distribution = getattr(stats, self.name)
+        synth_array = distribution.rvs(*self.params, size = num_val, random_state = rng)
+        if self.integral:
+            synth_array = np.round(synth_array, 0)
+        if self.null_rate > 0:
+            synth_array[rng.random(num_val) < self.null_rate] = np.nan
+
+        return synth_array
+
+
+# define the class for the selection of the kernel bandwidth. Closed form rules
+# and binned leave-one-out likelihood run in near-linear time, while the original
+# cross-validated grid search is kept as a fallback
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class BandwidthSelector:
+
+    """
+    BandwidthSelector(kernel)
+
+    Selects the bandwidth of a kernel density model for a single data series. The
+    available strategies are the Scott and Silverman rules of thumb, a leave-one-out
+    likelihood maximization based on binned data and FFT convolution, and the
+    brute-force cross-validated grid search (may take long time to finish).
+
+    Keyword arguments:
+
+    kernel (str): name of the kernel (gaussian, tophat, epanechnikov, exponential,
+                  linear, cosine)
+
+    """
+    strategies = ('scott', 'silverman', 'loo', 'grid')
+
+    # roughness and second moment of each kernel with unit bandwidth, used
+    # to rescale the gaussian rules of thumb to the other kernels
+    kernel_moments = {'gaussian' : (1/(2*np.sqrt(np.pi)), 1.0),
+                      'tophat' : (1/2, 1/3),
+                      'epanechnikov' : (3/5, 1/5),
+                      'exponential' : (1/4, 2.0),
+                      'linear' : (2/3, 1/6),
+                      'cosine' : (np.pi**2/16, 1 - 8/np.pi**2)}
+
+    def __init__(self, kernel = 'gaussian'):
+        if kernel not in self.kernel_moments:
+            raise ValueError('Unknown kernel: {}'.format(kernel))
+        self.kernel = kernel
+
+    # kernel density function with unit bandwidth
+    #--------------------------------------------------------------------------
+    def kernel_function(self, u):
+        u = np.abs(u)
+        inside = u < 1
+        if self.kernel == 'gaussian':
+            return np.exp(-0.5 * u**2)/np.sqrt(2 * np.pi)
+        elif self.kernel == 'tophat':
+            return np.where(inside, 0.5, 0.0)
+        elif self.kernel == 'epanechnikov':
+            return np.where(inside, 0.75 * (1 - u**2), 0.0)
+        elif self.kernel == 'exponential':
+            return 0.5 * np.exp(-u)
+        elif self.kernel == 'linear':
+            return np.where(inside, 1 - u, 0.0)
+        else:
+            return np.where(inside, np.pi/4 * np.cos(np.pi/2 * u), 0.0)
+
+    # conversion factor from gaussian to the selected kernel bandwidth
+    #--------------------------------------------------------------------------
+    def canonical_factor(self):
+        roughness, moment = self.kernel_moments[self.kernel]
+        g_roughness, g_moment = self.kernel_moments['gaussian']
+        factor = (roughness/moment**2)**0.2/(g_roughness/g_moment**2)**0.2
+
+        return factor
+
+    # smallest bandwidth used for degenerate (constant) data series
+    #--------------------------------------------------------------------------
+    def minimal_bandwidth(self, array):
+        return np.finfo(float).eps * max(1.0, float(np.abs(array).max()))
+
+    # Scott rule of thumb
+    #--------------------------------------------------------------------------
+    def scott(self, array):
+        sigma = np.std(array, ddof = 1) if array.size > 1 else 0.0
+        bandwidth = 1.059 * sigma * array.size**(-0.2) * self.canonical_factor()
+
+        return float(max(bandwidth, self.minimal_bandwidth(array)))
+
+    # Silverman rule of thumb
+    #--------------------------------------------------------------------------
+    def silverman(self, array):
+        sigma = np.std(array, ddof = 1) if array.size > 1 else 0.0
+        q75, q25 = np.percentile(array, [75, 25])
+        spread = min(sigma, (q75 - q25)/1.349) if q75 > q25 else sigma
+        bandwidth = 0.9 * spread * array.size**(-0.2) * self.canonical_factor()
+
+        return float(max(bandwidth, self.minimal_bandwidth(array)))
+
+    # leave-one-out likelihood on binned data
+    #--------------------------------------------------------------------------
+    def binned_LOO(self, array, num_bins = 4096, num_candidates = 40):
+
+        """
+        binned_LOO(array, num_bins, num_candidates)
+
+        Selects the bandwidth maximizing the leave-one-out log-likelihood of the
+        data. The data is linearly binned on a regular grid, and the density at the
+        grid points is obtained for each candidate bandwidth with a FFT convolution,
+        so that the cost is linear in the number of values. On integer or heavily
+        tied data the likelihood keeps growing as the bandwidth shrinks, so that
+        candidates below the spacing of the distinct values are skipped, and the
+        Silverman rule is returned if the best candidate is the smallest one.
+
+        Keyword arguments:
+
+        array (np.array):      values of the original column
+        num_bins (int):        number of grid points used for binning
+        num_candidates (int):  number of candidate bandwidths around Silverman rule
+
+        Returns:
+
+        bandwidth (float): selected bandwidth
+
+        """
+        from scipy.signal import fftconvolve
+        reference = self.silverman(array)
+        n = array.size
+        low, high = array.min(), array.max()
+        if n < 3 or high == low:
+            return reference
+        delta = (high - low)/(num_bins - 1)
+        position = (array - low)/delta
+        index = np.minimum(position.astype(np.intp), num_bins - 2)
+        weight = position - index
+        counts = (np.bincount(index, 1 - weight, num_bins) + 
+                  np.bincount(index + 1, weight, num_bins))
+        offsets = np.arange(-(num_bins - 1), num_bins) * delta
+        levels = np.unique(array)
+        spacing = np.diff(levels).min() if levels.size > 1 else 0.0
+        candidates = reference * np.geomspace(0.05, 2.0, num_candidates)
+        candidates = candidates[candidates >= max(delta, spacing)]
+        if candidates.size == 0:
+            return reference
+        mask = counts > 0
+        best_bandwidth, best_score = reference, -np.inf
+        for bandwidth in candidates:
+            kernel = self.kernel_function(offsets/bandwidth)/bandwidth
+            density = fftconvolve(counts, kernel, mode = 'valid')
+            self_density = self.kernel_function(0.0)/bandwidth
+            loo_density = (density[mask] - self_density)/(n - 1)
+            score = np.sum(counts[mask] * np.log(np.maximum(loo_density, 1e-300)))
+            if score > best_score:
+                best_bandwidth, best_score = float(bandwidth), score
+        if best_bandwidth == candidates[0]:
+            return reference
+
+        return best_bandwidth
+
+    # brute-force cross-validated grid search
+    #--------------------------------------------------------------------------
+    def grid_search(self, array, rng = None):
+        from sklearn.neighbors import KernelDensity
+        from sklearn.model_selection import GridSearchCV, KFold
+        rng = np.random.default_rng(rng)
+        folds = KFold(n_splits = 20, shuffle = True, 
+                      random_state = int(rng.integers(np.iinfo(np.int32).max)))
+        grid = GridSearchCV(KernelDensity(kernel = self.kernel),
+                            {'bandwidth': np.linspace(0.1, 1.0, 30)},
+                            cv=folds)
+        grid.fit(array[:, None])
+
+        return float(grid.best_params_['bandwidth'])
+
+    # select the bandwidth with the given strategy
+    #--------------------------------------------------------------------------
+    def select(self, array, strategy = 'loo', rng = None):
+
+        """
+        select(array, strategy, rng)
+
+        Selects the kernel bandwidth of the data series with the given strategy.
+        A numeric strategy is used as a fixed bandwidth.
+
+        Keyword arguments:
+
+        array (np.array):          values of the original column
+        strategy (str):            one of scott, silverman, loo, grid (or a number)
+        rng (np.random.Generator): random number generator (optional)
+
+        Returns:
+
+        bandwidth (float): selected bandwidth
+
+        """
+        array = np.asarray(array, dtype = float)
+        if isinstance(strategy, (int, float)):
+            return float(strategy)
+        elif strategy == 'scott':
+            return self.scott(array)
+        elif strategy == 'silverman':
+            return self.silverman(array)
+        elif strategy == 'loo':
+            return self.binned_LOO(array)
+        elif strategy == 'grid':
+            return self.grid_search(array, rng)
+        else:
+            raise ValueError('Unknown bandwidth strategy: {}'.format(strategy))
+
+
+# define the class for Kernel Density Estimation sampling of a single data series
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class KDESampler:
+
+    """
+    KDESampler(bandwidth, kernel)
+
+    Fitted sampler of a single column based on Kernel Density Estimation. The
+    bandwidth is selected with one of the strategies of BandwidthSelector, and 
+    the original values are kept as support points. Synthetic values are drawn
+    in bulk by picking support points and adding kernel noise in one batch.
+
+    Keyword arguments:
+
+    bandwidth (str): bandwidth selection strategy (scott, silverman, loo, grid)
+    kernel (str):    name of the kernel (gaussian, tophat, epanechnikov, 
+                     exponential, linear, cosine)
+
+    """
+    null_rate = 0.0
+    partial_draws = True
+
+    def __init__(self, bandwidth = 'loo', kernel = 'gaussian'):
+        self.strategy = bandwidth
+        self.kernel = kernel
+
+    # fit the kernel density model
+    #--------------------------------------------------------------------------
+    def fit(self, array, rng = None):
+
+        """
+        fit(array, rng)
+
+        Selects the kernel bandwidth and keeps the original values as support 
+        points of the kernel model. Missing values are excluded from the support,
+        and their rate is kept to generate missing values. Columns without valid
+        values have no support and are sampled as missing values.
+
+        Keyword arguments:
+
+        array (np.array):          values of the original column
+        rng (np.random.Generator): random number generator (optional)
+
+        Returns:
+
+        self (KDESampler): fitted sampler
+
+        """
+        array = np.asarray(array, dtype = float)
+        valid = ~np.isnan(array)
+        self.null_rate = 1 - valid.sum()/array.size if array.size > 0 else 0.0
+        self.support = array[valid]
+        if self.support.size == 0:
+            self.bandwidth = np.nan
+            return self
+        selector = BandwidthSelector(self.kernel)
+        self.bandwidth = selector.select(self.support, self.strategy, rng)
+
+        return self
+
+    # draw noise from the kernel with unit bandwidth
+    #--------------------------------------------------------------------------
+    def kernel_noise(self, num_val, rng):
+        if self.kernel == 'gaussian':
+            return rng.standard_normal(num_val)
+        elif self.kernel == 'tophat':
+            return rng.uniform(-1, 1, num_val)
+        elif self.kernel == 'epanechnikov':
+            u1, u2, u3 = rng.uniform(-1, 1, (num_val, 3)).T
+            largest = (np.abs(u3) >= np.abs(u2)) & (np.abs(u3) >= np.abs(u1))
+            return np.where(largest, u2, u3)
+        elif self.kernel == 'exponential':
+            return rng.laplace(0, 1, num_val)
+        elif self.kernel == 'linear':
+            u1, u2 = rng.random((num_val, 2)).T
+            return u1 - u2
+        else:
+            return 2/np.pi * np.arcsin(rng.uniform(-1, 1, num_val))
+
+    # generate synthetic values
+    #--------------------------------------------------------------------------
+    def sample(self, num_val, rng):
+
+        """
+        sample(num_val, rng)
+
+        Draws synthetic values from the fitted kernel density model. The support
+        points are picked in one vectorized step, and the kernel noise scaled by
+        the bandwidth is added with one batched draw. Support points, noise and
+        missing values are drawn from separate child streams, so that the first
+        values do not depend on the number of values drawn.
+
+        Keyword arguments:
+
+        num_val (int):            number of synthetic values to be generated
+        rng (np.random.Generator): random number generator
+
+        Returns:
+
+        synth_array (np.array): synthetic values
+
+        """
+        if self.support.size == 0:
+            return np.full(num_val, np.nan)
+        index_rng, noise_rng, null_rng = rng.spawn(3)
+        index = index_rng.integers(0, self.support.size, num_val)
+        synth_array = self.support[index]
+        synth_array += self.bandwidth * self.kernel_noise(num_val, noise_rng)
+        if self.null_rate > 0:
+            synth_array[null_rng.random(num_val) < self.null_rate] = np.nan
+
+        return synth_array
+
+
+# define the class for sampling of categorical data series, using frequency tables
+# precomputed with the alias method (constant time per draw)
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class AliasSampler:
+
+    """
+    AliasSampler()
+
+    Fitted sampler of a categorical column (text, categories, booleans). The
+    frequency table of the column is converted once into the probability and
+    alias tables of the alias method (Vose), so that each synthetic value is drawn
+    with one uniform integer and one uniform float, vectorized over the batch.
+    Categories are ordered by decreasing frequency, which is also the order used
+    to encode the column for the Gaussian copula.
+
+    """
+    partial_draws = True
+
+    # fit the frequency table of the data series
+    #--------------------------------------------------------------------------
+    def fit(self, array, rng = None):
+
+        """
+        fit(array, rng)
+
+        Computes the frequency of each category and builds the alias tables.
+
+        Keyword arguments:
+
+        array (np.array):          values of the original column
+        rng (np.random.Generator): random number generator (optional)
+
+        Returns:
+
+        self (AliasSampler): fitted sampler
+
+        """
+        counts = pd.Series(array).value_counts(dropna = False, sort = True)
+        self.values = counts.index.to_numpy(dtype = object)
+        self.probabilities = counts.to_numpy(dtype = float)/counts.sum()
+        self.cumulative = np.cumsum(self.probabilities)
+        num_values = self.values.size
+        scaled = self.probabilities * num_values
+        self.prob = np.ones(num_values)
+        self.alias = np.arange(num_values)
+        small = list(np.flatnonzero(scaled < 1))
+        large = list(np.flatnonzero(scaled >= 1))
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] = scaled[high] + scaled[low] - 1
+            if scaled[high] < 1:
+                small.append(high)
+            else:
+                large.append(high)
+
+        return self
+
+    # encode the categories as integer codes (frequency order)
+    #--------------------------------------------------------------------------
+    def encode(self, array):
+        return pd.Index(self.values).get_indexer(pd.Series(array, dtype = object)).astype(float)
+
+    # map uniform values through the inverse CDF of the frequency table
+    #--------------------------------------------------------------------------
+    def quantile(self, uniforms):
+        index = np.searchsorted(self.cumulative, uniforms, side = 'right')
+
+        return self.values[np.minimum(index, self.values.size - 1)]
+
+    # map the uniform values of the Gaussian copula through the frequency table
+    #--------------------------------------------------------------------------
+    def copula_quantile(self, uniforms, rng):
+        return self.quantile(uniforms)
+
+    # generate synthetic values
+    #--------------------------------------------------------------------------
+    def sample(self, num_val, rng):
+
+        """
+        sample(num_val, rng)
+
+        Draws the synthetic categories with the alias method: a random column of
+        the table is picked for each value, and the category or its alias is kept
+        depending on a uniform value. Columns and uniform values are drawn from
+        separate child streams, so that the first values do not depend on the
+        number of values drawn.
+
+        Keyword arguments:
+
+        num_val (int):            number of synthetic values to be generated
+        rng (np.random.Generator): random number generator
+
+        Returns:
+
+        synth_array (np.array): synthetic values
+
+        """
+        index_rng, keep_rng = rng.spawn(2)
+        index = index_rng.integers(0, self.values.size, num_val)
+        keep = keep_rng.random(num_val) < self.prob[index]
+
+        return self.values[np.where(keep, index, self.alias[index])]
+
+
+# define the class for managing the random streams of fitting and generation. All
+# streams are spawned from one seed, so that runs can be reproduced in parallel
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class RandomStreams:
+
+    """
+    RandomStreams(seed, block_size)
+
+    Seeding subsystem built on numpy SeedSequence. Each column gets its own fitting
+    stream, and the generated rows are split in fixed-size blocks, where each block
+    gets an independent stream per column (plus one for the copula). A stream only
+    depends on the seed, on the block number and on the column position, so that 
+    the synthetic table is identical for a given seed no matter how the rows are
+    chunked, how many workers are used or which process generates which rows. 
+
+    Keyword arguments:
+
+    seed (int):        seed for random number generation (new entropy if not given)
+    block_size (int):  number of rows of each block
+
+    """
+    fit_key = 0
+    sample_key = 1
+
+    def __init__(self, seed = None, block_size = 65536):
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.block_size = block_size
+
+    # random generators used to fit the column samplers
+    #--------------------------------------------------------------------------
+    def fit_rngs(self, num_streams):
+        sequence = np.random.SeedSequence(self.entropy, spawn_key = (self.fit_key,))
+
+        return [np.random.default_rng(s) for s in sequence.spawn(num_streams)]
+
+    # random generators of a block of rows
+    #--------------------------------------------------------------------------
+    def block_rngs(self, block, num_streams):
+        sequence = np.random.SeedSequence(self.entropy, spawn_key = (self.sample_key, block))
+
+        return [np.random.default_rng(s) for s in sequence.spawn(num_streams)]
+
+    # blocks covering a range of rows
+    #--------------------------------------------------------------------------
+    def blocks(self, start, stop):
+
+        """
+        blocks(start, stop)
+
+        Yields the blocks overlapping the rows from start (included) to stop
+        (excluded), together with the range of rows to keep within each block.
+
+        Keyword arguments:
+
+        start (int): index of the first row
+        stop (int):  index of the row after the last one
+
+        Returns:
+
+        blocks (generator): tuples of block number, first and last row in the block
+
+        """
+        for block in range(start // self.block_size, -(-stop // self.block_size)):
+            offset = block * self.block_size
+            yield block, max(start - offset, 0), min(stop - offset, self.block_size)
+
+
+# define the class that groups the fitted samplers of all columns of a table
+# and generates synthetic tables, either in one go or as a stream of chunks
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class TableSampler:
+
+    """
+    TableSampler(method, columns, samplers, source, correlation, dtypes)
+
+    Collection of fitted column samplers used to generate synthetic tables. Tables
+    can be generated at once or streamed as fixed-size row chunks, so that memory
+    is bounded by the chunk size no matter how many rows are requested. Rows are
+    generated in blocks with the random streams of RandomStreams, so that a seed
+    always gives the same table, whatever the chunk size or the range of rows 
+    generated by each process.
+
+    The fitted samplers only hold compact model data (sorted quantile tables,
+    distribution names and parameters, kernel bandwidth and support points), and
+    can be saved to disk to generate data without refitting the source file.
+
+    If a correlation matrix is given (Gaussian copula), the columns are not sampled
+    independently: correlated normal values are drawn for all columns at once, 
+    turned into uniform values with the normal CDF and mapped through the inverse
+    CDF (copula_quantile method) of each column sampler. Missing values are drawn
+    independently of the copula values.
+
+    If the dtypes of the original columns are given, synthetic columns are cast
+    back to them (integers are rounded, datetime columns are sampled as epoch 
+    nanoseconds and converted back to dates).
+
+    Keyword arguments:
+
+    method (str):            name of the generation method (CDF, TDF, KDE, COP)
+    columns (list):          names of the sampled columns
+    samplers (list):         fitted samplers, one per column
+    source (str):            name of the source dataset (optional)
+    correlation (np.array):  correlation matrix of the Gaussian copula (optional)
+    dtypes (dict):           dtypes of the original columns (optional)
+
+    """
+    version = 1
+
+    def __init__(self, method, columns, samplers, source = None, correlation = None,
+                 dtypes = None):
+        self.method = method
+        self.columns = list(columns)
+        self.samplers = list(samplers)
+        self.source = source
+        self.correlation = correlation
+        self.dtypes = dtypes or {}
+        self.factor = None
+
+    # save the fitted model to file
+    #--------------------------------------------------------------------------
+    def save(self, path):
+
+        """
+        save(path)
+
+        Serializes the fitted samplers to the given file path.
+
+        Keyword arguments:
+
+        path (str): path of the model file
+
+        Returns:
+
+        None
+
+        """
+        model = {'version' : self.version,
+                 'method' : self.method,
+                 'columns' : self.columns,
+                 'samplers' : self.samplers,
+                 'source' : self.source,
+                 'correlation' : self.correlation,
+                 'dtypes' : self.dtypes}
+        with open(path, 'wb') as file:
+            pickle.dump(model, file, protocol = pickle.HIGHEST_PROTOCOL)
+
+    # load a fitted model from file
+    #--------------------------------------------------------------------------
+    @classmethod
+    def load(cls, path):
+
+        """
+        load(path)
+
+        Loads fitted samplers previously saved with TableSampler.save.
+
+        Keyword arguments:
+
+        path (str): path of the model file
+
+        Returns:
+
+        table_sampler (TableSampler): fitted samplers of all columns
+
+        """
+        with open(path, 'rb') as file:
+            model = pickle.load(file)
+        if model.get('version') != cls.version:
+            raise ValueError('Unsupported model version: {}'.format(model.get('version')))
+
+        return cls(model['method'], model['columns'], model['samplers'], model['source'],
+                   model.get('correlation'), model.get('dtypes'))
+
+    # correlated uniform values of the Gaussian copula
+    #--------------------------------------------------------------------------
+    def copula_uniforms(self, num_val, rng):
+
+        """
+        copula_uniforms(num_val, rng)
+
+        Draws correlated standard normal values for all columns with one matrix
+        product (the Cholesky factor of the correlation matrix is computed once),
+        and maps them to uniform values with the normal CDF.
+
+        Keyword arguments:
+
+        num_val (int):               number of rows
+        rng (np.random.Generator):   random number generator
+
+        Returns:
+
+        uniforms (np.array): 2D array of correlated uniform values
+
+        """
+        from scipy.special import ndtr
+        if self.factor is None:
+            self.factor = np.linalg.cholesky(self.correlation)
+        normals = rng.standard_normal((num_val, len(self.samplers)))
+        uniforms = ndtr(normals @ self.factor.T)
+
+        return np.asfortranarray(uniforms)
+
+    # cast synthetic values to the dtype of the original column
+    #--------------------------------------------------------------------------
+    def restore_dtype(self, values, dtype):
+        if dtype is None:
+            return values
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            dates = pd.to_datetime(np.round(values), unit = 'ns', utc = True)
+            return dates.tz_convert(dtype.tz).astype(dtype)
+        numpy_dtype = dtype if isinstance(dtype, np.dtype) else getattr(dtype, 'numpy_dtype', None)
+        if numpy_dtype is not None and numpy_dtype.kind in 'iu' and values.dtype.kind == 'f':
+            # downcasted integer columns would wrap around out of their range
+            limits = np.iinfo(numpy_dtype)
+            values = np.clip(np.round(values), limits.min, limits.max)
+        if not isinstance(dtype, np.dtype):
+            return pd.array(values, dtype = dtype)
+        missing = pd.isna(values)
+        if dtype.kind == 'M':
+            return pd.to_datetime(np.round(values), unit = 'ns').astype(dtype)
+        if dtype.kind in 'iu' and missing.any():
+            name = dtype.name
+            nullable = 'UInt' + name[4:] if name.startswith('uint') else 'Int' + name[3:]
+            return pd.array(values, dtype = nullable)
+        if dtype.kind in 'iuf' or (dtype.kind == 'b' and not missing.any()):
+            return values.astype(dtype)
+
+        return values
+
+    # generate a block of synthetic rows
+    #--------------------------------------------------------------------------
+    def sample_block(self, num_val, rngs):
+
+        """
+        sample_block(num_val, rngs)
+
+        Generates a block of synthetic rows. Each column is sampled with its own 
+        random generator, while the copula values are drawn from the first one 
+        (the generators of the columns then only draw their missing values).
+
+        Keyword arguments:
+
+        num_val (int):  number of rows
+        rngs (list):    random generators (copula, then one for each column)
+
+        Returns:
+
+        fake_df (pd.dataframe): dataframe with synthetic data
+
+        """
+        if self.correlation is not None:
+            uniforms = self.copula_uniforms(num_val, rngs[0])
+        fake_columns = {}
+        for id, (col, sampler) in enumerate(zip(self.columns, self.samplers)):
+            if self.correlation is not None:
+                values = sampler.copula_quantile(uniforms[:, id], rngs[id + 1])
+            else:
+                values = sampler.sample(num_val, rngs[id + 1])
+            fake_columns[col] = self.restore_dtype(values, self.dtypes.get(col))
+        fake_df = pd.DataFrame(fake_columns, columns = self.columns)
+
+        return fake_df
+
+    # check whether the first rows of a block can be drawn on their own
+    #--------------------------------------------------------------------------
+    @property
+    def partial_draws(self):
+        if self.correlation is not None:
+            return True
+
+        return all(getattr(sampler, 'partial_draws', False) for sampler in self.samplers)
+
+    # generate the blocks of a range of synthetic rows
+    #--------------------------------------------------------------------------
+    def iter_blocks(self, start, stop, streams):
+
+        """
+        iter_blocks(start, stop, streams)
+
+        Yields the blocks of synthetic rows from start (included) to stop 
+        (excluded). If the first values drawn by all samplers (and by the copula)
+        do not depend on the number of values drawn, the block is only generated
+        up to the last row needed, otherwise the full block is generated and cut.
+
+        Keyword arguments:
+
+        start (int):              index of the first row
+        stop (int):               index of the row after the last one
+        streams (RandomStreams):  random streams of the synthetic table
+
+        Returns:
+
+        blocks (generator): dataframes with synthetic data
+
+        """
+        partial_draws = self.partial_draws
+        for block, first, last in streams.blocks(start, stop):
+            rngs = streams.block_rngs(block, len(self.columns) + 1)
+            num_val = last if partial_draws else streams.block_size
+            fake_df = self.sample_block(num_val, rngs)
+            if first > 0 or last < num_val:
+                fake_df = fake_df.iloc[first : last]
+            yield fake_df
+
+    # generate a range of synthetic rows
+    #--------------------------------------------------------------------------
+    def sample_rows(self, start, stop, seed = None):
+
+        """
+        sample_rows(start, stop, seed)
+
+        Generates the rows from start (included) to stop (excluded) of the synthetic
+        table of the given seed. Rows are identical to those of the same positions
+        generated with sample or stream, so that disjoint ranges can be generated by
+        different processes or machines.
+
+        Keyword arguments:
+
+        start (int):  index of the first row
+        stop (int):   index of the row after the last one
+        seed (int):   seed for random number generation (optional)
+
+        Returns:
+
+        fake_df (pd.dataframe): dataframe with synthetic data
+
+        """
+        streams = RandomStreams(seed)
+        blocks = list(self.iter_blocks(start, stop, streams))
+        if not blocks:
+            return self.sample_block(0, streams.block_rngs(0, len(self.columns) + 1))
+
+        return pd.concat(blocks, ignore_index = True)
+
+    # generate the full synthetic table
+    #--------------------------------------------------------------------------
+    def sample(self, num_val, seed = None):
+
+        """
+        sample(num_val, seed)
+
+        Generates the whole synthetic table in memory.
+
+        Keyword arguments:
+
+        num_val (int):  number of synthetic rows to be generated
+        seed (int):     seed for random number generation (optional)
+
+        Returns:
+
+        fake_df (pd.dataframe): dataframe with synthetic data
+
+        """
+        return self.sample_rows(0, num_val, seed)
+
+    # generate the synthetic table as a stream of chunks
+    #--------------------------------------------------------------------------
+    def stream(self, num_val, chunk_size, seed = None, start = 0):
+
+        """
+        stream(num_val, chunk_size, seed, start)
+
+        Yields the synthetic table as consecutive dataframes of chunk_size rows
+        (the last one can be shorter), holding at most one chunk and one block
+        of rows in memory. Rows are generated block by block, so that the table
+        does not depend on the chunk size.
+
+        Keyword arguments:
+
+        num_val (int):     number of synthetic rows to be generated
+        chunk_size (int):  maximum number of rows of each chunk
+        seed (int):        seed for random number generation (optional)
+        start (int):       index of the first row (to generate a range of rows)
+
+        Returns:
+
+        fake_df (generator): generator of dataframes with synthetic data
+
+        """
+        streams = RandomStreams(seed)
+        buffer, num_rows = [], 0
+        for fake_df in self.iter_blocks(start, start + num_val, streams):
+            buffer.append(fake_df)
+            num_rows += fake_df.shape[0]
+            while num_rows >= chunk_size:
+                fake_df = pd.concat(buffer, ignore_index = True) if len(buffer) > 1 else buffer[0]
+                yield fake_df.iloc[:chunk_size].reset_index(drop = True)
+                buffer = [fake_df.iloc[chunk_size:]]
+                num_rows -= chunk_size
+        if num_rows > 0:
+            yield pd.concat(buffer, ignore_index = True)
@@ -0,0 +1,949 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# import modules and classes
+#------------------------------------------------------------------------------
+from modules.components.sampler_classes import QuantileSketch
+
+
+# define the class for the numeric comparison of real and synthetic distributions.
+# It does not depend on plotting libraries, so it can be used in headless mode
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class DistributionStatistics:
+
+    """
+    DistributionStatistics()
+
+    Computes the statistics used to compare the distributions of real and synthetic
+    dataframes, column by column, using vectorized operations on sorted arrays.
+    Results are returned as tidy dataframes with one row per column.
+
+    """
+
+    # numeric columns shared by real and synthetic data
+    #--------------------------------------------------------------------------
+    def shared_columns(self, dataframe1, dataframe2):
+        numeric_columns = set(dataframe2.select_dtypes(include = np.number).columns)
+
+        return [c for c in dataframe1.select_dtypes(include = np.number).columns 
+                if c in numeric_columns]
+
+    # sort the columns of a dataframe, in blocks of columns
+    #--------------------------------------------------------------------------
+    def sorted_blocks(self, dataframe1, dataframe2, block_size = 64):
+        columns = self.shared_columns(dataframe1, dataframe2)
+        for start in range(0, len(columns), block_size):
+            block = columns[start : start + block_size]
+            real_array = np.asfortranarray(dataframe1[block].to_numpy(dtype = float))
+            fake_array = np.asfortranarray(dataframe2[block].to_numpy(dtype = float))
+            real_sorted = np.sort(real_array, axis = 0)
+            fake_sorted = np.sort(fake_array, axis = 0)
+            yield block, real_sorted, fake_sorted
+
+    # two-sample Kolmogorov-Smirnov statistic of sorted arrays
+    #--------------------------------------------------------------------------
+    def KS_distance(self, real_sorted, fake_sorted):
+
+        """
+        KS_distance(real_sorted, fake_sorted)
+
+        Computes the exact two-sample KS statistic as the largest distance between
+        the empirical CDFs, evaluated at every value of both samples with
+        searchsorted. Missing values must be removed beforehand.
+
+        Keyword arguments:
+
+        real_sorted (np.array): sorted values of the real data series
+        fake_sorted (np.array): sorted values of the synthetic data series
+
+        Returns:
+
+        statistic (float): KS statistic
+
+        """
+        data_all = np.concatenate([real_sorted, fake_sorted])
+        real_cdf = np.searchsorted(real_sorted, data_all, side = 'right')/real_sorted.size
+        fake_cdf = np.searchsorted(fake_sorted, data_all, side = 'right')/fake_sorted.size
+
+        return float(np.max(np.abs(real_cdf - fake_cdf)))
+
+    # KS statistics and p values of all columns
+    #--------------------------------------------------------------------------
+    def KS_statistics(self, dataframe1, dataframe2, alpha = 0.05):
+
+        """
+        KS_statistics(dataframe1, dataframe2, alpha)
+
+        Computes the two-sample Kolmogorov-Smirnov statistic and the p value of
+        every column shared by the real and synthetic dataframes. Columns are
+        sorted in blocks with a single call, the statistic is computed exactly
+        on the sorted samples, and the p values are obtained for all columns at
+        once from the Smirnov distribution (asymptotic two-sided test).
+
+        Keyword arguments:
+
+        dataframe1 (pd.dataframe):  dataframe of real numbers (original dataframe)
+        dataframe2 (pd.dataframe):  dataframe of fake numbers (synthetic dataframe)
+        alpha (float):              significance level of the test
+
+        Returns:
+
+        KS_table (pd.dataframe): column, D, p and verdict of each column
+
+        """
+        from scipy.stats import kstwo
+        columns, statistics, sizes = [], [], []
+        for block, real_sorted, fake_sorted in self.sorted_blocks(dataframe1, dataframe2):
+            for id, col in enumerate(block):
+                real_array = real_sorted[:, id]
+                fake_array = fake_sorted[:, id]
+                real_array = real_array[~np.isnan(real_array)]
+                fake_array = fake_array[~np.isnan(fake_array)]
+                columns.append(col)
+                sizes.append((real_array.size, fake_array.size))
+                if real_array.size == 0 or fake_array.size == 0:
+                    statistics.append(np.nan)
+                else:
+                    statistics.append(self.KS_distance(real_array, fake_array))
+        statistics = np.array(statistics, dtype = float)
+        sizes = np.array(sizes, dtype = float).reshape(-1, 2)
+        effective_size = np.round(np.prod(sizes, axis = 1)/np.maximum(sizes.sum(axis = 1), 1))
+        p_values = np.clip(kstwo.sf(statistics, np.maximum(effective_size, 1)), 0, 1)
+        verdicts = np.where(p_values >= alpha, 'Generated distribution is equal',
+                            'Generated distribution is not equal')
+        verdicts = np.where(np.isnan(statistics), 'Not available', verdicts)
+        KS_table = pd.DataFrame({'column' : columns, 'D' : statistics,
+                                 'p' : p_values, 'verdict' : verdicts})
+
+        return KS_table
+
+
+    # shared histogram bin edges of real and synthetic data
+    #--------------------------------------------------------------------------
+    def shared_bin_edges(self, real_array, fake_array, bins = 'auto', max_bins = 1000):
+
+        """
+        shared_bin_edges(real_array, fake_array, bins, max_bins)
+
+        Computes one set of equally spaced bin edges covering the values of both
+        the real and the synthetic data series. The bin width is obtained from the
+        real data (numpy binning rules, or a fixed number of bins).
+
+        Keyword arguments:
+
+        real_array (np.array):  real values (without missing values)
+        fake_array (np.array):  synthetic values (without missing values)
+        bins (int or str):      number of bins or numpy binning rule
+        max_bins (int):         maximum number of bins
+
+        Returns:
+
+        edges (np.array): bin edges
+
+        """
+        values = [a for a in (real_array, fake_array) if a.size > 0]
+        if not values:
+            return np.array([-0.5, 0.5])
+        low = min(a.min() for a in values)
+        high = max(a.max() for a in values)
+        if not high > low:
+            return np.array([low - 0.5, low + 0.5])
+        reference = real_array if real_array.size > 0 else fake_array
+        edges = np.histogram_bin_edges(reference, bins, range = (low, high))
+        if edges.size - 1 > max_bins:
+            edges = np.linspace(low, high, max_bins + 1)
+
+        return edges
+
+    # histogram counts of a block of columns in a single bincount pass
+    #--------------------------------------------------------------------------
+    def binned_counts(self, array, edges_list):
+
+        """
+        binned_counts(array, edges_list)
+
+        Counts the values of all columns of a block on their (equally spaced) bin
+        edges at once. Bin indexes are computed arithmetically, shifted by the
+        offset of each column and counted with a single bincount call. Values
+        outside the edges are counted in the first or last bin, and missing
+        values are ignored.
+
+        Keyword arguments:
+
+        array (np.array):   2D array of values (one column per series)
+        edges_list (list):  bin edges of each column
+
+        Returns:
+
+        counts (list): histogram counts of each column
+
+        """
+        num_bins = np.array([e.size - 1 for e in edges_list])
+        lows = np.array([e[0] for e in edges_list])
+        widths = np.array([(e[-1] - e[0])/(e.size - 1) for e in edges_list])
+        offsets = np.concatenate([[0], np.cumsum(num_bins)[:-1]])
+        index = np.floor((array - lows)/widths)
+        valid = ~np.isnan(index)
+        index = np.clip(index, 0, num_bins - 1) + offsets
+        counts = np.bincount(index[valid].astype(np.int64), minlength = num_bins.sum())
+
+        return np.split(counts.astype(float), offsets[1:])
+
+    # histogram counts of real and synthetic data on shared bins
+    #--------------------------------------------------------------------------
+    def histogram_counts(self, dataframe1, dataframe2, bins = 'auto', block_size = 64):
+
+        """
+        histogram_counts(dataframe1, dataframe2, bins, block_size)
+
+        Computes the bin edges shared by the real and synthetic data of each column,
+        and counts both dataframes on them in vectorized passes (blocks of columns).
+
+        Keyword arguments:
+
+        dataframe1 (pd.dataframe):  dataframe of real numbers (original dataframe)
+        dataframe2 (pd.dataframe):  dataframe of fake numbers (synthetic dataframe)
+        bins (int or str):          number of bins or numpy binning rule
+        block_size (int):           number of columns counted at once
+
+        Returns:
+
+        histograms (dict): edges, real counts and synthetic counts of each column
+
+        """
+        columns = self.shared_columns(dataframe1, dataframe2)
+        histograms = {}
+        for start in range(0, len(columns), block_size):
+            block = columns[start : start + block_size]
+            real_array = dataframe1[block].to_numpy(dtype = float)
+            fake_array = dataframe2[block].to_numpy(dtype = float)
+            edges_list = []
+            for id in range(len(block)):
+                real_values = real_array[:, id]
+                fake_values = fake_array[:, id]
+                edges_list.append(self.shared_bin_edges(real_values[~np.isnan(real_values)],
+                                                        fake_values[~np.isnan(fake_values)], bins))
+            real_counts = self.binned_counts(real_array, edges_list)
+            fake_counts = self.binned_counts(fake_array, edges_list)
+            for col, edges, r, f in zip(block, edges_list, real_counts, fake_counts):
+                histograms[col] = (edges, r, f)
+
+        return histograms
+
+    # distances between the histograms of real and synthetic data
+    #--------------------------------------------------------------------------
+    def histogram_distances(self, histograms):
+
+        """
+        histogram_distances(histograms)
+
+        Computes the Jensen-Shannon distance (base 2, between 0 and 1), the
+        Wasserstein distance (area between the binned CDFs) and the total variation
+        distance between the real and synthetic histograms of each column.
+
+        Keyword arguments:
+
+        histograms (dict): edges, real counts and synthetic counts of each column
+
+        Returns:
+
+        distance_table (pd.dataframe): column, JS, Wasserstein and TV distances
+
+        """
+        rows = []
+        for col, (edges, real_counts, fake_counts) in histograms.items():
+            if real_counts.sum() == 0 or fake_counts.sum() == 0:
+                rows.append((col, np.nan, np.nan, np.nan))
+                continue
+            p = real_counts/real_counts.sum()
+            q = fake_counts/fake_counts.sum()
+            m = 0.5 * (p + q)
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                kl_p = np.where(p > 0, p * np.log2(p/m), 0.0).sum()
+                kl_q = np.where(q > 0, q * np.log2(q/m), 0.0).sum()
+            JS = np.sqrt(max(0.5 * (kl_p + kl_q), 0.0))
+            wasserstein = np.sum(np.abs(np.cumsum(p) - np.cumsum(q))[:-1] * np.diff(edges)[:-1])
+            TV = 0.5 * np.abs(p - q).sum()
+            rows.append((col, JS, wasserstein, TV))
+        distance_table = pd.DataFrame(rows, columns = ['column', 'JS', 'wasserstein', 'TV'])
+
+        return distance_table
+
+    # histogram comparison of all columns
+    #--------------------------------------------------------------------------
+    def histogram_comparison(self, dataframe1, dataframe2, bins = 'auto'):
+
+        """
+        histogram_comparison(dataframe1, dataframe2, bins)
+
+        Counts real and synthetic data on shared bins and computes the histogram
+        distances of every column.
+
+        Keyword arguments:
+
+        dataframe1 (pd.dataframe):  dataframe of real numbers (original dataframe)
+        dataframe2 (pd.dataframe):  dataframe of fake numbers (synthetic dataframe)
+        bins (int or str):          number of bins or numpy binning rule
+
+        Returns:
+
+        distance_table (pd.dataframe): column, JS, Wasserstein and TV distances
+        histograms (dict):             edges, real counts and synthetic counts
+
+        """
+        histograms = self.histogram_counts(dataframe1, dataframe2, bins)
+        distance_table = self.histogram_distances(histograms)
+
+        return distance_table, histograms
+
+# define the class for streaming summaries of a table. Statistics are updated one
+# chunk at a time, so that files larger than memory can be summarized
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class StreamingSummary:
+
+    """
+    StreamingSummary(columns, bin_edges, error, reservoir_size, seed)
+
+    Streaming summary of the columns of a table. Each chunk updates the mean and
+    variance of every column (Welford/Chan updates, vectorized over columns), a
+    quantile sketch per column, the histogram counts on the given bin edges, and
+    optionally a uniform reservoir sample of rows for the pairwise metrics. Memory
+    usage does not depend on the number of rows, and summaries can be merged.
+
+    Keyword arguments:
+
+    columns (list):        names of the summarized columns
+    bin_edges (dict):      histogram bin edges of each column (optional)
+    error (float):         maximum quantile error of the sketches
+    reservoir_size (int):  number of rows of the reservoir sample (0 to disable)
+    seed (int):            seed for the reservoir sampling (optional)
+
+    """
+    def __init__(self, columns, bin_edges = None, error = 0.005, reservoir_size = 0,
+                 seed = None):
+        self.columns = list(columns)
+        num_cols = len(self.columns)
+        self.count = np.zeros(num_cols)
+        self.nulls = np.zeros(num_cols)
+        self.mean = np.zeros(num_cols)
+        self.M2 = np.zeros(num_cols)
+        self.sketches = [QuantileSketch(error) for col in self.columns]
+        self.bin_edges = bin_edges
+        self.hist_counts = None
+        if bin_edges is not None:
+            self.hist_counts = {c : np.zeros(len(bin_edges[c]) - 1) for c in self.columns}
+        self.reservoir_size = reservoir_size
+        self.reservoir = np.empty((0, num_cols))
+        self.reservoir_keys = np.empty(0)
+        self.rng = np.random.default_rng(seed)
+
+    # combine mean and variance of two groups (Chan et al.)
+    #--------------------------------------------------------------------------
+    def combine_moments(self, count, mean, M2):
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            weight = np.where(total > 0, count/total, 0.0)
+        self.mean = self.mean + delta * weight
+        self.M2 = self.M2 + M2 + delta**2 * self.count * weight
+        self.count = total
+
+    # keep the rows with the smallest random keys
+    #--------------------------------------------------------------------------
+    def combine_reservoir(self, rows, keys):
+        rows = np.concatenate([self.reservoir, rows])
+        keys = np.concatenate([self.reservoir_keys, keys])
+        if keys.size > self.reservoir_size:
+            keep = np.argpartition(keys, self.reservoir_size - 1)[:self.reservoir_size]
+            rows, keys = rows[keep], keys[keep]
+        self.reservoir, self.reservoir_keys = rows, keys
+
+    # update the summary with a chunk of data
+    #--------------------------------------------------------------------------
+    def update(self, chunk):
+
+        """
+        update(chunk)
+
+        Updates all statistics with a chunk of rows.
+
+        Keyword arguments:
+
+        chunk (pd.dataframe): chunk of the summarized table
+
+        Returns:
+
+        self (StreamingSummary): updated summary
+
+        """
+        array = np.asfortranarray(chunk[self.columns].to_numpy(dtype = float))
+        if array.shape[0] == 0:
+            return self
+        valid = ~np.isnan(array)
+        count = valid.sum(axis = 0).astype(float)
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            mean = np.where(count > 0, np.nansum(array, axis = 0)/count, 0.0)
+        M2 = np.nansum((array - mean)**2, axis = 0)
+        self.combine_moments(count, mean, M2)
+        self.nulls += array.shape[0] - count
+        for id, col in enumerate(self.columns):
+            values = array[valid[:, id], id]
+            self.sketches[id].update(values)
+            if self.hist_counts is not None:
+                edges = self.bin_edges[col]
+                values = np.clip(values, edges[0], edges[-1])
+                self.hist_counts[col] += np.histogram(values, edges)[0]
+        if self.reservoir_size > 0:
+            self.combine_reservoir(array, self.rng.random(array.shape[0]))
+
+        return self
+
+    # merge with the summary of another shard
+    #--------------------------------------------------------------------------
+    def merge(self, other):
+        self.combine_moments(other.count, other.mean, other.M2)
+        self.nulls += other.nulls
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        if self.hist_counts is not None:
+            for col in self.columns:
+                self.hist_counts[col] += other.hist_counts[col]
+        if self.reservoir_size > 0:
+            self.combine_reservoir(other.reservoir, other.reservoir_keys)
+
+        return self
+
+    # standard deviation of each column
+    #--------------------------------------------------------------------------
+    def std(self):
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            return np.sqrt(np.where(self.count > 0, self.M2/self.count, np.nan))
+
+    # summary table of the columns
+    #--------------------------------------------------------------------------
+    def table(self, quantiles = (0.05, 0.25, 0.5, 0.75, 0.95)):
+        summary = pd.DataFrame({'column' : self.columns, 'count' : self.count,
+                                'nulls' : self.nulls, 'mean' : self.mean,
+                                'std' : self.std()})
+        for q in quantiles:
+            summary['q{:g}'.format(q * 100)] = [float(s.quantile(q)) for s in self.sketches]
+
+        return summary
+
+
+# define the class for the validation of synthetic data read from disk in chunks,
+# with memory bounded by the chunk size and the reservoir size
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class StreamingValidator:
+
+    """
+    StreamingValidator(bins, chunk_size, error, reservoir_size, seed)
+
+    Compares real and synthetic data using streaming summaries, so that synthetic
+    outputs larger than memory can be validated. Real and synthetic data can be
+    given either as dataframes or as file paths (read in chunks). Histograms are
+    counted on bin edges shared by real and synthetic data, and pairwise metrics
+    are computed on reservoir samples of rows.
+
+    Keyword arguments:
+
+    bins (int):            maximum number of histogram bins per column
+    chunk_size (int):      number of rows read at once
+    error (float):         maximum quantile error of the sketches
+    reservoir_size (int):  rows of the reservoir samples (0 to skip pairwise metrics)
+    seed (int):            seed for the reservoir sampling (optional)
+
+    """
+    def __init__(self, bins = 100, chunk_size = 100000, error = 0.005, reservoir_size = 0,
+                 seed = None):
+        self.bins = bins
+        self.chunk_size = chunk_size
+        self.error = error
+        self.reservoir_size = reservoir_size
+        self.seed = seed
+
+    # iterate over the chunks of a dataframe or a file
+    #--------------------------------------------------------------------------
+    def iter_chunks(self, source, columns = None):
+        if isinstance(source, pd.DataFrame):
+            for start in range(0, source.shape[0], self.chunk_size):
+                yield source.iloc[start : start + self.chunk_size]
+        else:
+            from modules.components.data_classes import DataLoader
+            for chunk in DataLoader(source).iter_chunks(self.chunk_size, columns):
+                yield chunk
+
+    # numeric columns of a dataframe or a file
+    #--------------------------------------------------------------------------
+    def numeric_columns(self, source):
+        if isinstance(source, pd.DataFrame):
+            return list(source.select_dtypes(include = np.number).columns)
+        from modules.components.data_classes import DataLoader
+
+        return DataLoader(source).numeric_columns()
+
+    # summarize a dataframe or a file
+    #--------------------------------------------------------------------------
+    def summarize(self, source, columns, bin_edges = None, reservoir_size = 0):
+        summary = StreamingSummary(columns, bin_edges, self.error, reservoir_size, self.seed)
+        for chunk in self.iter_chunks(source, columns):
+            summary.update(chunk)
+
+        return summary
+
+    # shared histogram bin edges from the summary of the real data
+    #--------------------------------------------------------------------------
+    def shared_bin_edges(self, summary):
+
+        """
+        shared_bin_edges(summary)
+
+        Computes the histogram bin edges of each column from the streaming summary
+        of the real data, using the Freedman-Diaconis rule on the sketch quantiles
+        (limited to the given maximum number of bins).
+
+        Keyword arguments:
+
+        summary (StreamingSummary): summary of the real data
+
+        Returns:
+
+        bin_edges (dict): bin edges of each column
+
+        """
+        bin_edges = {}
+        for col, sketch in zip(summary.columns, summary.sketches):
+            low, high = sketch.min, sketch.max
+            if sketch.count == 0 or not high > low:
+                center = 0.0 if sketch.count == 0 else low
+                bin_edges[col] = np.array([center - 0.5, center + 0.5])
+                continue
+            q25, q75 = sketch.quantile(np.array([0.25, 0.75]))
+            width = 2 * (q75 - q25) * sketch.count**(-1/3)
+            num_bins = self.bins if width <= 0 else int(np.ceil((high - low)/width))
+            bin_edges[col] = np.linspace(low, high, min(max(num_bins, 1), self.bins) + 1)
+
+        return bin_edges
+
+    # validate synthetic data against real data
+    #--------------------------------------------------------------------------
+    def validate(self, real_source, synthetic_source):
+
+        """
+        validate(real_source, synthetic_source)
+
+        Summarizes the real and synthetic data in chunks and compares them column
+        by column (mean, standard deviation, quantiles, histogram counts on shared
+        bins and the Jensen-Shannon, Wasserstein and total variation distances of
+        the histograms). If a reservoir size is given, the Spearman correlation
+        matrices of the reservoir samples are compared as well.
+
+        Keyword arguments:
+
+        real_source (pd.dataframe or str):      real data or path of the real data
+        synthetic_source (pd.dataframe or str): synthetic data or path of the file
+
+        Returns:
+
+        results (dict): comparison table, histograms and correlation matrices
+
+        """
+        real_columns = self.numeric_columns(real_source)
+        synthetic_columns = self.numeric_columns(synthetic_source)
+        columns = [c for c in real_columns if c in synthetic_columns]
+        bin_edges = self.shared_bin_edges(self.summarize(real_source, columns))
+        real_summary = self.summarize(real_source, columns, bin_edges, self.reservoir_size)
+        fake_summary = self.summarize(synthetic_source, columns, bin_edges,
+                                      self.reservoir_size)
+        real_table = real_summary.table().set_index('column')
+        fake_table = fake_summary.table().set_index('column')
+        comparison = real_table.join(fake_table, lsuffix = '_real', rsuffix = '_synthetic')
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            comparison['mean_diff_%'] = (np.abs(comparison['mean_real'] - comparison['mean_synthetic'])/
+                                         np.abs(comparison['mean_real']) * 100)
+            comparison['std_diff_%'] = (np.abs(comparison['std_real'] - comparison['std_synthetic'])/
+                                        comparison['std_real'] * 100)
+        histograms = {c : (bin_edges[c], real_summary.hist_counts[c], fake_summary.hist_counts[c])
+                      for c in columns}
+        distance_table = DistributionStatistics().histogram_distances(histograms)
+        comparison = comparison.join(distance_table.set_index('column'))
+        correlations = None
+        if self.reservoir_size > 0:
+            real_sample = pd.DataFrame(real_summary.reservoir, columns = columns)
+            fake_sample = pd.DataFrame(fake_summary.reservoir, columns = columns)
+            engine = RankCorrelation()
+            correlations = (engine.Spearman(real_sample), engine.Spearman(fake_sample))
+        results = {'columns' : comparison.reset_index(), 'histograms' : histograms,
+                   'correlations' : correlations}
+
+        return results
+
+
+# define the class for rank correlations of wide tables. Ranks are computed once
+# per table and cached, so that repeated comparisons do not rank the data again
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class RankCorrelation:
+
+    """
+    RankCorrelation(workers, cache_size)
+
+    Computes the Spearman and Kendall correlation matrices of the numeric columns
+    of a dataframe. Each column is ranked once and the ranks are cached by table
+    fingerprint. Spearman correlations are obtained with a single matrix product
+    of the centered ranks, while Kendall tau-b correlations are computed for each
+    pair of columns with the O(n log n) algorithm of Knight (merge sort based, as
+    implemented by scipy) over a pool of worker processes.
+
+    Keyword arguments:
+
+    workers (int):     number of worker processes used for Kendall correlations
+    cache_size (int):  number of ranked tables kept in memory
+
+    """
+    def __init__(self, workers = 1, cache_size = 4):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.cache = {}
+
+    # fingerprint of the numeric data of a dataframe
+    #--------------------------------------------------------------------------
+    def fingerprint(self, dataframe):
+        row_hashes = pd.util.hash_pandas_object(dataframe, index = False).to_numpy()
+        data_hash = hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+        return (dataframe.shape, tuple(str(c) for c in dataframe.columns), data_hash)
+
+    # rank the numeric columns of a dataframe (cached)
+    #--------------------------------------------------------------------------
+    def ranks(self, dataframe):
+
+        """
+        ranks(dataframe)
+
+        Ranks the numeric columns of the dataframe (average ranks for ties, missing
+        values are kept as NaN). Results are cached by table fingerprint.
+
+        Keyword arguments:
+
+        dataframe (pd.dataframe): target dataframe
+
+        Returns:
+
+        columns (list):    names of the ranked columns
+        ranks (np.array):  2D array of ranks (one column per series)
+
+        """
+        numeric = dataframe.select_dtypes(include = np.number)
+        key = self.fingerprint(numeric)
+        if key in self.cache:
+            return self.cache[key]
+        from scipy.stats import rankdata
+        array = numeric.to_numpy(dtype = float)
+        ranks = np.asfortranarray(rankdata(array, axis = 0, nan_policy = 'omit'))
+        if len(self.cache) >= self.cache_size:
+            self.cache.pop(next(iter(self.cache)))
+        self.cache[key] = (list(numeric.columns), ranks)
+
+        return self.cache[key]
+
+    # Pearson correlations between the columns of two arrays of ranks
+    #--------------------------------------------------------------------------
+    def rank_correlation(self, left, right):
+        num_rows = left.shape[0]
+        if num_rows < 2:
+            return np.full((left.shape[1], right.shape[1]), np.nan)
+        left_means, right_means = left.mean(axis = 0), right.mean(axis = 0)
+        covariance = left.T @ right - num_rows * np.outer(left_means, right_means)
+        left_norms = np.sqrt(np.einsum('ij,ij->j', left, left) - num_rows * left_means**2)
+        right_norms = np.sqrt(np.einsum('ij,ij->j', right, right) - num_rows * right_means**2)
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            matrix = covariance/np.outer(left_norms, right_norms)
+
+        return np.clip(matrix, -1, 1)
+
+    # ranks of the cached ranks restricted to a subset of rows
+    #--------------------------------------------------------------------------
+    def subset_ranks(self, ranks, rows):
+
+        """
+        subset_ranks(ranks, rows)
+
+        Ranks again the cached ranks of some columns within a subset of rows.
+        Average ranks are multiples of 1/2, so the new ranks are obtained by 
+        counting the values of each column (without sorting them again).
+
+        Keyword arguments:
+
+        ranks (np.array):  2D array of cached ranks
+        rows (np.array):   boolean mask of the rows to be kept
+
+        Returns:
+
+        subset (np.array): 2D array of ranks within the subset of rows
+
+        """
+        keys = (2 * ranks[rows]).astype(np.int64)
+        subset = np.empty(keys.shape)
+        for id in range(keys.shape[1]):
+            counts = np.bincount(keys[:, id])
+            below = np.cumsum(counts) - counts
+            subset[:, id] = below[keys[:, id]] + (counts[keys[:, id]] + 1)/2
+
+        return subset
+
+    # Spearman correlation matrix
+    #--------------------------------------------------------------------------
+    def Spearman(self, dataframe):
+
+        """
+        Spearman(dataframe)
+
+        Computes the Spearman correlation matrix as the Pearson correlation of the
+        cached ranks, using one matrix product (without centered copies of the 
+        ranks). With missing values, correlations are computed pairwise on the
+        complete observations: columns with the same missing values are grouped,
+        as their cached ranks are already the ranks of their complete observations,
+        while the ranks of two different groups are recomputed by counting on the
+        rows that are complete in both, before the matrix product of the groups.
+
+        Keyword arguments:
+
+        dataframe (pd.dataframe): target dataframe
+
+        Returns:
+
+        df_corr (pd.dataframe): correlation matrix in dataframe form
+
+        """
+        columns, ranks = self.ranks(dataframe)
+        valid = ~np.isnan(ranks)
+        patterns = {}
+        for id in range(ranks.shape[1]):
+            patterns.setdefault(valid[:, id].tobytes(), []).append(id)
+        groups = list(patterns.values())
+        matrix = np.full((ranks.shape[1], ranks.shape[1]), np.nan)
+        for number, group in enumerate(groups):
+            rows = valid[:, group[0]]
+            group_ranks = ranks[:, group] if rows.all() else ranks[rows][:, group]
+            matrix[np.ix_(group, group)] = self.rank_correlation(group_ranks, group_ranks)
+            for other in groups[number + 1:]:
+                complete = rows & valid[:, other[0]]
+                left = self.subset_ranks(ranks[:, group], complete)
+                right = self.subset_ranks(ranks[:, other], complete)
+                block = self.rank_correlation(left, right)
+                matrix[np.ix_(group, other)] = block
+                matrix[np.ix_(other, group)] = block.T
+        highest = np.where(valid, ranks, 0).max(axis = 0)
+        lowest = np.where(valid, ranks, np.inf).min(axis = 0)
+        np.fill_diagonal(matrix, np.where(highest > lowest, 1.0, np.nan))
+        df_corr = pd.DataFrame(matrix, index = columns, columns = columns)
+
+        return df_corr
+
+    # Kendall tau-b of the pairs of two groups of columns (worker task, static so
+    # that only the ranks of the group are sent to the worker, without the cache)
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def Kendall_pairs(ranks, pairs):
+        from scipy.stats import kendalltau
+        values = []
+        for i, j in pairs:
+            values.append(kendalltau(ranks[:, i], ranks[:, j], nan_policy = 'omit')[0])
+
+        return values
+
+    # Kendall correlation matrix
+    #--------------------------------------------------------------------------
+    def Kendall(self, dataframe, pbar = None):
+
+        """
+        Kendall(dataframe, pbar)
+
+        Computes the Kendall tau-b correlation matrix from the cached ranks. Pairs
+        of columns are grouped by blocks of columns, and each group of pairs is
+        computed by a worker process that only receives the ranks of its columns.
+
+        Keyword arguments:
+
+        dataframe (pd.dataframe):  target dataframe
+        pbar (sg.ProgressBar):     progress bar to be updated (optional)
+
+        Returns:
+
+        df_corr (pd.dataframe): correlation matrix in dataframe form
+
+        """
+        columns, ranks = self.ranks(dataframe)
+        num_cols = len(columns)
+        matrix = np.eye(num_cols)
+        num_blocks = max(min(num_cols, int(np.ceil(np.sqrt(2 * self.workers))) + 1), 1)
+        blocks = [b for b in np.array_split(np.arange(num_cols), num_blocks) if b.size > 0]
+        tasks = []
+        for a in range(len(blocks)):
+            for b in range(a, len(blocks)):
+                block = np.union1d(blocks[a], blocks[b])
+                pairs = [(i, j) for i in blocks[a] for j in blocks[b] if i < j]
+                if pairs:
+                    tasks.append((block, pairs))
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers = self.workers) as executor:
+                futures = {}
+                for block, pairs in tasks:
+                    position = {c : id for id, c in enumerate(block)}
+                    local_pairs = [(position[i], position[j]) for i, j in pairs]
+                    future = executor.submit(RankCorrelation.Kendall_pairs, ranks[:, block],
+                                             local_pairs)
+                    futures[future] = pairs
+                for done, future in enumerate(as_completed(futures)):
+                    for (i, j), value in zip(futures[future], future.result()):
+                        matrix[i, j] = matrix[j, i] = value
+                    if pbar is not None:
+                        pbar.update(done + 1, max = len(tasks))
+        else:
+            for done, (block, pairs) in enumerate(tasks):
+                for (i, j), value in zip(pairs, self.Kendall_pairs(ranks, pairs)):
+                    matrix[i, j] = matrix[j, i] = value
+                if pbar is not None:
+                    pbar.update(done + 1, max = len(tasks))
+        df_corr = pd.DataFrame(matrix, index = columns, columns = columns)
+
+        return df_corr
+
+
+# define the class for the comparison of real and synthetic correlation matrices.
+# Pairs are taken from the upper triangle, without pandas reshaping
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class CorrelationDrift:
+
+    """
+    CorrelationDrift(matrix_real, matrix_fake)
+
+    Compares the correlation matrices of real and synthetic data. The coefficients
+    of each pair of columns are extracted once from the upper triangle of both
+    matrices, and the drift (synthetic minus real coefficient) is used to rank
+    the pairs, summarize the differences and filter the pairs by threshold.
+
+    Keyword arguments:
+
+    matrix_real (pd.dataframe): real data correlation matrix
+    matrix_fake (pd.dataframe): fake data correlation matrix
+
+    """
+    def __init__(self, matrix_real, matrix_fake):
+        columns = [c for c in matrix_real.columns if c in matrix_fake.columns]
+        self.columns = np.array(columns, dtype = object)
+        self.rows, self.cols = np.triu_indices(len(columns), k = 1)
+        real_array = matrix_real.loc[columns, columns].to_numpy(dtype = float)
+        fake_array = matrix_fake.loc[columns, columns].to_numpy(dtype = float)
+        self.real = real_array[self.rows, self.cols]
+        self.fake = fake_array[self.rows, self.cols]
+        self.drift = self.fake - self.real
+        self.abs_drift = np.where(np.isnan(self.drift), -np.inf, np.abs(self.drift))
+
+    # table of the selected pairs
+    #--------------------------------------------------------------------------
+    def pairs(self, index):
+        pair_table = pd.DataFrame({'column_1' : self.columns[self.rows[index]],
+                                   'column_2' : self.columns[self.cols[index]],
+                                   'real' : self.real[index], 'synthetic' : self.fake[index],
+                                   'drift' : self.drift[index]})
+
+        return pair_table
+
+    # pairs with the largest absolute drift
+    #--------------------------------------------------------------------------
+    def top_pairs(self, k = 10):
+
+        """
+        top_pairs(k)
+
+        Selects the k pairs with the largest absolute drift (partial selection,
+        only the selected pairs are sorted).
+
+        Keyword arguments:
+
+        k (int): number of pairs
+
+        Returns:
+
+        pair_table (pd.dataframe): columns, real and synthetic coefficients and drift
+
+        """
+        k = min(k, self.drift.size)
+        if k == 0:
+            return self.pairs(np.array([], dtype = int))
+        index = np.argpartition(-self.abs_drift, k - 1)[:k]
+        index = index[np.argsort(-self.abs_drift[index], kind = 'stable')]
+
+        return self.pairs(index)
+
+    # pairs with absolute drift above the threshold
+    #--------------------------------------------------------------------------
+    def threshold_pairs(self, threshold):
+
+        """
+        threshold_pairs(threshold)
+
+        Selects the pairs whose absolute drift is equal to or larger than the
+        threshold, sorted by decreasing absolute drift.
+
+        Keyword arguments:
+
+        threshold (float): threshold value of the absolute drift
+
+        Returns:
+
+        pair_table (pd.dataframe): columns, real and synthetic coefficients and drift
+
+        """
+        index = np.flatnonzero(self.abs_drift >= threshold)
+        index = index[np.argsort(-self.abs_drift[index], kind = 'stable')]
+
+        return self.pairs(index)
+
+    # summary statistics of the drift
+    #--------------------------------------------------------------------------
+    def summary(self, thresholds = (0.05, 0.1, 0.2)):
+
+        """
+        summary(thresholds)
+
+        Summarizes the drift over all pairs of columns: mean and median absolute
+        drift, root mean square and maximum drift, number of pairs whose sign is
+        flipped and fraction of pairs above each threshold.
+
+        Keyword arguments:
+
+        thresholds (tuple): thresholds of the absolute drift
+
+        Returns:
+
+        summary (dict): drift statistics
+
+        """
+        valid = np.isfinite(self.drift)
+        drift = np.abs(self.drift[valid])
+        summary = {'pairs' : int(self.drift.size), 'valid_pairs' : int(valid.sum())}
+        if drift.size == 0:
+            return summary
+        summary.update({'mean_abs_drift' : float(drift.mean()),
+                        'median_abs_drift' : float(np.median(drift)),
+                        'rms_drift' : float(np.sqrt(np.mean(drift**2))),
+                        'max_abs_drift' : float(drift.max()),
+                        'sign_flips' : int(np.sum(np.sign(self.real[valid]) * np.sign(self.fake[valid]) < 0))})
+        for threshold in thresholds:
+            summary['fraction_above_{:g}'.format(threshold)] = float(np.mean(drift >= threshold))
+
+        return summary
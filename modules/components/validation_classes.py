@@ -1,8 +1,12 @@
-from tqdm import tqdm
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
-from scipy.stats import ks_2samp
+
+# import modules and classes
+#------------------------------------------------------------------------------
+from modules.components.statistics_classes import DistributionStatistics, RankCorrelation, CorrelationDrift
 
 
 # define class for trained model validation and data comparison
@@ -25,118 +29,117 @@ class DataValidator:
     
     # comparison of histograms (distributions) by superimposing plots
     #-------------------------------------------------------------------------- 
-    def hist_comparison(self, dataframe1, dataframe2, bins):
+    def hist_comparison(self, dataframe1, dataframe2, bins, column = None):
         
         """ 
-        hist_comparison(dataframe1, dataframe2, bins, path)
+        hist_comparison(dataframe1, dataframe2, bins, column)
         
-        Plots the histograms of both the real and fake dataframe, column by column,
-        using a mild transparency to superimpose them in a clear fashion. Standard
-        deviation and mean differences are printed into a text box inside the plot 
+        Counts the real and fake data of every column on shared bin edges and 
+        computes the Jensen-Shannon, Wasserstein and total variation distances 
+        (see DistributionStatistics.histogram_comparison), which are stored in 
+        self.hist_table together with the counts (self.histograms). The histograms
+        of the selected column are plotted from the precomputed counts, using a 
+        mild transparency to superimpose them in a clear fashion. Standard 
+        deviation and mean differences and the distances are printed into a 
+        text box inside the plot 
         
         Keyword arguments:    
         dataframe1 (pd.dataframe):  dataframe of real numbers (original dataframe)
         dataframe2 (pd.dataframe):  dataframe of fake numbers (synthetic dataframe)
-        bins (int):                 number of histogram bins (int)
-        path (str):                 figures (.jpeg) folder path
+        bins (int or str):          number of histogram bins or numpy binning rule
+        column (str):               column to be plotted (first column if not given)
         
         Returns:
         
-        None
+        fig (Figure): histogram comparison of the selected column
         
         """
-        for (r, f) in tqdm(zip(dataframe1.columns, dataframe2.columns)):
-            r_arr = dataframe1[r].values
-            f_arr = dataframe2[f].values
-            r_mu = r_arr.mean()
-            f_mu = f_arr.mean()
-            r_sigma = r_arr.std()
-            f_sigma = f_arr.std()
-            std_check = (abs(r_sigma - f_sigma)/r_sigma)*100
-            mean_check = (abs(r_mu - f_mu)/r_mu)*100
-            std_check = round(std_check, 2)
-            mean_check = round(mean_check, 2)
-            text = '''STD diff = {0}%
-                      Mean diff = {1}%'''.format(std_check, mean_check) 
-            fig, ax = plt.subplots()
-            plt.hist(r_arr, bins = bins, alpha=0.5, density = True, label='real data')
-            plt.hist(f_arr, bins = bins, alpha=0.5, density = True, label='synthetic data')
-            plt.legend(loc='upper right')
-            plt.title('Histogram of {}'.format(r))
-            plt.xlabel(r, fontsize = 8)
-            plt.ylabel('Norm frequency', fontsize = 8) 
-            plt.xticks(fontsize = 8)
-            plt.yticks(fontsize = 8)
-            plt.figtext(0.33, -0.02, text, ha = 'right') 
-            plt.tight_layout()           
+        engine = DistributionStatistics()
+        self.hist_table, self.histograms = engine.histogram_comparison(dataframe1, dataframe2, bins)
+        if column is None:
+            column = self.hist_table['column'].iloc[0]
+        row = self.hist_table[self.hist_table['column'] == column].iloc[0]
+        edges, r_counts, f_counts = self.histograms[column]
+        r_arr = dataframe1[column].values
+        f_arr = dataframe2[column].values
+        r_mu = np.nanmean(r_arr)
+        f_mu = np.nanmean(f_arr)
+        r_sigma = np.nanstd(r_arr)
+        f_sigma = np.nanstd(f_arr)
+        std_check = (abs(r_sigma - f_sigma)/r_sigma)*100
+        mean_check = (abs(r_mu - f_mu)/r_mu)*100
+        std_check = round(std_check, 2)
+        mean_check = round(mean_check, 2)
+        text = ('STD diff = {0}%   Mean diff = {1}%\n'
+                'JS = {2}   Wasserstein = {3}   TV = {4}').format(std_check, mean_check, 
+                round(row['JS'], 3), round(row['wasserstein'], 3), round(row['TV'], 3))
+        widths = np.diff(edges)
+        fig = Figure()
+        ax = fig.subplots()
+        ax.stairs(r_counts/max(r_counts.sum(), 1)/widths, edges, fill = True, alpha=0.5, 
+                  label='real data')
+        ax.stairs(f_counts/max(f_counts.sum(), 1)/widths, edges, fill = True, alpha=0.5, 
+                  label='synthetic data')
+        ax.legend(loc='upper right')
+        ax.set_title('Histogram of {}'.format(column))
+        ax.set_xlabel(column, fontsize = 8)
+        ax.set_ylabel('Norm frequency', fontsize = 8) 
+        ax.tick_params(labelsize = 8)
+        fig.text(0.5, 0.01, text, ha = 'center', fontsize = 8) 
+        fig.tight_layout(rect = (0, 0.08, 1, 1))           
             
-            return fig
+        return fig
     
     # comparison of data distribution using statistical methods 
     #-------------------------------------------------------------------------- 
-    def KS_test(self, dataframe1, dataframe2):
+    def KS_test(self, dataframe1, dataframe2, column = None):
         
         """ 
-        data_check(dataframe1, dataframe2, path)
+        KS_test(dataframe1, dataframe2, column)
         
         Check the similarity beteween the real and synthetic data using the 
         Kolmogorov-Smirnoff test to compare the cumulative distribution functions 
-        of the dataseries. The P value list for all dataframe columns is generated 
-        and called as self.pv_list.  
+        of the dataseries. The exact two-sample statistics and P values of all 
+        columns are computed at once (see DistributionStatistics.KS_statistics), 
+        and are stored in self.KS_table, self.pv_list and self.desc_list. The 
+        empirical CDFs of the selected column are plotted.  
         
         Keyword arguments:  
             
         dataframe1 (pd.dataframe):  dataframe of real numbers (original dataframe)
         dataframe2 (pd.dataframe):  dataframe of fake numbers (synthetic dataframe)
-        path (str):                 figures (.jpeg) folder path
+        column (str):               column to be plotted (first column if not given)
         
         Returns:
             
-        None
+        fig (Figure): CDF comparison of the selected column
         
         """
-        self.pv_list = []
-        self.real_list = []
-        self.fake_list = [] 
-        for col1, col2 in zip(dataframe1.columns, dataframe2.columns):
-            array = dataframe1[col1].values
-            self.real_list.append(array)
-            array = dataframe2[col2].values        
-            self.fake_list.append(array)
-        for (r, f, t) in tqdm(zip(self.real_list, self.fake_list, dataframe1.columns)):
-            ry, rx = np.histogram(r, bins = 'auto')
-            sy, sx = np.histogram(f, bins = 'auto')
-            real_cumsum = np.cumsum(ry)
-            fake_cumsum = np.cumsum(sy)
-            norm_real_cumsum = [x/real_cumsum[-1] for x in real_cumsum]
-            norm_fake_cumsum = [x/fake_cumsum[-1] for x in fake_cumsum]
-            statistic, p_value = ks_2samp(real_cumsum, fake_cumsum, 
-                                          alternative = 'two-sided')
-            statistic = round(statistic, 2)
-            p_value = round(p_value, 3)
-            self.pv_list.append(p_value)
-            text = '''Statistics = {0}%
-                      P value = {1}'''.format(statistic, p_value)
-            fig, ax = plt.subplots()   
-            plt.plot(rx[:-1], norm_real_cumsum, c = 'blue', label = 'real data')
-            plt.plot(sx[:-1], norm_fake_cumsum, c = 'orange', label = 'synthetic data')
-            plt.xlabel(t, fontsize = 8)
-            plt.ylabel('Cumulative norm frequency', fontsize = 8) 
-            plt.xticks(fontsize = 8)
-            plt.yticks(fontsize = 8)
-            plt.legend(loc='upper left')
-            plt.title('CDF of {}'.format(t))
-            plt.figtext(0.33, -0.02, text, ha = 'right')
-            plt.tight_layout()                        
-        self.desc_list = []        
-        for f in self.pv_list:
-            if f >= 0.05:
-                desc = 'Generated distribution is not equal'
-            else:
-                desc = 'Generated distribution is equal'
-            self.desc_list.append(desc)
+        engine = DistributionStatistics()
+        self.KS_table = engine.KS_statistics(dataframe1, dataframe2)
+        self.pv_list = self.KS_table['p'].round(3).tolist()
+        self.desc_list = self.KS_table['verdict'].tolist()
+        self.real_list = [dataframe1[c].values for c in self.KS_table['column']]
+        self.fake_list = [dataframe2[c].values for c in self.KS_table['column']]
+        if column is None:
+            column = self.KS_table['column'].iloc[0]
+        row = self.KS_table[self.KS_table['column'] == column].iloc[0]
+        r = np.sort(dataframe1[column].dropna().values)
+        f = np.sort(dataframe2[column].dropna().values)
+        text = 'Statistics = {0}   P value = {1}'.format(round(row['D'], 2), round(row['p'], 3))
+        fig = Figure()
+        ax = fig.subplots()
+        ax.step(r, np.arange(1, r.size + 1)/r.size, c = 'blue', label = 'real data')
+        ax.step(f, np.arange(1, f.size + 1)/f.size, c = 'orange', label = 'synthetic data')
+        ax.set_xlabel(column, fontsize = 8)
+        ax.set_ylabel('Cumulative norm frequency', fontsize = 8) 
+        ax.tick_params(labelsize = 8)
+        ax.legend(loc='upper left')
+        ax.set_title('CDF of {}'.format(column))
+        fig.text(0.5, 0.01, text, ha = 'center', fontsize = 8)
+        fig.tight_layout(rect = (0, 0.05, 1, 1))
 
-            return fig
+        return fig
             
 # define class for correlations calculations
 #==============================================================================
@@ -145,33 +148,37 @@ class DataValidator:
 class MultiCorrelator:
     
     """ 
-    MultiCorrelator(dataframe)
+    MultiCorrelator(workers)
     
     Calculates the correlation matrix of a given dataframe using specific methods.
     The internal functions retrieves correlations based on Pearson, Spearman and Kendall
-    methods. This class is also used to plot the correlation heatmap and filter correlations
+    methods. Spearman and Kendall correlations are computed by a RankCorrelation engine,
+    which caches the ranks of each table so that the same data is ranked only once.
+    This class is also used to plot the correlation heatmap and filter correlations
     from the original matrix based on given thresholds. Returns the correlation matrix
     
     Keyword arguments: 
         
-    dataframe (pd.dataframe): target dataframe
+    workers (int): number of worker processes used for Kendall correlations
     
     Returns:
         
     df_corr (pd.dataframe): correlation matrix in dataframe form
                 
     """
+    def __init__(self, workers = 1):
+        self.engine = RankCorrelation(workers)
    
     # Spearman correlation calculation
     #--------------------------------------------------------------------------
     def Spearman_corr(self, dataframe, decimals):
-        df_corr = dataframe.corr(method = 'spearman').round(decimals)
+        df_corr = self.engine.Spearman(dataframe).round(decimals)
         return df_corr
     
     # Kendall correlation calculation
     #--------------------------------------------------------------------------    
     def Kendall_corr(self, dataframe, decimals):
-        df_corr = dataframe.corr(method = 'kendall').round(decimals)
+        df_corr = self.engine.Kendall(dataframe).round(decimals)
         return df_corr
     
     # Pearson correlation calculation
@@ -235,18 +242,16 @@ class MultiCorrelator:
         None
         
         """ 
-        plt.subplot(2, 1, 1)
+        fig = Figure()
+        ax_real, ax_fake = fig.subplots(2, 1)
         cmap = sns.diverging_palette(230, 20, as_cmap=True)
         sns.heatmap(matrix_real, square=True, annot=False, mask = False, 
-                    cmap=cmap, yticklabels=False, xticklabels=False)
-        plt.title('Real data')
-        plt.subplot(2, 1, 2)
+                    cmap=cmap, yticklabels=False, xticklabels=False, ax = ax_real)
+        ax_real.set_title('Real data')
         sns.heatmap(matrix_fake, square=True, annot=False, mask = False, 
-                    cmap=cmap, yticklabels=False, xticklabels=False)
-        plt.title('Synthetic data')
-        plt.tight_layout()
-
-        fig = plt.gcf()
+                    cmap=cmap, yticklabels=False, xticklabels=False, ax = ax_fake)
+        ax_fake.set_title('Synthetic data')
+        fig.tight_layout()
 
         return fig        
         
@@ -257,13 +262,14 @@ class MultiCorrelator:
     def corr_filter(self, matrix, threshold): 
         
         """
-        corr_filter(matrix, path, dpi)
+        corr_filter(matrix, threshold)
         
         Generates filtered lists of correlation pairs, based on the given threshold.
-        Weak correlations are those below the threshold, strong correlations are those
-        above the value and zero correlations identifies all those correlation
-        with coefficient equal to zero. Returns the strong, weak and zero pairs lists
-        respectively.
+        Weak correlations are those below the threshold (absolute value), strong 
+        correlations are those above the value and zero correlations identifies all 
+        those correlation with coefficient equal to zero. Each pair of columns is 
+        taken once from the upper triangle of the matrix, and the pairs are sorted
+        by coefficient. Returns the strong, weak and zero pairs lists respectively.
         
         Keyword arguments:    
         matrix (pd.dataframe): target correlation matrix
@@ -271,24 +277,55 @@ class MultiCorrelator:
         
         Returns:
             
-        strong_pairs (list): filtered strong pairs
-        weak_pairs (list):   filtered weak pairs
-        zero_pairs (list):   filtered zero pairs
+        strong_pairs (pd.dataframe): filtered strong pairs
+        weak_pairs (pd.dataframe):   filtered weak pairs
+        zero_pairs (pd.dataframe):   filtered zero pairs
                        
         """        
-        self.corr_pairs = matrix.unstack()
-        self.sorted_pairs = self.corr_pairs.sort_values(kind="quicksort")
-        self.strong_pairs = self.sorted_pairs[(self.sorted_pairs) >= threshold]
-        self.strong_pairs = self.strong_pairs.reset_index(level = [0,1])
-        mask = (self.strong_pairs.level_0 != self.strong_pairs.level_1) 
-        self.strong_pairs = self.strong_pairs[mask]        
-        self.weak_pairs = self.sorted_pairs[(self.sorted_pairs) >= -threshold]
-        self.weak_pairs = self.weak_pairs.reset_index(level = [0,1])
-        mask = (self.weak_pairs.level_0 != self.weak_pairs.level_1) 
-        self.weak_pairs = self.weak_pairs[mask]        
-        self.zero_pairs = self.sorted_pairs[(self.sorted_pairs) == 0]
-        self.zero_pairs = self.zero_pairs.reset_index(level = [0,1])
-        mask = (self.zero_pairs.level_0 != self.zero_pairs.level_1) 
-        self.zero_pairs_P = self.zero_pairs[mask]
+        columns = np.array(matrix.columns, dtype = object)
+        rows, cols = np.triu_indices(len(columns), k = 1)
+        values = matrix.to_numpy(dtype = float)[rows, cols]
+        order = np.argsort(values, kind = 'quicksort')
+        order = order[~np.isnan(values[order])]
+        sorted_values = values[order]
+        def select(mask):
+            index = order[mask]
+            return pd.DataFrame({'level_0' : columns[rows[index]], 'level_1' : columns[cols[index]],
+                                 0 : values[index]})
+        self.strong_pairs = select(np.abs(sorted_values) >= threshold)
+        self.weak_pairs = select(np.abs(sorted_values) < threshold)
+        self.zero_pairs = select(sorted_values == 0)
         
         return self.strong_pairs, self.weak_pairs, self.zero_pairs
+
+    # drift between real and synthetic correlation matrices
+    #--------------------------------------------------------------------------
+    def corr_drift(self, matrix_real, matrix_fake, top_k = 10, threshold = 0.1):
+
+        """
+        corr_drift(matrix_real, matrix_fake, top_k, threshold)
+        
+        Compares the real and synthetic correlation matrices pair by pair (see 
+        CorrelationDrift), returning the pairs with the largest absolute drift, 
+        the summary statistics of the drift and the pairs whose drift is above 
+        the threshold.
+        
+        Keyword arguments:    
+        matrix_real (pd.dataframe): real data correlation matrix
+        matrix_fake (pd.dataframe): fake data correlation matrix
+        top_k (int):                number of pairs with the largest drift
+        threshold (float):          threshold value of the absolute drift
+        
+        Returns:
+            
+        top_pairs (pd.dataframe):     pairs with the largest drift
+        summary (dict):               drift statistics
+        drifted_pairs (pd.dataframe): pairs with drift above the threshold
+        
+        """
+        drift = CorrelationDrift(matrix_real, matrix_fake)
+        top_pairs = drift.top_pairs(top_k)
+        summary = drift.summary((threshold,))
+        drifted_pairs = drift.threshold_pairs(threshold)
+
+        return top_pairs, summary, drifted_pairs
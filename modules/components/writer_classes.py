@@ -0,0 +1,355 @@
+import os
+import codecs
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+
+# define the class for writing synthetic data to a .csv file chunk by chunk. Chunks
+# are encoded by the vectorized pyarrow CSV writer, if available
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class CSVWriter:
+
+    """
+    CSVWriter(path, sep, encoding, compression)
+
+    Writes dataframe chunks to a .csv file, with the header written once. Chunks
+    are converted to Arrow tables and encoded column by column by the pyarrow CSV
+    writer, which is much faster than the row based pandas writer. The Arrow 
+    writer quotes the header and the text values and writes booleans in lower
+    case (true, false), which pd.read_csv parses back to the same values. The
+    Arrow writer only encodes UTF-8 text: with other encodings, or if pyarrow is
+    not installed, chunks are appended with pd.dataframe.to_csv instead.
+
+    Keyword arguments:
+
+    path (str):        path of the output file
+    sep (str):         separator of the .csv file
+    encoding (str):    encoding of the .csv file
+    compression (str): not used (kept for a common writer interface)
+
+    """
+    extension = '.csv'
+
+    def __init__(self, path, sep = ';', encoding = 'utf-8', compression = None):
+        self.path = path
+        self.sep = sep
+        self.encoding = encoding
+        self.writer = None
+        self.schema = None
+        self.num_rows = 0
+
+    # append a chunk of rows with the pandas writer
+    #--------------------------------------------------------------------------
+    def write_pandas(self, chunk):
+        chunk.to_csv(self.path, mode = 'w' if self.num_rows == 0 else 'a',
+                     header = self.num_rows == 0, index = False, sep = self.sep,
+                     encoding = self.encoding)
+        self.num_rows += chunk.shape[0]
+
+    # write a chunk of rows
+    #--------------------------------------------------------------------------
+    def write(self, chunk):
+        if codecs.lookup(self.encoding).name != 'utf-8':
+            return self.write_pandas(chunk)
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            return self.write_pandas(chunk)
+        table = pa.Table.from_pandas(chunk, schema = self.schema, preserve_index = False)
+        if self.writer is None:
+            self.schema = table.schema
+            options = pacsv.WriteOptions(delimiter = self.sep, quoting_style = 'needed')
+            self.writer = pacsv.CSVWriter(self.path, table.schema, write_options = options)
+        self.writer.write_table(table)
+        self.num_rows += chunk.shape[0]
+
+    # close the file
+    #--------------------------------------------------------------------------
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# define the class for writing synthetic data to a compressed .parquet file, one
+# row group per chunk
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class ParquetWriter:
+
+    """
+    ParquetWriter(path, compression)
+
+    Writes dataframe chunks to a .parquet file (requires pyarrow). Each chunk is
+    written as a row group, so that the file can be read back in chunks. Column
+    types are taken from the first chunk.
+
+    Keyword arguments:
+
+    path (str):        path of the output file
+    compression (str): compression codec (snappy, zstd, gzip, lz4, brotli or none)
+
+    """
+    extension = '.parquet'
+
+    def __init__(self, path, compression = 'snappy', **kwargs):
+        self.path = path
+        self.compression = compression or 'none'
+        self.writer = None
+        self.schema = None
+        self.num_rows = 0
+
+    # write a chunk of rows
+    #--------------------------------------------------------------------------
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(chunk, schema = self.schema, preserve_index = False)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression = self.compression)
+        self.writer.write_table(table)
+        self.num_rows += chunk.shape[0]
+
+    # close the file
+    #--------------------------------------------------------------------------
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# define the class for writing synthetic data to a .feather file (Arrow IPC format),
+# one record batch per chunk
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class FeatherWriter:
+
+    """
+    FeatherWriter(path, compression)
+
+    Writes dataframe chunks to a .feather file (Feather V2, that is the Arrow IPC
+    file format, requires pyarrow). Each chunk is written as a record batch, which
+    can be memory mapped when the file is read back. Column types are taken from
+    the first chunk.
+
+    Keyword arguments:
+
+    path (str):        path of the output file
+    compression (str): compression codec (lz4, zstd or none)
+
+    """
+    extension = '.feather'
+
+    def __init__(self, path, compression = 'lz4', **kwargs):
+        self.path = path
+        self.compression = None if compression in (None, 'none') else compression
+        self.writer = None
+        self.schema = None
+        self.num_rows = 0
+
+    # write a chunk of rows
+    #--------------------------------------------------------------------------
+    def write(self, chunk):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(chunk, schema = self.schema, preserve_index = False)
+        if self.writer is None:
+            self.schema = table.schema
+            options = pa.ipc.IpcWriteOptions(compression = self.compression)
+            self.writer = pa.ipc.new_file(self.path, table.schema, options = options)
+        self.writer.write_table(table)
+        self.num_rows += chunk.shape[0]
+
+    # close the file
+    #--------------------------------------------------------------------------
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# define the class for writing streamed chunks of synthetic data in the selected
+# format, either to a single file or to a folder of partition files
+#==============================================================================
+#==============================================================================
+#==============================================================================
+class DataWriter:
+
+    """
+    DataWriter(format, compression, partitioned, workers)
+
+    Writes the chunks produced by TableSampler.stream to disk in the selected
+    format. With partitioned output, the path is a folder and each chunk is
+    written to its own partition file (part-00000.parquet, part-00001.parquet, ...)
+    by a pool of threads, so that encoding and compression of a chunk overlap with
+    the generation of the next ones. The number of chunks held in memory is
+    bounded by twice the number of threads.
+
+    Keyword arguments:
+
+    format (str):       output format (csv, parquet or feather)
+    compression (str):  compression codec (default codec of the format if not given)
+    partitioned (bool): write one file per chunk in the output folder
+    workers (int):      number of threads writing the partition files
+
+    """
+    formats = {'csv' : CSVWriter, 'parquet' : ParquetWriter, 'feather' : FeatherWriter}
+
+    def __init__(self, format = 'csv', compression = None, partitioned = False, workers = 1):
+        if format not in self.formats:
+            raise ValueError('Unknown output format: {}'.format(format))
+        self.format = format
+        self.compression = compression
+        self.partitioned = partitioned
+        self.workers = max(workers, 1)
+
+    # extension of the output files
+    #--------------------------------------------------------------------------
+    @property
+    def extension(self):
+        return self.formats[self.format].extension
+
+    # open a writer of the selected format
+    #--------------------------------------------------------------------------
+    def open(self, path):
+        if self.compression is None:
+            return self.formats[self.format](path)
+
+        return self.formats[self.format](path, compression = self.compression)
+
+    # write a single chunk to a partition file (worker task)
+    #--------------------------------------------------------------------------
+    def write_partition(self, chunk, path):
+        with self.open(path) as writer:
+            writer.write(chunk)
+
+        return chunk.shape[0]
+
+    # remove an output file or folder
+    #--------------------------------------------------------------------------
+    def remove(self, path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    # move a completed output to its final path
+    #--------------------------------------------------------------------------
+    def replace(self, temp_path, path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(temp_path, path)
+
+    # concatenate output files into a single file
+    #--------------------------------------------------------------------------
+    def concatenate(self, paths, path):
+
+        """
+        concatenate(paths, path)
+
+        Concatenates output files of the selected format (e.g. the shards of a
+        table) into a single file. The .csv files are copied as raw bytes, with
+        the header of the first file only, while .parquet and .feather files are
+        rewritten record batch by record batch.
+
+        Keyword arguments:
+
+        paths (list): paths of the files to be concatenated, in order
+        path (str):   path of the output file
+
+        Returns:
+
+        path (str): path of the output file
+
+        """
+        if self.partitioned:
+            raise ValueError('Partitioned outputs cannot be concatenated')
+        if self.format == 'csv':
+            with open(path, 'wb') as output:
+                for id, source in enumerate(paths):
+                    with open(source, 'rb') as file:
+                        header = file.readline()
+                        if id == 0:
+                            output.write(header)
+                        shutil.copyfileobj(file, output, 1 << 24)
+            return path
+        import pyarrow.dataset as ds
+        format = 'ipc' if self.format == 'feather' else 'parquet'
+        with self.open(path) as writer:
+            for source in paths:
+                for batch in ds.dataset(source, format = format).to_batches():
+                    writer.write(batch.to_pandas())
+
+        return path
+
+    # write the streamed chunks
+    #--------------------------------------------------------------------------
+    def write(self, chunks, path, num_val = None, pbar = None):
+
+        """
+        write(chunks, path, num_val, pbar)
+
+        Writes the chunks to the output file (or to partition files in the output
+        folder) as soon as they are produced.
+
+        Keyword arguments:
+
+        chunks (iterable):     chunks of synthetic rows (pd.dataframe)
+        path (str):            path of the output file or folder
+        num_val (int):         total number of rows, for the progress bar (optional)
+        pbar (sg.ProgressBar): progress bar to be updated (optional)
+
+        Returns:
+
+        num_rows (int): number of rows written to disk
+
+        """
+        num_rows = 0
+        if not self.partitioned:
+            with self.open(path) as writer:
+                for chunk in chunks:
+                    writer.write(chunk)
+                    num_rows += chunk.shape[0]
+                    if pbar is not None:
+                        pbar.update(num_rows, max = num_val)
+            return num_rows
+        self.remove(path)
+        os.makedirs(path)
+        with ThreadPoolExecutor(max_workers = self.workers) as executor:
+            futures = []
+            for id, chunk in enumerate(chunks):
+                if len(futures) >= 2 * self.workers:
+                    num_rows += futures.pop(0).result()
+                    if pbar is not None:
+                        pbar.update(num_rows, max = num_val)
+                part_path = os.path.join(path, 'part-{:05d}{}'.format(id, self.extension))
+                futures.append(executor.submit(self.write_partition, chunk, part_path))
+            for future in futures:
+                num_rows += future.result()
+                if pbar is not None:
+                    pbar.update(num_rows, max = num_val)
+
+        return num_rows
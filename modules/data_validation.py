@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import PySimpleGUI as sg
 import warnings
@@ -11,6 +12,7 @@ warnings.simplefilter(action='ignore', category = FutureWarning)
 if __name__ == '__main__':
     sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from modules.components.validation_classes import DataValidator, MultiCorrelator
+from modules.components.report_classes import ValidationReport
 import modules.global_variables as GlobVar
 
 # [GLOBAL VARIABLES]
@@ -19,6 +21,8 @@ file_name = GlobVar.file_name
 df = GlobVar.dataframe
 df_synthetic = GlobVar.synthetic_dataframe
 canvas_draw = False 
+regressor = MultiCorrelator(os.cpu_count())
+report_thread = None
 
 # [WINDOW THEME AND OPTIONS]
 #==============================================================================
@@ -28,9 +32,10 @@ sg.set_options(font = ('Arial', 11), element_padding = (6,6))
 # [LAYOUT OF FILE SAVING FRAME]
 #==============================================================================
 save_button = sg.Button('Save', key = '-SAVE-', disabled=True)
+report_button = sg.Button('Save report', key = '-REPORT-', disabled=True)
 path_input = sg.Input(key = '-SAVEPATH-', expand_x = True, enable_events=True)
 folder_browse = sg.FolderBrowse()
-save_frame = sg.Frame('Save file', layout = [[path_input, folder_browse, save_button]],
+save_frame = sg.Frame('Save file', layout = [[path_input, folder_browse, save_button, report_button]],
                       expand_x=True)
 
 # [LAYOUT OF THE ANALYSIS FRAME]
@@ -53,6 +58,19 @@ main_layout = [[main_text],
                [sg.HSeparator()],
                [save_frame]]              
 
+# [REPORT SAVING THREAD]
+#==============================================================================
+# the report is rendered in this process on a background thread: worker processes
+# would re-execute the GUI script under the spawn start method, and the event loop
+# must not be blocked while the figures are rendered
+def save_report(folder):
+    try:
+        report = ValidationReport(workers = 1)
+        report_path = report.run(df, df_synthetic, folder)
+        validation_window.write_event_value('-REPORTDONE-', report_path)
+    except Exception as e:
+        validation_window.write_event_value('-REPORTFAILED-', '{}: {}'.format(type(e).__name__, e))
+
 # [WINDOW LOOP]
 #==============================================================================
 validation_window = sg.Window('Simple table generator V1.0', main_layout, 
@@ -81,6 +99,7 @@ while True:
         if canvas_draw == True:
             fig_canvas.get_tk_widget().pack_forget()
             canvas_draw = False 
+        validation = DataValidator()
         figure = validation.KS_test(df, df_synthetic)
         pv_list = validation.pv_list
         real_list = validation.real_list
@@ -98,7 +117,6 @@ while True:
         if canvas_draw == True:
             fig_canvas.get_tk_widget().pack_forget()
             canvas_draw = False 
-        regressor = MultiCorrelator()        
         df_corr_real = regressor.Spearman_corr(df, 2)
         df_corr_synth = regressor.Spearman_corr(df_synthetic, 2)
         figure = regressor.double_corr_heatmap(df_corr_real, df_corr_synth) 
@@ -106,7 +124,35 @@ while True:
         fig_canvas.draw()
         fig_canvas.get_tk_widget().pack(side='top', fill='both', expand=True) 
         canvas_draw = True
+
+    # [ENABLE REPORT SAVING]
+    #==========================================================================
+    if event == '-SAVEPATH-':
+        validation_window['-REPORT-'].update(disabled = not values['-SAVEPATH-'])
+
+    # [SAVE VALIDATION REPORT]
+    #==========================================================================
+    if event == '-REPORT-':
+        if report_thread is None:
+            report_thread = threading.Thread(target = save_report, args = (values['-SAVEPATH-'],),
+                                             daemon = True)
+            validation_window['-REPORT-'].update(disabled = True)
+            main_text.update('Saving report...')
+            report_thread.start()
+
+    # [END OF REPORT SAVING]
+    #==========================================================================
+    if event in ('-REPORTDONE-', '-REPORTFAILED-'):
+        report_thread.join()
+        report_thread = None
+        validation_window['-REPORT-'].update(disabled = not values['-SAVEPATH-'])
+        if event == '-REPORTDONE-':
+            main_text.update('Report saved in {}'.format(values['-REPORTDONE-']))
+        else:
+            main_text.update('Report failed ({})'.format(values['-REPORTFAILED-']))
         
+if report_thread is not None:
+    report_thread.join()
 validation_window.close()
 
 
@@ -0,0 +1,85 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from modules.components.data_classes import DataGenerator, DataLoader
+from modules.components.sampler_classes import TableSampler, BandwidthSelector
+
+
+# synthetic values out of the range of a downcasted integer column are clipped
+#------------------------------------------------------------------------------
+def test_restore_dtype_clips_downcast_integers():
+    table_sampler = TableSampler('KDE', [], [])
+    values = np.array([-300.4, -128.6, 0.2, 127.4, 500.0])
+    restored = table_sampler.restore_dtype(values, np.dtype('int8'))
+    assert restored.dtype == np.int8
+    assert restored.tolist() == [-128, -128, 0, 127, 127]
+    restored = table_sampler.restore_dtype(np.array([-5.0, np.nan, 300.0]), np.dtype('uint8'))
+    assert restored.dtype == 'UInt8'
+    assert restored[0] == 0 and pd.isna(restored[1]) and restored[2] == 255
+    restored = table_sampler.restore_dtype(np.array([-3.4, np.nan, 300.6]), pd.UInt8Dtype())
+    assert restored.dtype == 'UInt8'
+    assert restored[0] == 0 and pd.isna(restored[1]) and restored[2] == 255
+
+
+# KDE sampling of a downcasted int8 column does not wrap around
+#------------------------------------------------------------------------------
+def test_KDE_downcast_column_does_not_wrap():
+    rng = np.random.default_rng(0)
+    dataframe = DataLoader('').downcast(pd.DataFrame({'level' : rng.integers(0, 128, 2000)}))
+    assert dataframe['level'].dtype == np.int8
+    table_sampler = DataGenerator().fit_samplers(dataframe, 'KDE', seed = 0)
+    synthetic = table_sampler.sample(200000, seed = 0)['level']
+    assert synthetic.dtype == np.int8
+    assert (synthetic > -100).all()
+
+
+# partial blocks only draw the rows needed, with the same rows as full blocks
+#------------------------------------------------------------------------------
+def test_partial_blocks_match_full_blocks():
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame({'value' : np.where(rng.random(2000) < 0.1, np.nan,
+                                                 rng.normal(size = 2000)),
+                              'group' : rng.choice(['a', 'b', 'c'], 2000)})
+    for method in ('CDF', 'COP', 'KDE'):
+        table_sampler = DataGenerator().fit_samplers(dataframe, method, seed = 0)
+        assert table_sampler.partial_draws
+        full = table_sampler.sample(70000, seed = 1)
+        assert table_sampler.sample(100, seed = 1).equals(full.iloc[:100])
+        chunks = pd.concat(list(table_sampler.stream(70000, 3000, seed = 1)), ignore_index = True)
+        assert chunks.equals(full)
+
+
+# missing values of the Gaussian copula are not tied to the latent values
+#------------------------------------------------------------------------------
+def test_copula_missing_values_are_independent():
+    rng = np.random.default_rng(0)
+    first = rng.normal(size = 20000)
+    dataframe = pd.DataFrame({'a' : first, 'b' : first + 0.5 * rng.normal(size = 20000)})
+    dataframe.loc[rng.random(20000) < 0.2, 'a'] = np.nan
+    table_sampler = DataGenerator().fit_samplers(dataframe, 'COP', seed = 0)
+    synthetic = table_sampler.sample(20000, seed = 1)
+    assert abs(synthetic['a'].isna().mean() - 0.2) < 0.02
+    assert abs(synthetic.loc[synthetic['a'].isna(), 'b'].mean()) < 0.1
+
+
+# columns without valid values are sampled as missing values by all methods
+#------------------------------------------------------------------------------
+def test_empty_columns_are_sampled_as_missing():
+    dataframe = pd.DataFrame({'value' : np.arange(300.0), 'empty' : np.nan})
+    for method in ('CDF', 'COP', 'KDE', 'TDF'):
+        synthetic = DataGenerator().fit_samplers(dataframe, method, seed = 0).sample(1000, seed = 1)
+        assert synthetic['empty'].isna().all()
+        assert synthetic['value'].notna().all()
+
+
+# leave-one-out bandwidth of tied integer data does not collapse to the grid edge
+#------------------------------------------------------------------------------
+def test_LOO_bandwidth_of_integer_data():
+    selector = BandwidthSelector('gaussian')
+    rng = np.random.default_rng(0)
+    for array in (rng.poisson(3, 800).astype(float), rng.integers(0, 2, 800).astype(float)):
+        bandwidth = selector.binned_LOO(array)
+        assert bandwidth >= min(1.0, selector.silverman(array))